@@ -0,0 +1,61 @@
+"""
+Created on Oct 19, 2026
+
+Compare the JSON backends available to faas_form.codec across payload sizes.
+
+    python -m benchmarks.bench_codec [--sizes 1000,100000,...] [--repeat N]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import random
+import string
+import timeit
+
+from faas_form import codec
+from faas_form import payloads
+
+def make_payload(size):
+    """An invoke request with a list<string> input and some scalar inputs,
+    with roughly size bytes of JSON."""
+    rand = random.Random(size)
+    payload = {}
+    payloads.set_invoke_request(payload)
+    payloads.set_capabilities(payload)
+    payload['name'] = 'benchmark'
+    payload['count'] = 42.0
+    payload['enabled'] = True
+    hosts = []
+    total = 0
+    while total < size:
+        host = ''.join(rand.choice(string.ascii_lowercase) for _ in range(12)) + '.example.com'
+        hosts.append(host)
+        total += len(host) + 4
+    payload['hosts'] = hosts
+    payload['results'] = [{'host': h, 'status': 'ok', 'latency_ms': rand.random() * 100} for h in hosts[:len(hosts) // 4]]
+    return payload
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,100000,1000000,5000000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(args=args)
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    backends = codec.available_backends()
+
+    print('{:>10}  {:>8}  {:>12}  {:>12}'.format('size', 'backend', 'dumps (ms)', 'loads (ms)'))
+    for size in sizes:
+        payload = make_payload(size)
+        for backend in backends:
+            codec.set_backend(backend)
+            data = codec.dumps(payload)
+            number = max(1, int(1e6 / max(len(data), 1)))
+            dumps_time = min(timeit.repeat(lambda: codec.dumps(payload), number=number, repeat=args.repeat)) / number
+            loads_time = min(timeit.repeat(lambda: codec.loads(data), number=number, repeat=args.repeat)) / number
+            print('{:>10}  {:>8}  {:>12.3f}  {:>12.3f}'.format(len(data), backend, dumps_time * 1000, loads_time * 1000))
+    codec.set_backend()
+
+if __name__ == '__main__':
+    main()
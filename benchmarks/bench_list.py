@@ -0,0 +1,78 @@
+"""
+Created on Oct 19, 2026
+
+Measure the time and memory of discovery (FaaSFunction.list) against a
+local stand-in server as the number of functions grows, compared with
+creating a session per discovered function (with --compare; slow).
+
+    python -m benchmarks.bench_list [--counts 100,1000,3000] [--compare]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import boto3
+
+from faas_form import faas
+from faas_form.standin import StandinServer
+
+def handler(event, context):
+    return {}
+
+def measure(func):
+    tracemalloc.start()
+    start = time.time()
+    result = func()
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--counts', default='100,1000,3000')
+    parser.add_argument('--compare', action='store_true', help='Also measure creating a session per function')
+    args = parser.parse_args(args=args)
+
+    cache_dir = tempfile.mkdtemp()
+    os.environ['FAAS_FORM_CACHE_DIR'] = cache_dir
+    session = boto3.session.Session(aws_access_key_id='standin',
+                                    aws_secret_access_key='standin',
+                                    region_name='us-east-1')
+
+    header = '{:>8}  {:>10}  {:>12}'.format('count', 'ls (ms)', 'peak (KiB)')
+    if args.compare:
+        header += '  {:>22}  {:>24}'.format('session each (ms)', 'session each (KiB)')
+    print(header)
+    try:
+        with StandinServer() as server:
+            os.environ[faas.ENDPOINT_URL_ENV_VAR] = server.url
+            added = 0
+            for count in [int(c) for c in args.counts.split(',')]:
+                for i in range(added, count):
+                    server.add_function('function-{:05d}'.format(i), handler, tags={faas.FaaSFunction.MARKER: ''})
+                added = max(added, count)
+
+                # warm up botocore's model loading so it isn't counted
+                faas.FaaSFunction.list(session=session)
+
+                funcs, elapsed, peak = measure(lambda: faas.FaaSFunction.list(session=session))
+
+                line = '{:>8}  {:>10.1f}  {:>12.0f}'.format(len(funcs), elapsed * 1000, peak / 1024.0)
+                if args.compare:
+                    # what discovery used to cost: a session for every function
+                    _, eager_elapsed, eager_peak = measure(
+                        lambda: [faas.FaaSFunction(d.id, name=d.name, session=boto3.session.Session()) for d in funcs.values()])
+                    line += '  {:>22.1f}  {:>24.0f}'.format((elapsed + eager_elapsed) * 1000, (peak + eager_peak) / 1024.0)
+                print(line)
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Created on Oct 19, 2026
+
+Measure the client/handler protocol at in-memory speed, by calling a
+handler in-process through faas_form.local: schema requests, and
+multi-round reinvoke sessions, with the module imported once.
+
+    python -m benchmarks.bench_local [--handler example_lambda:handler] [--rounds N] [--repeat N]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import timeit
+
+from faas_form import payloads
+from faas_form.local import LocalFunction
+from faas_form.schema import Schema
+
+NAME = 'Merlin'
+
+ADVANCED_VALUES = {
+    'required': 'value',
+    'lowercase_only': 'a',
+    'shhh': 'secret',
+    'num': 1.5,
+    'num_int': 2.0,
+    'strings': ['a', 'b', 'c'],
+    'strings_with_size': ['a', 'b'],
+    'result': True,
+}
+
+def run_session(func, rounds):
+    """Run one session against the example handler: the simple form, then
+    the advanced form repeated for the given number of rounds."""
+    schema = func.get_schema()
+    values = schema.validate_values({'name': NAME})
+    for i in range(rounds + 1):
+        payload = func.read_payload(func.invoke(values))
+        if not payloads.is_reinvoke_response(payload):
+            break
+        schema = Schema.from_json(payloads.get_schema(payload))
+        answers = dict(ADVANCED_VALUES, again=i < rounds - 1)
+        values = schema.validate_values(answers)
+    return payload
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--handler', default='example_lambda:handler')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args(args=args)
+
+    func = LocalFunction(args.handler)
+
+    print('{:>24}  {:>12}'.format('operation', 'time (ms)'))
+    timings = [
+        ('schema request', lambda: func.get_schema()),
+        ('session ({} rounds)'.format(args.rounds), lambda: run_session(func, args.rounds)),
+    ]
+    for label, call in timings:
+        elapsed = min(timeit.repeat(call, number=args.number, repeat=args.repeat)) / args.number
+        print('{:>24}  {:>12.3f}'.format(label, elapsed * 1000))
+
+if __name__ == '__main__':
+    main()
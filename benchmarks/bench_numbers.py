@@ -0,0 +1,60 @@
+"""
+Created on Oct 19, 2026
+
+Compare sending the values of a list<number> input as a JSON list with
+sending them packed: request size, the time for the client to encode the
+request, and the time for a handler to decode it into an array, for
+integer and float series of increasing length.
+
+    python -m benchmarks.bench_numbers [--counts 100,10000,1000000] [--repeat N]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import array
+import random
+import timeit
+
+from faas_form import codec
+from faas_form import payloads
+
+def series(kind, count):
+    rand = random.Random(count)
+    if kind == 'int':
+        return array.array('d', (rand.randint(0, 30000) for _ in range(count)))
+    return array.array('d', (rand.gauss(0, 1000) for _ in range(count)))
+
+def encode(values, capabilities):
+    request = {}
+    payloads.set_invoke_request(request)
+    payloads.set_values(request, {'series': values}, capabilities)
+    return codec.dumps(request)
+
+def decode(data):
+    return payloads.get_numbers(payloads.decode_request(codec.loads(data)), 'series')
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--counts', default='100,10000,1000000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(args=args)
+
+    print('{:>6}  {:>8}  {:>7}  {:>10}  {:>11}  {:>11}'.format(
+        'kind', 'count', 'wire', 'size', 'encode (ms)', 'decode (ms)'))
+    for kind in ['int', 'float']:
+        for count in [int(c) for c in args.counts.split(',')]:
+            values = series(kind, count)
+            number = max(1, 100000 // count)
+            for wire, capabilities in [('json', []), ('packed', [payloads.PACKED_CAPABILITY])]:
+                data = encode(values, capabilities)
+                assert decode(data).tolist() == values.tolist()
+                encode_time = min(timeit.repeat(lambda: encode(values, capabilities),
+                                                number=number, repeat=args.repeat)) / number
+                decode_time = min(timeit.repeat(lambda: decode(data),
+                                                number=number, repeat=args.repeat)) / number
+                print('{:>6}  {:>8}  {:>7}  {:>10}  {:>11.3f}  {:>11.3f}'.format(
+                    kind, count, wire, len(data), encode_time * 1000, decode_time * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Created on Oct 19, 2026
+
+Benchmark discovery, schema requests, and invocations end to end through
+botocore, against a local stand-in server (faas_form.standin), so that
+the client-side overhead can be measured without the network.
+
+    python -m benchmarks.bench_standin [--functions N] [--requests N] [--concurrency N]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import boto3
+
+from faas_form import faas
+from faas_form import payloads
+from faas_form.standin import StandinServer
+
+import example_lambda
+
+def percentile(latencies, p):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100.0))]
+
+def report(label, latencies, elapsed):
+    print('{:>12}  {:>8}  {:>10.1f}  {:>10.2f}  {:>10.2f}'.format(
+        label, len(latencies), len(latencies) / elapsed,
+        percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000))
+
+def run_concurrently(func, requests, concurrency):
+    latencies = []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            start = time.time()
+            func()
+            latency = time.time() - start
+            with lock:
+                latencies.append(latency)
+
+    start = time.time()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.time() - start
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--functions', type=int, default=500, help='The number of functions to discover')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args(args=args)
+
+    cache_dir = tempfile.mkdtemp()
+    os.environ['FAAS_FORM_CACHE_DIR'] = cache_dir
+    session = boto3.session.Session(aws_access_key_id='standin',
+                                    aws_secret_access_key='standin',
+                                    region_name='us-east-1')
+
+    try:
+        with StandinServer() as server:
+            os.environ[faas.ENDPOINT_URL_ENV_VAR] = server.url
+            for i in range(args.functions):
+                server.add_function('example-{:05d}'.format(i), example_lambda.handler,
+                                    tags={faas.FaaSFunction.MARKER: 'Example {}'.format(i)})
+            arn = server.add_function('example', example_lambda.handler, tags={faas.FaaSFunction.MARKER: ''})
+
+            print('{:>12}  {:>8}  {:>10}  {:>10}  {:>10}'.format('operation', 'count', 'per sec', 'p50 (ms)', 'p99 (ms)'))
+
+            start = time.time()
+            funcs = faas.FaaSFunction.list(session=session)
+            elapsed = time.time() - start
+            report('ls', [elapsed], elapsed)
+            assert len(funcs) == args.functions + 1
+
+            func = faas.FaaSFunction(arn, session=session)
+            func.client # create the client before sharing it across threads
+            latencies, elapsed = run_concurrently(func.get_schema, args.requests, args.concurrency)
+            report('get_schema', latencies, elapsed)
+
+            values = func.get_schema().validate_values({'name': 'Benchmark'})
+            def invoke():
+                payload = func.read_payload(func.invoke(values))
+                assert payloads.get_result(payload)
+            latencies, elapsed = run_concurrently(invoke, args.requests, args.concurrency)
+            report('invoke', latencies, elapsed)
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Created on Oct 19, 2026
+
+Compare carrying state across the rounds of a reinvoke workflow in const
+inputs of the reinvoke schema (echoed in every schema and request) with
+continuation state tokens: payload sizes per round, and the latency of a
+whole session, calling the handlers in-process through faas_form.local.
+
+    python -m benchmarks.bench_state [--rounds N] [--repeat N] [--number N]
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import timeit
+
+import faas_form
+from faas_form import payloads
+from faas_form.local import LocalFunction
+from faas_form.schema import Schema
+
+SECRET = 'benchmark-secret'
+
+NOTE = 'a note of moderate length, entered each round'
+
+def _round_schema(round, history=None):
+    inputs = [
+        faas_form.StringInput('note', help='Enter a note for round {}'.format(round)),
+        faas_form.BooleanInput('again'),
+    ]
+    if history is not None:
+        inputs.append(faas_form.ConstInput('history', value=history))
+    return Schema(inputs, instructions='Round {}'.format(round))
+
+def const_handler(event, context):
+    """Carries the history of notes in a const input."""
+    event = faas_form.decode_request(event)
+    response = {}
+    if faas_form.is_schema_request(event):
+        faas_form.set_schema_reponse(response, _round_schema(1, history=[]), request=event)
+        return faas_form.encode_response(response, event)
+    history = event['history'] + [event['note']]
+    if event['again']:
+        faas_form.set_reinvoke_response(response, _round_schema(len(history) + 1, history=history))
+    else:
+        faas_form.set_result(response, '{} notes'.format(len(history)))
+    return faas_form.encode_response(response, event)
+
+def state_handler(event, context):
+    """Carries the history of notes in continuation state."""
+    event = faas_form.decode_request(event)
+    response = {}
+    if faas_form.is_schema_request(event):
+        faas_form.set_schema_reponse(response, _round_schema(1), request=event)
+        return faas_form.encode_response(response, event)
+    state = faas_form.get_state(event, secret=SECRET) or {'history': []}
+    history = state['history'] + [event['note']]
+    if event['again']:
+        faas_form.set_reinvoke_response(response, _round_schema(len(history) + 1),
+                                        state={'history': history}, secret=SECRET)
+    else:
+        faas_form.set_result(response, '{} notes'.format(len(history)))
+    return faas_form.encode_response(response, event)
+
+def run_session(func, rounds):
+    """Run a session of the given number of rounds, returning the request
+    and response sizes of each round."""
+    sizes = []
+    schema = func.get_schema()
+    state = None
+    for i in range(rounds):
+        values = schema.validate_values({'note': '{} {}'.format(NOTE, i), 'again': i < rounds - 1})
+        payload = func.read_payload(func.invoke(values, state=state))
+        sizes.append((func.last_call['request_size'], func.last_call['response_size']))
+        if not payloads.is_reinvoke_response(payload):
+            break
+        schema = Schema.from_json(payloads.get_schema(payload))
+        state = payloads.get_state_token(payload)
+    return sizes
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=100)
+    args = parser.parse_args(args=args)
+
+    funcs = [
+        ('const', LocalFunction('const', handler=const_handler)),
+        ('state', LocalFunction('state', handler=state_handler)),
+    ]
+
+    sizes = dict((label, run_session(func, args.rounds)) for label, func in funcs)
+    print('{:>6}  {:>10}  {:>10}  {:>10}  {:>10}'.format('round', 'const req', 'const resp', 'state req', 'state resp'))
+    for i in range(args.rounds):
+        print('{:>6}  {:>10}  {:>10}  {:>10}  {:>10}'.format(i + 1, *(sizes['const'][i] + sizes['state'][i])))
+    print('{:>6}  {:>10}  {:>10}  {:>10}  {:>10}'.format('total', *[
+        sum(s[j] for s in sizes[label]) for label in ['const', 'state'] for j in range(2)]))
+    print('')
+
+    print('{:>24}  {:>12}'.format('session', 'time (ms)'))
+    for label, func in funcs:
+        elapsed = min(timeit.repeat(lambda: run_session(func, args.rounds),
+                                    number=args.number, repeat=args.repeat)) / args.number
+        print('{:>24}  {:>12.3f}'.format('{} ({} rounds)'.format(label, args.rounds), elapsed * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -28,12 +28,13 @@ ADVANCED_SCHEMA = faas_form.Schema(
 )
 
 def handler(event, context):
+    event = faas_form.decode_request(event)
     print('Event:')
     print(event)
     if faas_form.is_schema_request(event):
         print('Returning simple schema')
         response = {}
-        faas_form.set_schema_reponse(response, SIMPLE_SCHEMA)
+        faas_form.set_schema_reponse(response, SIMPLE_SCHEMA, request=event)
     elif 'event_type' not in event:
         raise ValueError("Input event is invalid!")
     elif event['event_type'] == 'simple':
@@ -44,7 +45,7 @@ def handler(event, context):
         response = handle_advanced(event, context)
     print('Response:')
     print(response)
-    return response
+    return faas_form.encode_response(response, event)
 
 def handle_simple(event, context):
     name = event['name']
@@ -1,5 +1,8 @@
 from __future__ import absolute_import, print_function
 
+import time as _time
+_import_start = _time.time() # for tracing startup time
+
 def _get_version():
     import pkg_resources, codecs
     if not pkg_resources.resource_exists(__name__, '_version'):
@@ -11,5 +14,9 @@ from faas_form.payloads import (is_schema_request,
                                 set_schema_reponse,
                                 is_invoke_request,
                                 set_result,
-                                set_reinvoke_response)
+                                set_reinvoke_response,
+                                get_state,
+                                get_numbers,
+                                decode_request,
+                                encode_response)
 from .schema import *
\ No newline at end of file
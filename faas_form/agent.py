@@ -0,0 +1,456 @@
+"""
+Created on Oct 19, 2026
+
+An optional background agent (`faas-form serve`) that keeps sessions,
+Lambda clients (and their connections), discovery results, and schemas
+warm across CLI invocations. The CLI talks to it over a Unix socket in a
+per-user directory, and falls back to doing the work itself when the
+agent isn't running.
+
+Requests and responses are JSON objects, one per line:
+    {"method": ..., "params": {...}, "profile": ..., "region": ..., "credentials": ...}
+    {"result": ...} or {"error": {"type": ..., "message": ...}}
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+from six.moves import socketserver
+
+import errno
+import io
+import os
+import socket
+import struct
+import threading
+import time
+
+from . import codec
+from . import config
+from . import payloads
+from . import index
+from . import hedge
+from .faas import FaaSFunction, FunctionDescriptor, get_session
+from .schema import Schema
+from .cache import SchemaCache, FragmentCache
+
+AGENT_DIR = 'agent'
+SOCKET_NAME = 'agent.sock'
+DISABLE_ENV_VAR = 'FAAS_FORM_NO_AGENT'
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+# schemas are served from memory for this long before asking the function
+# whether they've changed
+DEFAULT_SCHEMA_MAX_AGE = 60
+CONNECT_TIMEOUT = 1.0
+
+class AgentError(Exception):
+    pass
+
+def get_socket_path():
+    """The agent socket, in a directory only the user can access (under
+    $XDG_RUNTIME_DIR if set, otherwise the cache dir)."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and not os.environ.get(config.CACHE_DIR_ENV_VAR):
+        path = os.path.join(runtime_dir, 'faas-form')
+        try:
+            os.makedirs(path, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+    else:
+        path = config.get_cache_dir(AGENT_DIR)
+    os.chmod(path, 0o700)
+    return os.path.join(path, SOCKET_NAME)
+
+CREDENTIAL_ENV_VARS = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN']
+
+def _session_key():
+    """The profile, region, and environment credentials (if any) the CLI
+    would use, so the agent can use the same."""
+    profile = os.environ.get('AWS_PROFILE') or os.environ.get('AWS_DEFAULT_PROFILE')
+    region = os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION')
+    credentials = None
+    if os.environ.get('AWS_ACCESS_KEY_ID'):
+        credentials = [os.environ.get(name) for name in CREDENTIAL_ENV_VARS]
+    return profile, region, credentials
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except socket.error:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+class AgentClient(object):
+    """Connections to a running agent, one per thread, so that concurrent
+    calls (e.g., for warming or hedging) are handled concurrently."""
+
+    @classmethod
+    def connect(cls, path=None):
+        """Connect to the agent, or return None if it isn't running (or
+        is disabled with FAAS_FORM_NO_AGENT)."""
+        if os.environ.get(DISABLE_ENV_VAR) or not hasattr(socket, 'AF_UNIX'):
+            return None
+        path = path or get_socket_path()
+        if not os.path.exists(path):
+            return None
+        sock = _connect(path)
+        if sock is None:
+            return None
+        return cls(path, sock)
+
+    def __init__(self, path, sock=None):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        if sock is not None:
+            self._add_connection(sock)
+
+    def _add_connection(self, sock):
+        connection = (sock, sock.makefile('rb'))
+        self._local.connection = connection
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            sock = _connect(self.path)
+            if sock is None:
+                raise AgentError('Could not connect to the agent')
+            connection = self._add_connection(sock)
+        return connection
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for sock, rfile in connections:
+            rfile.close()
+            sock.close()
+
+    def call(self, method, **params):
+        profile, region, credentials = _session_key()
+        request = {'method': method, 'params': params, 'profile': profile, 'region': region,
+                   'credentials': credentials}
+        sock, rfile = self._connection()
+        sock.sendall((codec.dumps(request) + '\n').encode('utf-8'))
+        line = rfile.readline()
+        if not line:
+            raise AgentError('The agent closed the connection')
+        response = codec.loads(line)
+        if 'error' in response:
+            error = response['error']
+            if error['type'] == 'MissingSchemaError':
+                raise payloads.MissingSchemaError(error['message'])
+            raise AgentError('{}: {}'.format(error['type'], error['message']))
+        return response['result']
+
+    def list(self, tags=True, env=False, provisioned=False):
+        return dict((entry[0], FunctionDescriptor(*entry[1:]))
+                    for entry in self.call('list', tags=tags, env=env, provisioned=provisioned))
+
+    def resolve(self, name):
+        """Resolve a (possibly partial) unqualified name to a
+        FunctionDescriptor, raising index.AmbiguousNameError if it matches
+        more than one, or index.UnknownNameError if it only matches some
+        closely."""
+        result = self.call('resolve', name=name)
+        if 'ambiguous' in result:
+            raise index.AmbiguousNameError(name, result['ambiguous'])
+        if 'suggestions' in result:
+            raise index.UnknownNameError(name, result['suggestions'])
+        return FunctionDescriptor(*result['descriptor'])
+
+    def bind(self, descriptor, qualifier=None):
+        return AgentFunction(self, descriptor.id, descriptor.name, descriptor.description, descriptor.static_schema,
+                             qualifier=qualifier)
+
+    def get_function(self, name, qualifier=None):
+        return self.bind(self.resolve(name), qualifier=qualifier)
+
+class _AgentLambdaClient(object):
+    """Stands in for a boto3 Lambda client, invoking through the agent's client."""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def invoke(self, FunctionName=None, InvocationType='RequestResponse', LogType='None', Payload=b'', Qualifier=None):
+        if isinstance(Payload, bytes):
+            Payload = Payload.decode('utf-8')
+        response = self.agent.call('invoke', function=FunctionName, invocation_type=InvocationType,
+                                   log_type=LogType, payload=Payload, qualifier=Qualifier)
+        response['Payload'] = io.BytesIO(response['Payload'].encode('utf-8'))
+        return response
+
+    def get_function_configuration(self, FunctionName=None, Qualifier=None):
+        return self.agent.call('get_function_configuration', function=FunctionName, qualifier=Qualifier)
+
+class AgentFunction(FaaSFunction):
+    """A function invoked through the agent. The request and response
+    protocol (capabilities, compression, blobs) is handled here as usual;
+    the agent keeps the session and connection warm, and caches schemas."""
+
+    def __init__(self, agent, id, name=None, description=None, static_schema=None, qualifier=None):
+        super(AgentFunction, self).__init__(id, name=name, description=description, static_schema=static_schema,
+                                            qualifier=qualifier)
+        self.agent = agent
+        self._client = _AgentLambdaClient(agent)
+
+    def get_schema(self, hedge_after=None, hedge_stats=None, schema_cache=None, use_static=True, fragment_cache=None):
+        """As FaaSFunction.get_schema. The agent keeps its own schema cache
+        and hedge stats, so schema_cache isn't used, and giving hedge_stats
+        records the request in the agent's."""
+        schema = self.agent.call('get_schema', function=self.id, qualifier=self.qualifier,
+                                 static_schema=self.static_schema,
+                                 hedge_after=hedge_after, record_hedge=hedge_stats is not None,
+                                 use_static=use_static)
+        schema = Schema.from_json(schema, fragments=fragment_cache)
+        if fragment_cache is not None:
+            fragment_cache.note(self.qualified_id, schema)
+        return schema
+
+    def prepare(self):
+        pass
+
+class _Locked(object):
+    """Calls the methods of obj while holding lock, so that request threads
+    can share an object that isn't thread-safe (e.g., a cache)."""
+
+    def __init__(self, obj, lock):
+        self._obj = obj
+        self._lock = lock
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+    def __contains__(self, item):
+        with self._lock:
+            return item in self._obj
+
+class Agent(object):
+    """The state the agent keeps warm, per profile and region."""
+
+    def __init__(self, schema_max_age=DEFAULT_SCHEMA_MAX_AGE):
+        self._lock = threading.RLock()
+        self._sessions = {}
+        self._functions = {}
+        self._discovered = {}
+        # (session key, function, qualifier) to (schema JSON, time fetched)
+        self._schemas = {}
+        self.schema_max_age = schema_max_age
+        self.schema_cache = SchemaCache.load()
+        self.fragment_cache = FragmentCache.load()
+        self.hedge_stats = hedge.HedgeStats.load()
+
+    def session(self, key):
+        with self._lock:
+            if key not in self._sessions:
+                profile, region, credentials = key
+                self._sessions[key] = get_session(profile_name=profile, region_name=region,
+                                                  credentials=credentials)
+            return self._sessions[key]
+
+    def function(self, key, function_id, static_schema=None, qualifier=None):
+        with self._lock:
+            func_key = (key, function_id, qualifier)
+            if func_key not in self._functions:
+                func = FaaSFunction(function_id, static_schema=static_schema, session=self.session(key),
+                                    qualifier=qualifier)
+                func.client # create the client before sharing it across threads
+                self._functions[func_key] = func
+            func = self._functions[func_key]
+            if static_schema:
+                func.static_schema = static_schema
+            return func
+
+    def _name_index(self, key):
+        with self._lock:
+            if key not in self._discovered:
+                self._discovered[key] = index.NameIndex.for_session(self.session(key))
+            return self._discovered[key]
+
+    def list(self, key, tags=True, env=False, provisioned=False):
+        funcs = FaaSFunction.list(tags=tags, env=env, session=self.session(key), provisioned=provisioned)
+        with self._lock:
+            name_index = self._name_index(key)
+            name_index.update(index.IndexEntry.for_descriptor(name, func) for name, func in six.iteritems(funcs))
+            name_index.save()
+        return [[name] + list(func) for name, func in sorted(six.iteritems(funcs))]
+
+    def resolve(self, key, name):
+        try:
+            entry = self._name_index(key).resolve(name)
+        except index.AmbiguousNameError as e:
+            return {'ambiguous': e.candidates}
+        except index.UnknownNameError as e:
+            return {'suggestions': e.suggestions}
+        if not entry:
+            return {'descriptor': [name]}
+        return {'descriptor': list(entry.to_descriptor())}
+
+    def get_schema(self, key, function, qualifier=None, static_schema=None, hedge_after=None, record_hedge=False,
+                   use_static=True):
+        schema_key = (key, function, qualifier)
+        now = time.time()
+        with self._lock:
+            warm = self._schemas.get(schema_key)
+        # not using the static schema means asking the function
+        if use_static and warm and now - warm[1] < self.schema_max_age:
+            return warm[0]
+        
+        func = self.function(key, function, static_schema=static_schema, qualifier=qualifier)
+        # after schema_max_age, the schema cache revalidates with the
+        # function by hash, and keeps the parsed schema if it's current
+        schema = func.get_schema(hedge_after=hedge_after,
+                                 hedge_stats=_Locked(self.hedge_stats, self._lock) if record_hedge else None,
+                                 schema_cache=_Locked(self.schema_cache, self._lock),
+                                 use_static=use_static,
+                                 fragment_cache=_Locked(self.fragment_cache, self._lock))
+        with self._lock:
+            self._schemas[schema_key] = (schema.to_json(), now)
+            self.schema_cache.save()
+            self.fragment_cache.save()
+            if record_hedge:
+                self.hedge_stats.save()
+            return self._schemas[schema_key][0]
+
+    def invoke(self, key, function, payload, invocation_type='RequestResponse', log_type='None', qualifier=None):
+        func = self.function(key, function, qualifier=qualifier)
+        response = func._client_invoke(
+            InvocationType=invocation_type,
+            LogType=log_type,
+            Payload=payload,
+        )
+        result = {
+            'StatusCode': response.get('StatusCode'),
+            'Payload': response['Payload'].read().decode('utf-8') if 'Payload' in response else '',
+        }
+        for field in ['FunctionError', 'LogResult', 'ExecutedVersion']:
+            if response.get(field):
+                result[field] = response[field]
+        return result
+
+    def get_function_configuration(self, key, function, qualifier=None):
+        func = self.function(key, function, qualifier=qualifier)
+        kwargs = {'Qualifier': qualifier} if qualifier else {}
+        config = func.client.get_function_configuration(FunctionName=function, **kwargs)
+        return dict((field, config[field]) for field in ['Version', 'CodeSha256'] if field in config)
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        socketserver.StreamRequestHandler.setup(self)
+        self.server.connection_opened()
+
+    def finish(self):
+        try:
+            socketserver.StreamRequestHandler.finish(self)
+        finally:
+            self.server.connection_closed()
+
+    def _peer_uid(self):
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return None # rely on the permissions of the socket dir
+        creds = self.connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        return struct.unpack('3i', creds)[1]
+
+    def handle(self):
+        uid = self._peer_uid()
+        if uid is not None and uid != os.getuid():
+            return
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            self.server.touch()
+            response = self.server.dispatch(codec.loads(line))
+            self.wfile.write((codec.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+            self.server.touch()
+
+class AgentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    METHODS = ['list', 'resolve', 'get_schema', 'invoke', 'get_function_configuration']
+
+    def __init__(self, path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT, schema_max_age=DEFAULT_SCHEMA_MAX_AGE):
+        self.path = path or get_socket_path()
+        if os.path.exists(self.path):
+            client = AgentClient.connect(self.path)
+            if client is not None:
+                client.close()
+                raise AgentError('An agent is already running on {}'.format(self.path))
+            os.remove(self.path) # stale socket
+        old_umask = os.umask(0o077)
+        try:
+            socketserver.UnixStreamServer.__init__(self, self.path, _AgentHandler)
+        finally:
+            os.umask(old_umask)
+        self.agent = Agent(schema_max_age=schema_max_age)
+        self.idle_timeout = idle_timeout
+        self._last_activity = time.time()
+        self._connections = 0
+        self._connections_lock = threading.Lock()
+
+    def touch(self):
+        self._last_activity = time.time()
+
+    def connection_opened(self):
+        with self._connections_lock:
+            self._connections += 1
+        self.touch()
+
+    def connection_closed(self):
+        with self._connections_lock:
+            self._connections -= 1
+        self.touch()
+
+    def dispatch(self, request):
+        method = request.get('method')
+        try:
+            if method == 'ping':
+                return {'result': {'pid': os.getpid()}}
+            if method == 'shutdown':
+                threading.Thread(target=self.shutdown).start()
+                return {'result': None}
+            if method not in self.METHODS:
+                raise AgentError('Unknown method: {}'.format(method))
+            credentials = request.get('credentials')
+            key = (request.get('profile'), request.get('region'), tuple(credentials) if credentials else None)
+            return {'result': getattr(self.agent, method)(key, **request.get('params', {}))}
+        except Exception as e:
+            return {'error': {'type': type(e).__name__, 'message': str(e)}}
+
+    def _watch_idle(self):
+        # a CLI waiting for the user to answer a form keeps its connection
+        # open, and the agent stays up for it
+        while True:
+            remaining = self._last_activity + self.idle_timeout - time.time()
+            if remaining <= 0 and self._connections == 0:
+                self.shutdown()
+                return
+            time.sleep(max(0.1, min(remaining, 5)))
+
+    def serve(self):
+        """Serve until shut down, or idle for idle_timeout seconds."""
+        if self.idle_timeout:
+            watcher = threading.Thread(target=self._watch_idle)
+            watcher.daemon = True
+            watcher.start()
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,168 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+from six.moves.urllib.parse import urlparse
+
+import errno
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from abc import abstractmethod, ABCMeta
+
+from . import codec
+
+SPOOL_SIZE = 1024 * 1024
+
+@six.add_metaclass(ABCMeta)
+class BlobStore(object):
+    """Storage for payloads too large to send in an invocation.
+
+    A store is identified by a location URL, and each blob uploaded to it
+    by a URL under that location."""
+
+    SCHEME = None
+
+    @property
+    @abstractmethod
+    def url(self):
+        """The location URL of the store."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upload(self, fileobj):
+        """Stream fileobj to a new blob, and return its URL."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def download(self, url, fileobj):
+        """Stream the blob at url into fileobj."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, url):
+        """Delete the blob at url, if it exists."""
+        raise NotImplementedError
+
+    def put_bytes(self, data):
+        return self.upload(io.BytesIO(data))
+
+    def get_json(self, url):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as fp:
+            self.download(url, fp)
+            fp.seek(0)
+            return codec.load(fp)
+
+    @classmethod
+    def _new_name(cls):
+        return uuid.uuid4().hex + '.json'
+
+class FileBlobStore(BlobStore):
+    """Stores blobs in a local directory, e.g. file:///tmp/faas-form-blobs"""
+
+    SCHEME = 'file'
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+    @classmethod
+    def from_url(cls, url, session=None):
+        return cls(urlparse(url).path)
+
+    @property
+    def url(self):
+        return 'file://' + self.path
+
+    def upload(self, fileobj):
+        try:
+            os.makedirs(self.path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        path = os.path.join(self.path, self._new_name())
+        with open(path, 'wb') as fp:
+            shutil.copyfileobj(fileobj, fp)
+        return 'file://' + path
+
+    def download(self, url, fileobj):
+        with open(urlparse(url).path, 'rb') as fp:
+            shutil.copyfileobj(fp, fileobj)
+
+    def delete(self, url):
+        try:
+            os.remove(urlparse(url).path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+class S3BlobStore(BlobStore):
+    """Stores blobs in an S3 bucket under a prefix, e.g. s3://bucket/prefix/"""
+
+    SCHEME = 's3'
+
+    def __init__(self, bucket, prefix='', session=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        if self.prefix and not self.prefix.endswith('/'):
+            self.prefix += '/'
+        self.session = session
+        self._client = None
+
+    @classmethod
+    def from_url(cls, url, session=None):
+        parsed = urlparse(url)
+        return cls(parsed.netloc, parsed.path.lstrip('/'), session=session)
+
+    @property
+    def url(self):
+        return 's3://{}/{}'.format(self.bucket, self.prefix)
+
+    @property
+    def client(self):
+        if self._client is None:
+            from .faas import get_session
+            session = self.session or get_session()
+            self._client = session.client('s3')
+        return self._client
+
+    def upload(self, fileobj):
+        key = self.prefix + self._new_name()
+        self.client.upload_fileobj(fileobj, self.bucket, key)
+        return 's3://{}/{}'.format(self.bucket, key)
+
+    def download(self, url, fileobj):
+        parsed = urlparse(url)
+        self.client.download_fileobj(parsed.netloc, parsed.path.lstrip('/'), fileobj)
+
+    def delete(self, url):
+        parsed = urlparse(url)
+        self.client.delete_object(Bucket=parsed.netloc, Key=parsed.path.lstrip('/'))
+
+STORES = dict((store_cls.SCHEME, store_cls) for store_cls in [
+    FileBlobStore,
+    S3BlobStore,
+])
+
+def get_store(url, session=None):
+    """Get the store for a store location or blob URL."""
+    scheme = urlparse(url).scheme
+    if scheme not in STORES:
+        raise ValueError("Unsupported blob store: {}".format(url))
+    return STORES[scheme].from_url(url, session=session)
+
+def in_store(url, store_url):
+    """Whether a blob or store URL is within the store location store_url."""
+    parsed, store = urlparse(url), urlparse(store_url)
+    if parsed.scheme != store.scheme or parsed.netloc != store.netloc:
+        return False
+    path, store_path = parsed.path, store.path
+    if parsed.scheme == FileBlobStore.SCHEME:
+        # don't let .. escape the store's directory
+        path, store_path = os.path.normpath(path), os.path.normpath(store_path)
+    store_path = store_path.rstrip('/')
+    return path.rstrip('/') == store_path or path.startswith(store_path + '/')
@@ -0,0 +1,195 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import hashlib
+import os
+import time
+
+from . import config
+from . import codec
+from . import schema
+from .payloads import canonical_json
+
+class ResultCache(object):
+    """A bounded, on-disk cache of invocation response payloads, for functions
+    whose schema declares a cache_ttl.
+
+    Entries are evicted when they expire, or least-recently-used first when
+    there are more than MAX_ENTRIES. The file is only readable by the user,
+    since responses may contain sensitive data."""
+
+    FILE_NAME = 'results.json'
+    MAX_ENTRIES = 256
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(config.get_cache_dir(), cls.FILE_NAME)
+        return cls(path, config.load_json(path))
+
+    @classmethod
+    def key(cls, function_id, version, values):
+        key_obj = [function_id, version, values]
+        return hashlib.sha256(canonical_json(key_obj).encode('utf-8')).hexdigest()
+
+    def __init__(self, path, data=None):
+        self.path = path
+        data = data or {}
+        self.hits = data.get('hits', 0)
+        self.misses = data.get('misses', 0)
+        self.entries = data.get('entries', {})
+
+    def save(self):
+        data = {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': self.entries,
+        }
+        config.atomic_write(self.path, codec.dumps(data))
+
+    def get(self, key, now=None):
+        now = now or time.time()
+        entry = self.entries.get(key)
+        if entry and entry['expires'] <= now:
+            del self.entries[key]
+            entry = None
+        if not entry:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry['accessed'] = now
+        return entry['payload']
+
+    def put(self, key, payload, ttl, now=None):
+        now = now or time.time()
+        self.entries[key] = {
+            'payload': payload,
+            'expires': now + ttl,
+            'accessed': now,
+        }
+        self._evict(now)
+
+    def _evict(self, now):
+        for key in [k for k, v in self.entries.items() if v['expires'] <= now]:
+            del self.entries[key]
+        if len(self.entries) > self.MAX_ENTRIES:
+            by_access = sorted(self.entries, key=lambda k: self.entries[k]['accessed'])
+            for key in by_access[:len(self.entries) - self.MAX_ENTRIES]:
+                del self.entries[key]
+
+class SchemaCache(object):
+    """The last schema received from each function, with its hash, so that
+    schema requests can be answered with a not-modified marker."""
+
+    FILE_NAME = 'schemas.json'
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(config.get_cache_dir(), cls.FILE_NAME)
+        return cls(path, config.load_json(path))
+
+    def __init__(self, path, data=None):
+        self.path = path
+        self.entries = data or {}
+        # parsed schemas, kept in memory (e.g., by the agent) so that a
+        # schema the function reports unchanged isn't parsed again
+        self._parsed = {}
+
+    def save(self):
+        config.atomic_write(self.path, codec.dumps(self.entries))
+
+    def get(self, function_id):
+        """Returns a tuple of (schema hash, schema json), or (None, None)."""
+        entry = self.entries.get(function_id)
+        if not entry:
+            return None, None
+        return entry['hash'], entry['schema']
+
+    def put(self, function_id, schema_hash, schema):
+        self.entries[function_id] = {
+            'hash': schema_hash,
+            'schema': schema,
+        }
+
+    def get_parsed(self, function_id, schema_hash):
+        """The parsed Schema with the given hash, if it's in memory."""
+        entry = self._parsed.get(function_id)
+        if entry and entry[0] == schema_hash:
+            return entry[1]
+        return None
+
+    def put_parsed(self, function_id, schema_hash, schema_obj):
+        self._parsed[function_id] = (schema_hash, schema_obj)
+
+class FragmentCache(object):
+    """Content-addressed schema fragments received from functions, and the
+    fragments each function's schemas have used, so that requests can tell
+    a function which fragments it doesn't need to send again.
+
+    Fragments are evicted least-recently-used first when there are more
+    than MAX_ENTRIES."""
+
+    FILE_NAME = 'fragments.json'
+    MAX_ENTRIES = 256
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(config.get_cache_dir(), cls.FILE_NAME)
+        return cls(path, config.load_json(path))
+
+    def __init__(self, path, data=None):
+        self.path = path
+        data = data or {}
+        self.entries = data.get('fragments', {})
+        self.functions = data.get('functions', {})
+        self._dirty = False
+
+    def save(self):
+        if not self._dirty:
+            return
+        data = {
+            'fragments': self.entries,
+            'functions': self.functions,
+        }
+        config.atomic_write(self.path, codec.dumps(data))
+        self._dirty = False
+
+    def __contains__(self, fragment_id):
+        return fragment_id in self.entries
+
+    def get(self, fragment_id, now=None):
+        entry = self.entries.get(fragment_id)
+        if not entry:
+            return None
+        entry['accessed'] = now or time.time()
+        self._dirty = True
+        return entry['fragment']
+
+    def put(self, fragment_id, fragment, now=None):
+        """Add a fragment, if its content matches its id."""
+        if schema.fragment_id(fragment) != fragment_id:
+            return
+        self.entries[fragment_id] = {
+            'fragment': fragment,
+            'accessed': now or time.time(),
+        }
+        self._dirty = True
+        if len(self.entries) > self.MAX_ENTRIES:
+            by_access = sorted(self.entries, key=lambda k: self.entries[k]['accessed'])
+            for key in by_access[:len(self.entries) - self.MAX_ENTRIES]:
+                del self.entries[key]
+
+    def held(self, function_id):
+        """The cached fragments the function's schemas have used."""
+        return [fragment_id for fragment_id in self.functions.get(function_id, []) if fragment_id in self.entries]
+
+    def note(self, function_id, schema_obj):
+        """Record the fragments used by a schema from the function."""
+        fragment_ids = set(self.functions.get(function_id, []))
+        fragment_ids.update(d for d in schema_obj.definitions if schema.is_fragment_id(d))
+        fragment_ids = sorted(f for f in fragment_ids if f in self.entries)
+        if fragment_ids != self.functions.get(function_id):
+            self.functions[function_id] = fragment_ids
+            self._dirty = True
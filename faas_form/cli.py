@@ -7,17 +7,54 @@ Created on Mar 31, 2018
 from __future__ import absolute_import, print_function
 
 import six
+from six.moves import queue
 
 import argparse
-import json
+import os
 import sys
+import threading
+import time
 
 from . import faas
-from .schema import Schema
+from .schema import Schema, AnswerStream, ValidationError
 from . import payloads
+from . import index
+from . import hedge
+from . import blobs
+from . import codec
+from . import workflow
+from . import agent
+from . import trace
+from . import metrics
+from .cache import ResultCache, SchemaCache, FragmentCache
+
+STATIC_SCHEMA_HELP = 'Query the function for its schema even if a static schema has been published'
+
+BLOB_STORE_ENV_VAR = 'FAAS_FORM_BLOB_STORE'
+
+LOCAL_HELP = 'Call the handler in-process instead of a deployed function'
+
+PROVISIONED_ENV_VAR = 'FAAS_FORM_PREFER_PROVISIONED'
+
+PROVISIONED_HELP = ('If no alias or version is given, invoke an alias with provisioned concurrency '
+                    'found by ls --provisioned, if there is one')
+
+HEDGE_HELP = ('Send a second schema request if the first has not returned after THRESHOLD, '
+              'given in seconds or as a percentile of past latencies (e.g., p95)')
+
+MAX_WARM_WORKERS = 32
+
+def hedge_threshold(value):
+    """argparse type for --hedge-schema."""
+    try:
+        return hedge.parse_threshold(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 def main(args=None):
     parser = argparse.ArgumentParser()
+    parser.add_argument('--profile', metavar='FILE', help='Write cProfile stats for the command to FILE')
+    parser.add_argument('--trace', metavar='FILE', help='Write a Chrome trace of the command to FILE')
     
     subparsers = parser.add_subparsers()
     
@@ -33,21 +70,56 @@ def main(args=None):
     env_group.add_argument('--env', action='store_true', default=None, help='Search env vars')
     env_group.add_argument('--no-env', action='store_false', dest='env', help='Do not search env vars')
     
+    list_parser.add_argument('--provisioned', action='store_true', default=False,
+                             help='Find the aliases and versions of each function with provisioned concurrency')
+    
     list_parser.set_defaults(func=run_list_funcs)
     
     invoke_parser = subparsers.add_parser('invoke', help='Call a faas-form compatible function')
-    invoke_parser.add_argument('name', help='The function to invoke')
+    invoke_parser.add_argument('name', nargs='?', help='The function to invoke, optionally with :ALIAS or :VERSION')
+    invoke_parser.add_argument('--local', metavar='MODULE:HANDLER', help=LOCAL_HELP)
     invoke_parser.add_argument('--no-reinvoke', action='store_true', default=False, help='Disable reinvoke functionality')
-    invoke_parser.add_argument('--schema', type=json.loads, help='Use the given schema instead of querying the function')
+    invoke_parser.add_argument('--schema', type=codec.loads, help='Use the given schema instead of querying the function')
+    invoke_parser.add_argument('--hedge-schema', metavar='THRESHOLD', type=hedge_threshold, help=HEDGE_HELP)
+    invoke_parser.add_argument('--no-static-schema', action='store_false', dest='static_schema', default=True, help=STATIC_SCHEMA_HELP)
+    invoke_parser.add_argument('--provisioned', action='store_true', default=bool(os.environ.get(PROVISIONED_ENV_VAR)), help=PROVISIONED_HELP)
+    invoke_parser.add_argument('--blob-store', metavar='URL', default=os.environ.get(BLOB_STORE_ENV_VAR),
+                               help='Offload payloads too large to send directly to this store (s3://BUCKET/PREFIX or file://PATH)')
+    cache_group = invoke_parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--no-cache', action='store_false', dest='use_cache', default=True, help='Do not use or store cached results')
+    cache_group.add_argument('--refresh', action='store_true', default=False, help='Invoke the function even if a cached result is available, and cache the new result')
     invoke_parser.set_defaults(func=run_invoke)
     
     prompt_parser = subparsers.add_parser('prompt', help='Generate an event from a schema')
     input_group = prompt_parser.add_mutually_exclusive_group(required=True)
-    input_group.add_argument('--schema', type=json.loads)
+    input_group.add_argument('--schema', type=codec.loads)
     input_group.add_argument('--function')
+    input_group.add_argument('--local', metavar='MODULE:HANDLER', help='Get the schema from a handler called in-process')
     prompt_parser.add_argument('--output-file', '-o', type=argparse.FileType('w'))
+    prompt_parser.add_argument('--hedge-schema', metavar='THRESHOLD', type=hedge_threshold, help=HEDGE_HELP)
+    prompt_parser.add_argument('--no-static-schema', action='store_false', dest='static_schema', default=True, help=STATIC_SCHEMA_HELP)
+    prompt_parser.add_argument('--provisioned', action='store_true', default=bool(os.environ.get(PROVISIONED_ENV_VAR)), help=PROVISIONED_HELP)
     prompt_parser.set_defaults(func=run_prompt)
     
+    warm_parser = subparsers.add_parser('warm', help='Pre-warm functions with concurrent schema requests')
+    warm_parser.add_argument('names', nargs='*', metavar='name', help='The functions to warm (default: all discovered functions)')
+    warm_parser.add_argument('--concurrency', '-n', type=int, default=1, help='The number of concurrent requests per function')
+    warm_parser.add_argument('--interval', type=float, help='Repeat every INTERVAL seconds until interrupted')
+    warm_parser.add_argument('--max-workers', type=int, default=MAX_WARM_WORKERS,
+                             help='The maximum number of requests in flight at once (default: {})'.format(MAX_WARM_WORKERS))
+    warm_parser.set_defaults(func=run_warm)
+    
+    run_parser = subparsers.add_parser('run', help='Run a multi-step session non-interactively from an answers file')
+    run_parser.add_argument('name', nargs='?', help='The function to invoke')
+    run_parser.add_argument('--answers', type=argparse.FileType('r'), help='JSON answers for each step')
+    run_parser.add_argument('--record', type=argparse.FileType('w'), metavar='FILE', help='Record the session to FILE')
+    run_parser.add_argument('--replay', type=argparse.FileType('r'), metavar='FILE', help='Replay a recorded session and report differences')
+    run_parser.add_argument('--local', metavar='MODULE:HANDLER', help=LOCAL_HELP)
+    run_parser.add_argument('--max-steps', type=int, default=100, help='Stop after this many invocations')
+    run_parser.add_argument('--blob-store', metavar='URL', default=os.environ.get(BLOB_STORE_ENV_VAR),
+                            help='Offload payloads too large to send directly to this store (s3://BUCKET/PREFIX or file://PATH)')
+    run_parser.set_defaults(func=run_run)
+    
     admin_parser = subparsers.add_parser('admin', help='Tag functions as faas-form compatible')
     admin_subparsers = admin_parser.add_subparsers()
     
@@ -62,28 +134,87 @@ def main(args=None):
     
     show_parser = admin_subparsers.add_parser('show', help='Print the schema for a function')
     show_parser.add_argument('name')
+    show_parser.add_argument('--hedge-schema', metavar='THRESHOLD', type=hedge_threshold, help=HEDGE_HELP)
+    show_parser.add_argument('--no-static-schema', action='store_false', dest='static_schema', default=True, help=STATIC_SCHEMA_HELP)
+    show_parser.add_argument('--provisioned', action='store_true', default=bool(os.environ.get(PROVISIONED_ENV_VAR)), help=PROVISIONED_HELP)
     show_parser.set_defaults(func=run_admin_show)
     
+    publish_parser = admin_subparsers.add_parser('publish', help='Publish the schema for a function as static metadata')
+    publish_parser.add_argument('name')
+    publish_parser.add_argument('--env', action='store_true', default=False, help='Publish in an env var instead of tags')
+    publish_parser.set_defaults(func=run_admin_publish)
+    
+    serve_parser = subparsers.add_parser('serve', help='Run an agent that keeps sessions, connections, and schemas warm for other commands')
+    serve_parser.add_argument('--idle-timeout', type=float, default=agent.DEFAULT_IDLE_TIMEOUT, metavar='SECONDS',
+                              help='Exit after this long without requests (0 to run until stopped)')
+    serve_parser.add_argument('--schema-max-age', type=float, default=agent.DEFAULT_SCHEMA_MAX_AGE, metavar='SECONDS',
+                              help='How long to serve a schema from memory before checking with the function whether it has changed')
+    serve_parser.add_argument('--stop', action='store_true', default=False, help='Stop the running agent')
+    serve_parser.set_defaults(func=run_serve)
+    
+    stats_parser = subparsers.add_parser('stats', help='Summarize the local log of invocations')
+    stats_parser.add_argument('--days', type=int, default=7, help='Only include the last DAYS days (0 for all)')
+    stats_parser.add_argument('--function', help='Only include functions whose ARN contains FUNCTION')
+    stats_parser.set_defaults(func=run_stats)
+    
+    completion_parser = subparsers.add_parser('completion', help='Print a shell completion script')
+    completion_parser.add_argument('shell', choices=['bash', 'zsh'])
+    completion_parser.set_defaults(func=run_completion)
+    
     args = parser.parse_args(args=args)
     
     if not hasattr(args, 'func'):
         parser.print_usage()
         parser.exit(1)
     
-    return args.func(parser, args)
+    return _run_profiled(parser, args)
+
+def _run_profiled(parser, args):
+    """Run the command, writing cProfile stats and/or a trace if requested,
+    even if the command exits early."""
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+    if args.trace:
+        import faas_form
+        trace.enable().add('startup', trace.DEFAULT_CATEGORY, faas_form._import_start, time.time())
+    
+    try:
+        if profiler:
+            profiler.enable()
+        with trace.span('main', command=args.func.__name__[len('run_'):]):
+            return args.func(parser, args)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        tracer = trace.disable()
+        if tracer:
+            with open(args.trace, 'w') as fp:
+                tracer.write(fp)
 
 def run_list_funcs(parser, args):
     tags = args.tags
     env = args.env
-    return list_funcs(tags=tags, env=env)
+    return list_funcs(tags=tags, env=env, provisioned=args.provisioned)
 
-def list_funcs(tags=None, env=None):
+def list_funcs(tags=None, env=None, provisioned=False):
     if tags is None:
         tags = True
     if env is None:
         env = False
     
-    funcs = faas.FaaSFunction.list(tags=tags, env=env)
+    agent_client = get_agent()
+    if agent_client:
+        funcs = agent_client.list(tags=tags, env=env, provisioned=provisioned)
+    else:
+        session = faas.get_session()
+        funcs = faas.FaaSFunction.list(tags=tags, env=env, session=session, provisioned=provisioned)
+        
+        name_index = index.NameIndex.for_session(session)
+        name_index.update(index.IndexEntry.for_descriptor(name, func) for name, func in six.iteritems(funcs))
+        name_index.save()
     
     name_width = 0
     for func_name in six.iterkeys(funcs):
@@ -91,43 +222,222 @@ def list_funcs(tags=None, env=None):
     
     fmt = '{:' + str(name_width) + '}\t{}'
     for func_name, func in six.iteritems(funcs):
-        print(fmt.format(func_name, func.description or ''))
+        description = func.description or ''
+        if func.provisioned:
+            description = '{} (provisioned: {})'.format(description, ', '.join(func.provisioned)).lstrip()
+        print(fmt.format(func_name, description))
 
 def run_invoke(parser, args):
+    if bool(args.name) == bool(args.local):
+        parser.error('exactly one of a function name or --local is required')
+    
     schema = None
     if args.schema is not None:
         schema = Schema.from_json(args.schema)
     
-    return invoke(name=args.name, schema=schema, disable_reinvoke=args.no_reinvoke)
+    return invoke(name=args.name, schema=schema,
+                  disable_reinvoke=args.no_reinvoke,
+                  hedge_schema=args.hedge_schema,
+                  static_schema=args.static_schema,
+                  use_cache=args.use_cache,
+                  refresh_cache=args.refresh,
+                  blob_store=args.blob_store,
+                  answers=get_answers(),
+                  local=args.local,
+                  provisioned=args.provisioned)
+
+def get_answers(stream=None):
+    """If stdin is not a terminal, read answers for forms from it in bulk
+    instead of prompting."""
+    stream = stream or sys.stdin
+    if stream.isatty():
+        return None
+    return AnswerStream(stream, from_stdin=stream is sys.stdin)
+
+def get_values(schema, answers=None):
+    try:
+        with trace.user_span('get_values', interactive=answers is None):
+            return schema.get_values(answers=answers)
+    except KeyboardInterrupt:
+        print('')
+        sys.exit(1)
+    except ValidationError as e:
+        sys.exit('ERROR: Invalid answers: {}'.format(e))
+
+_agent = []
+
+def get_agent():
+    """The connection to the agent (see `faas-form serve`), or None if it
+    isn't running."""
+    if not _agent:
+        _agent.append(agent.AgentClient.connect())
+    return _agent[0]
+
+def get_function(name, provisioned=False):
+    """Resolve a possibly-partial function name through the local index
+    built by ls, falling back to passing it to Lambda as-is. The name may
+    be qualified with an alias or version; if it isn't and provisioned is
+    True, an alias with provisioned concurrency is used if ls found one."""
+    name, qualifier = faas.split_qualifier(name)
+    agent_client = get_agent()
+    try:
+        if agent_client:
+            descriptor = agent_client.resolve(name)
+        else:
+            session = faas.get_session()
+            entry = index.NameIndex.for_session(session).resolve(name)
+            descriptor = entry.to_descriptor() if entry else faas.FunctionDescriptor(name)
+    except (index.AmbiguousNameError, index.UnknownNameError) as e:
+        sys.exit('ERROR: {}'.format(e))
+    if descriptor.name and descriptor.name != name:
+        print('Using function {}'.format(descriptor.name), file=sys.stderr)
+    if provisioned and not qualifier and descriptor.provisioned:
+        qualifier = descriptor.provisioned[0]
+        print('Using provisioned {}'.format(qualifier), file=sys.stderr)
+    if agent_client:
+        return agent_client.bind(descriptor, qualifier=qualifier)
+    return descriptor.bind(session, qualifier=qualifier)
+
+def get_local_function(handler):
+    """Get a function that calls the given module:handler in-process."""
+    from .local import LocalFunction
+    try:
+        return LocalFunction(handler)
+    except (ImportError, ValueError) as e:
+        sys.exit('ERROR: {}'.format(e))
+
+def get_schema(function, hedge_schema=None, static_schema=True, fragment_cache=None):
+    fragment_cache = fragment_cache or FragmentCache.load()
+    # the agent keeps its own schema cache, and records hedged requests in
+    # the hedge stats file, so its stats are only read here
+    is_agent = isinstance(function, agent.AgentFunction)
+    
+    hedge_after = None
+    hedge_stats = None
+    if hedge_schema is not None:
+        hedge_stats = hedge.HedgeStats.load()
+        hedge_after = hedge_stats.threshold(function.qualified_id, hedge_schema)
+    
+    schema_cache = SchemaCache.load() if not is_agent else None
+    
+    try:
+        schema = function.get_schema(hedge_after=hedge_after,
+                                     hedge_stats=hedge_stats,
+                                     schema_cache=schema_cache,
+                                     use_static=static_schema,
+                                     fragment_cache=fragment_cache) # :type schema: faas_form.schema.Schema
+    except payloads.MissingSchemaError as e:
+        err_msg = 'ERROR: No schema returned by the function'
+        sys.exit(err_msg)
+    
+    fragment_cache.save()
+    if not is_agent:
+        schema_cache.save()
+        if hedge_stats is not None:
+            hedge_stats.save()
+    return schema
+
+def _status(func):
+    return 'error' if func.last_call.get('function_error') else 'ok'
 
-def invoke(name, schema=None, disable_reinvoke=False):
-    func = faas.FaaSFunction(name)
+def _call(func, values, reinvoke_round, timings, state=None, fragments=None):
+    """Invoke the function and read the response, logging metrics for the
+    call, including calls that fail."""
+    try:
+        response = func.invoke(values, state=state, fragments=fragments)
+        payload = func.read_payload(response)
+    except Exception:
+        metrics.record('invoke', func, reinvoke_round, 'failed', timings=timings)
+        raise
+    metrics.record('invoke', func, reinvoke_round, _status(func), timings=timings, call=func.last_call)
+    return response, payload
+
+def _invoke(func, schema, values, use_cache=True, refresh_cache=False, reinvoke_round=1, timings=None, state=None,
+            fragments=None):
+    """Invoke the function, using the result cache if the schema declares
+    a cache_ttl, and log metrics for the call. Returns the response payload."""
+    if not schema.cache_ttl or not use_cache:
+        _, payload = _call(func, values, reinvoke_round, timings, state=state, fragments=fragments)
+        return payload
     
-    if not schema:
+    try:
+        # the version that would run, so results go stale when the alias or
+        # $LATEST moves on, rather than when they expire
+        version = func.get_version()
+    except Exception as e:
+        print('(not using the result cache: could not get the function version: {})'.format(e), file=sys.stderr)
+        _, payload = _call(func, values, reinvoke_round, timings, state=state, fragments=fragments)
+        return payload
+    
+    result_cache = ResultCache.load()
+    cache_key = ResultCache.key(func.id, version, [values, state] if state else values)
+    
+    payload = None
+    if not refresh_cache:
+        payload = result_cache.get(cache_key)
+    
+    if payload is not None:
+        print('(cached result; {} hits, {} misses)'.format(result_cache.hits, result_cache.misses), file=sys.stderr)
+        metrics.record('invoke', func, reinvoke_round, 'cached', timings=timings)
+    else:
+        response, payload = _call(func, values, reinvoke_round, timings, state=state, fragments=fragments)
+        if not response.get('FunctionError') and not payloads.is_reinvoke_response(payload):
+            result_cache.put(cache_key, payload, schema.cache_ttl)
+    
+    result_cache.save()
+    return payload
+
+def invoke(name, schema=None, disable_reinvoke=False, hedge_schema=None, static_schema=True,
+           use_cache=True, refresh_cache=False, blob_store=None, answers=None, local=None, provisioned=False):
+    if local:
+        # the handler is imported once and kept across reinvoke rounds;
+        # don't serve results of code under development from the cache
+        func = get_local_function(local)
+        use_cache = False
+    else:
+        func = get_function(name, provisioned=provisioned)
+    if blob_store:
         try:
-            schema = func.get_schema() # :type schema: faas_form.schema.Schema
-        except payloads.MissingSchemaError as e:
-            err_msg = 'ERROR: No schema returned by the function'
-            sys.exit(err_msg)
+            func.blob_store = blobs.get_store(blob_store, session=func.session)
+        except ValueError as e:
+            sys.exit('ERROR: {}'.format(e))
+    
+    fragment_cache = FragmentCache.load()
+    timings = {}
+    if not schema:
+        start = time.time()
+        schema = get_schema(func, hedge_schema=hedge_schema, static_schema=static_schema,
+                            fragment_cache=fragment_cache)
+        timings['schema'] = time.time() - start
     
+    # continuation state from the last reinvoke response, sent back as-is
+    state = None
+    reinvoke_round = 0
     while True:
-        try:
-            values = schema.get_values()
-        except KeyboardInterrupt:
-            print('')
-            sys.exit(1)
+        reinvoke_round += 1
+        
+        # do the network setup while the user is typing; on later rounds,
+        # this keeps the connection from the last round alive
+        preparer = threading.Thread(target=func.prepare)
+        preparer.daemon = True
+        preparer.start()
+        
+        values = get_values(schema, answers=answers)
+        
+        preparer.join()
         
         try:
-            response = func.invoke(values)
-            
-            payload = json.load(response['Payload'])
+            payload = _invoke(func, schema, values, use_cache=use_cache, refresh_cache=refresh_cache,
+                              reinvoke_round=reinvoke_round, timings=timings, state=state,
+                              fragments=fragment_cache.held(func.qualified_id))
+            timings = {}
             
             result = payloads.get_result(payload)
             if result is not None:
                 print('Result:')
                 print(result)
             else:
-                payload_to_print = json.dumps(payloads._strip_payload(payload), indent=2)
+                payload_to_print = codec.dumps(payloads._strip_payload(payload), indent=2)
                 print('Response:')
                 print(payload_to_print)
             
@@ -135,7 +445,10 @@ def invoke(name, schema=None, disable_reinvoke=False):
                 break
             print('')
             
-            schema = Schema.from_json(payloads.get_schema(payload))
+            schema = Schema.from_json(payloads.get_schema(payload), fragments=fragment_cache)
+            fragment_cache.note(func.qualified_id, schema)
+            fragment_cache.save()
+            state = payloads.get_state_token(payload)
         except Exception as e:
             raise #TODO: only print stack trace if verbose requested in args
             err_msg = 'ERROR: {}'.format(e)
@@ -151,35 +464,184 @@ def run_prompt(parser, args):
     
     function = None
     if args.function:
-        function = faas.FaaSFunction(args.function)
+        function = get_function(args.function, provisioned=args.provisioned)
+    elif args.local:
+        function = get_local_function(args.local)
     
     return prompt(schema=schema,
                   function=function,
-                  output_file=args.output_file)
+                  output_file=args.output_file,
+                  hedge_schema=args.hedge_schema,
+                  static_schema=args.static_schema,
+                  answers=get_answers())
 
-def prompt(schema=None, function=None, output_file=None):
+def prompt(schema=None, function=None, output_file=None, hedge_schema=None, static_schema=True, answers=None):
     if schema and function:
         raise ValueError("Can't specify both schema and function")
     if not schema and not function:
         raise ValueError("Must specify either schema or function")
     
     if function:
-        try:
-            schema = function.get_schema() # :type schema: faas_form.schema.Schema
-        except payloads.MissingSchemaError as e:
-            err_msg = 'ERROR: No schema returned by the function'
-            sys.exit(err_msg)
+        start = time.time()
+        schema = get_schema(function, hedge_schema=hedge_schema, static_schema=static_schema)
+        metrics.record('prompt', function, timings={'schema': time.time() - start})
+    
+    values = get_values(schema, answers=answers)
+    
+    if output_file:
+        codec.dump(values, output_file, indent=2)
+    else:
+        print(codec.dumps(values, indent=2))
+
+def run_warm(parser, args):
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.max_workers < args.concurrency:
+        parser.error('--max-workers must be at least --concurrency')
+    return warm(names=args.names, concurrency=args.concurrency, interval=args.interval,
+                max_workers=args.max_workers)
+
+def warm(names=None, concurrency=1, interval=None, max_workers=MAX_WARM_WORKERS):
+    if names:
+        funcs = [get_function(name) for name in names]
+    else:
+        session = faas.get_session()
+        funcs = [descriptor.bind(session) for descriptor in six.itervalues(faas.FaaSFunction.list(tags=True, env=False, session=session))]
+    funcs.sort(key=_display_name)
+    
+    name_width = max([len(_display_name(f)) for f in funcs] or [0])
+    fmt = '{:' + str(name_width) + '}\t{}'
     
     try:
-        values = schema.get_values()
+        while True:
+            results = _warm_round(funcs, concurrency, max_workers=max_workers)
+            for func in funcs:
+                print(fmt.format(_display_name(func), _format_warm_results(results[func.qualified_id])))
+                for result in results[func.qualified_id]:
+                    if isinstance(result, Exception):
+                        metrics.record('warm', func, status='failed')
+                    else:
+                        metrics.record('warm', func, call={'cold': result is not None})
+            if interval is None:
+                break
+            time.sleep(interval)
+            print('')
     except KeyboardInterrupt:
-        print('')
-        sys.exit(1)
+        pass
+
+def _display_name(func):
+    if func.name and func.qualifier:
+        return '{}:{}'.format(func.name, func.qualifier)
+    return func.name or func.qualified_id
+
+def _warm_round(funcs, concurrency, max_workers=MAX_WARM_WORKERS):
+    """Ping each function concurrency times, with at most max_workers
+    requests in flight. The pings for each function are queued together,
+    so they overlap as long as max_workers is at least concurrency."""
+    results = dict((func.qualified_id, []) for func in funcs)
+    pings = queue.Queue()
+    for func in funcs:
+        func.client # create the client before it's shared across threads
+        for _ in range(concurrency):
+            pings.put(func)
     
-    if output_file:
-        json.dump(values, output_file, indent=2)
+    def worker():
+        while True:
+            try:
+                func = pings.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                result = func.ping()
+            except Exception as e:
+                result = e
+            results[func.qualified_id].append(result)
+    
+    threads = [threading.Thread(target=worker) for _ in range(min(max_workers, pings.qsize()))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def _format_warm_results(results):
+    cold = [r for r in results if isinstance(r, float)]
+    errors = [r for r in results if isinstance(r, Exception)]
+    num_warm = len(results) - len(cold) - len(errors)
+    parts = ['{} cold'.format(len(cold)), '{} warm'.format(num_warm)]
+    if cold:
+        parts[0] += ' (max init {:.0f} ms)'.format(max(cold))
+    if errors:
+        parts.append('{} failed: {}'.format(len(errors), errors[0]))
+    return ', '.join(parts)
+
+def run_run(parser, args):
+    if args.replay:
+        if args.answers or args.record:
+            parser.error('--replay cannot be used with --answers or --record')
+    elif not args.answers:
+        parser.error('--answers is required')
+    if not args.name and not args.local and not args.replay:
+        parser.error('a function name or --local is required')
+    if args.max_steps < 1:
+        parser.error('--max-steps must be at least 1')
+    
+    if args.replay:
+        return replay(codec.load(args.replay), name=args.name, local=args.local)
+    return run(args.name, codec.load(args.answers),
+               record_file=args.record,
+               local=args.local,
+               max_steps=args.max_steps,
+               blob_store=args.blob_store)
+
+def run(name, answers, record_file=None, local=None, max_steps=100, blob_store=None):
+    func = get_local_function(local) if local else get_function(name)
+    if blob_store:
+        try:
+            func.blob_store = blobs.get_store(blob_store, session=func.session)
+        except ValueError as e:
+            sys.exit('ERROR: {}'.format(e))
+    
+    try:
+        runner = workflow.WorkflowRunner(func, workflow.Answers.from_json(answers), max_steps=max_steps)
+    except workflow.WorkflowError as e:
+        sys.exit('ERROR: {}'.format(e))
+    
+    error = None
+    try:
+        payload = runner.run(schema=get_schema(func))
+    except workflow.WorkflowError as e:
+        error = e
+    
+    for step in runner.steps:
+        print('Step {}: {:.0f} ms'.format(step['step'], step['latency'] * 1000), file=sys.stderr)
+        metrics.record('run', func, step['step'], 'error' if step['function_error'] else 'ok',
+                       timings={'invoke': step['latency']})
+    
+    if record_file:
+        codec.dump(runner.record(), record_file, indent=2)
+    
+    if error:
+        sys.exit('ERROR: {}'.format(error))
+    
+    result = payloads.get_result(payload)
+    if result is not None:
+        print(result)
     else:
-        print(json.dumps(values, indent=2))
+        print(codec.dumps(payloads._strip_payload(payload), indent=2))
+
+def replay(record, name=None, local=None):
+    func = get_local_function(local) if local else get_function(name or record.get('function'))
+    
+    failed = False
+    for step, latency, mismatches in workflow.replay(record, func):
+        status = 'ok' if not mismatches else 'MISMATCH ({})'.format(', '.join(mismatches))
+        print('Step {}: {:.0f} ms {}'.format(step, latency * 1000, status))
+        failed = failed or bool(mismatches)
+    
+    if failed:
+        sys.exit(1)
 
 def run_admin_add(parser, args):
     return admin_add(args.name, description=args.description)
@@ -194,13 +656,80 @@ def admin_rm(name):
     faas.FaaSFunction.remove(name)
 
 def run_admin_show(parser, args):
-    return admin_show(args.name)
+    return admin_show(args.name, hedge_schema=args.hedge_schema, static_schema=args.static_schema,
+                      provisioned=args.provisioned)
+
+def admin_show(name, hedge_schema=None, static_schema=True, provisioned=False):
+    function = get_function(name, provisioned=provisioned)
+    schema = get_schema(function, hedge_schema=hedge_schema, static_schema=static_schema)
+    
+    print(codec.dumps(schema.to_json(), indent=2))
+
+def run_admin_publish(parser, args):
+    return admin_publish(args.name, env=args.env)
+
+def admin_publish(name, env=False):
+    function = get_function(name)
+    schema = get_schema(function, static_schema=False)
+    
+    try:
+        faas.FaaSFunction.publish_schema(function.id, schema, env=env, session=function.session)
+    except faas.RequestError as e:
+        sys.exit('ERROR: {}'.format(e))
+
+def run_serve(parser, args):
+    if args.stop:
+        return serve_stop()
+    return serve(idle_timeout=args.idle_timeout, schema_max_age=args.schema_max_age)
+
+def serve(idle_timeout=agent.DEFAULT_IDLE_TIMEOUT, schema_max_age=agent.DEFAULT_SCHEMA_MAX_AGE):
+    try:
+        server = agent.AgentServer(idle_timeout=idle_timeout, schema_max_age=schema_max_age)
+    except agent.AgentError as e:
+        sys.exit('ERROR: {}'.format(e))
+    print('faas-form agent listening on {}'.format(server.path), file=sys.stderr)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
 
-def admin_show(name):
-    function = faas.FaaSFunction(name)
-    schema = function.get_schema()
+def serve_stop():
+    agent_client = agent.AgentClient.connect()
+    if not agent_client:
+        sys.exit('ERROR: The agent is not running')
+    agent_client.call('shutdown')
+
+def run_stats(parser, args):
+    return stats(days=args.days, function=args.function)
+
+def stats(days=7, function=None):
+    since = time.time() - days * 86400 if days else None
+    aggregated = metrics.aggregate(metrics.MetricsLog().records(since=since), since=since, function=function)
     
-    print(json.dumps(schema.to_json(), indent=2))
+    rows = [('day', 'function', 'calls', 'errors', 'cached', 'cold', 'p50 ms', 'p90 ms', 'p99 ms')]
+    for (day, arn), day_stats in sorted(six.iteritems(aggregated)):
+        percentiles = [day_stats.latency.percentile(p) for p in (50, 90, 99)]
+        rows.append((day, arn.split(':', 6)[-1], day_stats.count, day_stats.errors, day_stats.cached, day_stats.cold)
+                    + tuple('{:.0f}'.format(p) if p is not None else '-' for p in percentiles))
+    
+    if len(rows) == 1:
+        print('No invocations recorded', file=sys.stderr)
+    else:
+        widths = [max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))]
+        for row in rows:
+            print('  '.join(str(value).ljust(width) if i < 2 else str(value).rjust(width)
+                            for i, (value, width) in enumerate(zip(row, widths))))
+    
+    result_cache = ResultCache.load()
+    if result_cache.hits or result_cache.misses:
+        print('Result cache: {} hits, {} misses, {} entries'.format(
+            result_cache.hits, result_cache.misses, len(result_cache.entries)), file=sys.stderr)
+
+def run_completion(parser, args):
+    return completion(args.shell)
+
+def completion(shell):
+    print(index.completion_script(shell))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Created on Oct 19, 2026
+
+JSON encoding and decoding for payloads, using a faster library than the
+standard library json module if one is installed. Set FAAS_FORM_JSON to
+force a backend (e.g., stdlib).
+
+Note that hashes of JSON (e.g., schema hashes) must not depend on which
+backend is in use, and use payloads.canonical_json instead.
+
+Numeric arrays (array.array, e.g. the values of list<number> inputs) are
+encoded as JSON lists. NaN and infinite floats, which JSON doesn't have,
+are encoded as null by every backend.
+"""
+
+from __future__ import absolute_import, print_function
+
+import array
+import json
+import math
+import os
+
+import six
+
+BACKEND_ENV_VAR = 'FAAS_FORM_JSON'
+
+def default(obj):
+    """Encode types JSON doesn't have, for the backends' default hooks."""
+    if isinstance(obj, array.array):
+        return obj.tolist()
+    raise TypeError("{!r} is not JSON serializable".format(obj))
+
+def _nonfinite_to_none(obj):
+    if isinstance(obj, float):
+        return None if math.isinf(obj) or math.isnan(obj) else obj
+    if isinstance(obj, dict):
+        return dict((key, _nonfinite_to_none(value)) for key, value in six.iteritems(obj))
+    if isinstance(obj, (list, tuple, array.array)):
+        return [_nonfinite_to_none(value) for value in obj]
+    return obj
+
+class _StdlibBackend(object):
+    name = 'stdlib'
+
+    def dumps(self, obj, indent=None):
+        try:
+            return json.dumps(obj, indent=indent, default=default, allow_nan=False)
+        except ValueError:
+            # out of range floats; rare enough to make a second pass for
+            return json.dumps(_nonfinite_to_none(obj), indent=indent, default=default)
+
+    def dumpb(self, obj):
+        return self.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+class _OrjsonBackend(object):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj, indent=None):
+        if indent not in (None, 2):
+            return _STDLIB.dumps(obj, indent=indent)
+        option = self._orjson.OPT_INDENT_2 if indent else 0
+        try:
+            return self._orjson.dumps(obj, option=option, default=default).decode('utf-8')
+        except TypeError:
+            # e.g. integers over 64 bits or non-string keys
+            return _STDLIB.dumps(obj, indent=indent)
+
+    def dumpb(self, obj):
+        try:
+            return self._orjson.dumps(obj, default=default)
+        except TypeError:
+            return _STDLIB.dumpb(obj)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+class _UjsonBackend(object):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+        self._kwargs = {'escape_forward_slashes': False}
+        # older versions have neither option; without default, arrays
+        # raise TypeError, and without allow_nan, NaN raises OverflowError,
+        # so both fall back to the stdlib
+        for key, value in [('default', default), ('allow_nan', False)]:
+            try:
+                ujson.dumps(None, **{key: value})
+            except TypeError:
+                continue
+            self._kwargs[key] = value
+
+    def dumps(self, obj, indent=None):
+        try:
+            return self._ujson.dumps(obj, indent=indent or 0, **self._kwargs)
+        except (TypeError, OverflowError, ValueError):
+            # e.g. NaN or infinite floats
+            return _STDLIB.dumps(obj, indent=indent)
+
+    def dumpb(self, obj):
+        return self.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+_STDLIB = _StdlibBackend()
+
+BACKENDS = [
+    ('orjson', _OrjsonBackend),
+    ('ujson', _UjsonBackend),
+    ('stdlib', _StdlibBackend),
+]
+
+def _load_backend(name=None):
+    for backend_name, backend_cls in BACKENDS:
+        if name and backend_name != name:
+            continue
+        try:
+            return backend_cls()
+        except ImportError:
+            if name:
+                raise
+    return _STDLIB
+
+_backend = _load_backend(os.environ.get(BACKEND_ENV_VAR))
+
+def set_backend(name=None):
+    """Use the named backend, or the fastest available one if name is None."""
+    global _backend
+    _backend = _load_backend(name)
+
+def get_backend():
+    return _backend.name
+
+def available_backends():
+    names = []
+    for name, backend_cls in BACKENDS:
+        try:
+            backend_cls()
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+def dumps(obj, indent=None):
+    """Encode obj as a JSON string (unicode)."""
+    return _backend.dumps(obj, indent=indent)
+
+def dumpb(obj):
+    """Encode obj as compact UTF-8 JSON bytes, without an intermediate
+    string if the backend can."""
+    return _backend.dumpb(obj)
+
+def loads(data):
+    """Decode JSON from a string or UTF-8 bytes."""
+    return _backend.loads(data)
+
+def dump(obj, fp, indent=None):
+    fp.write(dumps(obj, indent=indent))
+
+def load(fp):
+    return loads(fp.read())
@@ -0,0 +1,55 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import os
+import errno
+
+from . import codec
+
+CACHE_DIR_ENV_VAR = 'FAAS_FORM_CACHE_DIR'
+
+def get_cache_dir(*parts):
+    """Return (creating if necessary) a directory under the faas-form cache dir.
+
+    The base directory is $FAAS_FORM_CACHE_DIR if set, otherwise
+    faas-form under $XDG_CACHE_HOME (defaulting to ~/.cache)."""
+    base = os.environ.get(CACHE_DIR_ENV_VAR)
+    if not base:
+        xdg_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        base = os.path.join(xdg_cache, 'faas-form')
+    path = os.path.join(base, *parts)
+    try:
+        os.makedirs(path, 0o700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    return path
+
+def atomic_write(path, data, mode=0o600):
+    """Write data to path via a temp file and rename, so concurrent readers
+    never see a partial file."""
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        os.rename(tmp_path, path)
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_json(path):
+    """Load a JSON cache file, returning an empty dict if it is missing or corrupt."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as fp:
+            return codec.load(fp)
+    except ValueError:
+        return {}
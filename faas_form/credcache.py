@@ -0,0 +1,143 @@
+"""
+Created on Oct 19, 2026
+
+An on-disk cache of assumed-role and SSO credentials, shared by all
+faas-form commands, so that repeated commands don't need to call STS (or
+SSO) again while the credentials are still valid.
+"""
+
+from __future__ import absolute_import, print_function
+
+import contextlib
+import datetime
+import errno
+import os
+
+import dateutil.parser
+import dateutil.tz
+from botocore.utils import JSONFileCache
+from botocore.exceptions import UnknownCredentialError
+
+try:
+    import fcntl
+except ImportError: # e.g., on Windows
+    fcntl = None
+
+from . import config
+
+CACHE_DIR = 'credentials'
+DISABLE_ENV_VAR = 'FAAS_FORM_NO_CREDENTIAL_CACHE'
+
+# credentials expiring within this many seconds are treated as missing,
+# so that they are refreshed before a command gets partway through
+REFRESH_MARGIN = 5 * 60
+
+PROVIDERS = ['assume-role', 'assume-role-with-web-identity', 'sso']
+
+def _parse_expiration(value):
+    if not value:
+        return None
+    try:
+        expiration = dateutil.parser.parse(value)
+    except (ValueError, OverflowError):
+        return None
+    if expiration.tzinfo is None:
+        expiration = expiration.replace(tzinfo=dateutil.tz.tzutc())
+    return expiration
+
+class CredentialCache(JSONFileCache):
+    """A botocore credential cache in the faas-form cache dir. Entries are
+    written atomically with user-only permissions, under a lock so that
+    concurrent commands don't interleave, and entries about to expire
+    are ignored."""
+
+    def __init__(self, working_dir=None, refresh_margin=REFRESH_MARGIN):
+        super(CredentialCache, self).__init__(working_dir or config.get_cache_dir(CACHE_DIR))
+        self.refresh_margin = refresh_margin
+
+    @contextlib.contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+        try:
+            os.makedirs(self._working_dir, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        with open(os.path.join(self._working_dir, '.lock'), 'a') as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+    def _is_expiring(self, value):
+        credentials = value.get('Credentials') if isinstance(value, dict) else None
+        if not credentials:
+            return False
+        expiration = _parse_expiration(credentials.get('Expiration'))
+        if expiration is None:
+            return False
+        now = datetime.datetime.now(expiration.tzinfo)
+        return (expiration - now).total_seconds() < self.refresh_margin
+
+    def __contains__(self, cache_key):
+        try:
+            self[cache_key]
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, cache_key):
+        value = super(CredentialCache, self).__getitem__(cache_key)
+        if self._is_expiring(value):
+            raise KeyError(cache_key)
+        return value
+
+    def __setitem__(self, cache_key, value):
+        try:
+            content = self._dumps(value)
+        except (TypeError, ValueError):
+            raise ValueError("Value cannot be cached, must be JSON serializable")
+        with self._lock():
+            try:
+                os.makedirs(self._working_dir, 0o700)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            path = self._convert_cache_key(cache_key)
+            temp_path = '{}.{}.tmp'.format(path, os.getpid())
+            # the mode is set on creation, rather than through the
+            # process-wide umask, which other threads would see
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                with os.fdopen(fd, 'w') as fp:
+                    fp.write(content)
+                    fp.flush()
+                    os.fsync(fp.fileno())
+                if os.name == 'nt' and os.path.exists(path):
+                    os.remove(path)
+                os.rename(temp_path, path)
+            except Exception:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+
+def attach(session, cache=None):
+    """Use the cache for the assume-role and SSO credential providers of
+    a botocore session. Must be called before the session's credentials
+    are resolved. Returns the cache, or None if disabled."""
+    if os.environ.get(DISABLE_ENV_VAR):
+        return None
+    cache = cache or CredentialCache()
+    resolver = session.get_component('credential_provider')
+    for name in PROVIDERS:
+        try:
+            provider = resolver.get_provider(name)
+        except UnknownCredentialError:
+            continue
+        provider.cache = cache
+    return cache
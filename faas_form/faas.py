@@ -7,28 +7,147 @@ Created on Mar 31, 2018
 from __future__ import absolute_import, print_function
 
 import six
-import json
-
-import boto3
-from botocore.exceptions import ClientError
+import base64
+import collections
+import gzip
+import io
+import os
+import re
+import time
 
 from . import payloads
+from . import hedge
+from . import codec
+from . import trace
 from .schema import Schema
+from .index import NameIndex
 
 class RequestError(Exception):
     pass
 
+ENDPOINT_URL_ENV_VAR = 'FAAS_FORM_ENDPOINT_URL'
+
+def get_session(profile_name=None, region_name=None, credentials=None):
+    """Create a session. credentials is (access key id, secret key, session
+    token), to use instead of the default credential chain."""
+    # boto3 is imported on first use, so that commands that don't need it
+    # (e.g., those forwarded to the agent) don't pay for importing it
+    with trace.span('get_session'):
+        import boto3
+        import botocore.session
+        from . import credcache
+        if credentials:
+            access_key, secret_key, token = credentials
+            return boto3.session.Session(aws_access_key_id=access_key, aws_secret_access_key=secret_key,
+                                         aws_session_token=token, region_name=region_name)
+        botocore_session = botocore.session.Session(profile=profile_name)
+        credcache.attach(botocore_session)
+        return boto3.session.Session(botocore_session=botocore_session, region_name=region_name)
+
+def get_client(session, service_name):
+    """Create a client for the service, using the endpoint in
+    FAAS_FORM_ENDPOINT_URL if set (e.g., a faas_form.standin server)."""
+    endpoint_url = os.environ.get(ENDPOINT_URL_ENV_VAR) or None
+    return session.client(service_name, endpoint_url=endpoint_url)
+
+INIT_DURATION_PATTERN = re.compile(r'Init Duration: ([\d.]+) ms')
+
+def get_init_duration(response):
+    """Get the init duration in ms from the tail log of an invoke response,
+    or None if it was not a cold start (or no log was returned)."""
+    log_result = response.get('LogResult')
+    if not log_result:
+        return None
+    log = base64.b64decode(log_result).decode('utf-8', 'replace')
+    match = INIT_DURATION_PATTERN.search(log)
+    if not match:
+        return None
+    return float(match.group(1))
+
+# the forms of partial ARN Lambda accepts in place of a function name
+PARTIAL_ARN_PATTERN = re.compile(r'^(\d{12}:)?function:')
+
+def split_qualifier(name):
+    """Split a function name, ARN, or partial ARN (like
+    123456789012:function:name) into the unqualified name or ARN and the
+    alias or version it is qualified with (or None)."""
+    if name.startswith('arn:'):
+        parts = name.split(':')
+        if len(parts) > 7:
+            return ':'.join(parts[:7]), parts[7] or None
+        return name, None
+    match = PARTIAL_ARN_PATTERN.match(name)
+    prefix, rest = (name[:match.end()], name[match.end():]) if match else ('', name)
+    if ':' in rest:
+        rest, qualifier = rest.rsplit(':', 1)
+        return prefix + rest, qualifier or None
+    return name, None
+
+def encode_static_schema(schema):
+    """Encode a schema for publication in tags or env vars, as base64 of the
+    gzipped canonical JSON (only using characters allowed in tag values)."""
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', mtime=0) as fp:
+        fp.write(payloads.canonical_json(payloads._schema_to_json(schema)).encode('utf-8'))
+    return base64.b64encode(buf.getvalue()).decode('ascii')
+
+def decode_static_schema(value):
+    with gzip.GzipFile(fileobj=io.BytesIO(base64.b64decode(value)), mode='rb') as fp:
+        return codec.loads(fp.read())
+
+class FunctionDescriptor(collections.namedtuple('FunctionDescriptor', ['id', 'name', 'description', 'static_schema', 'provisioned'])):
+    """A function found by discovery. Descriptors are compact and hold no
+    session or client; bind one to get a FaaSFunction to call.
+    
+    provisioned is a list of the aliases and versions of the function with
+    provisioned concurrency, if discovery looked for them."""
+    __slots__ = ()
+    
+    def __new__(cls, id, name=None, description=None, static_schema=None, provisioned=None):
+        return super(FunctionDescriptor, cls).__new__(cls, id, name, description, static_schema, provisioned)
+    
+    def bind(self, session=None, blob_store=None, qualifier=None):
+        return FaaSFunction(self.id,
+                            name=self.name,
+                            description=self.description,
+                            static_schema=self.static_schema,
+                            blob_store=blob_store,
+                            session=session,
+                            qualifier=qualifier)
+
 class FaaSFunction(object):
     MARKER = 'faasform'
+    SCHEMA_TAG_PREFIX = MARKER + ':schema:'
+    SCHEMA_ENV_VAR = MARKER + '_schema'
+    MAX_TAG_VALUE_LENGTH = 256
+    MAX_SCHEMA_TAGS = 40
+    
+    # whether calls are recorded in the local metrics log
+    RECORD_METRICS = True
+    
+    @classmethod
+    def _static_schema_from_tags(cls, tags):
+        chunks = {}
+        for key, value in six.iteritems(tags):
+            if key.startswith(cls.SCHEMA_TAG_PREFIX):
+                index = key[len(cls.SCHEMA_TAG_PREFIX):]
+                if index.isdigit():
+                    chunks[int(index)] = value
+        if not chunks or sorted(chunks) != list(range(len(chunks))):
+            return None
+        return ''.join(chunks[i] for i in range(len(chunks)))
     
     @classmethod
-    def list(cls, tags=True, env=True, session=None):
-        session = session or boto3.session.Session()
+    def list(cls, tags=True, env=True, session=None, provisioned=False):
+        """Discover faas-form functions, returning a dict of name to
+        FunctionDescriptor. If provisioned is True, also find the aliases
+        and versions of each function with provisioned concurrency."""
+        session = session or get_session()
         
         funcs = {}
         
         if tags:
-            client = session.client('resourcegroupstaggingapi')
+            client = get_client(session, 'resourcegroupstaggingapi')
             paginator = client.get_paginator('get_resources')
             
             paginator_kwargs = {
@@ -42,40 +161,67 @@ class FaaSFunction(object):
                 ]
             }
             
-            for response in paginator.paginate(**paginator_kwargs):
+            for response in trace.iterate('list.get_resources', paginator.paginate(**paginator_kwargs)):
                 for value in response['ResourceTagMappingList']:
-                    arn = value['ResourceARN']
+                    arn, _ = split_qualifier(value['ResourceARN'])
                     name = arn.split(':', 6)[-1]
-                    for tag in value['Tags']:
-                        if tag['Key'] == cls.MARKER:
-                            description = tag.get('Value')
-                            break
-                    funcs[name] = cls(arn, name=name, description=description)
+                    tag_dict = dict((tag['Key'], tag.get('Value')) for tag in value['Tags'])
+                    description = tag_dict.get(cls.MARKER)
+                    static_schema = cls._static_schema_from_tags(tag_dict)
+                    funcs[name] = FunctionDescriptor(arn, name=name, description=description, static_schema=static_schema)
         
         if env:
-            client = session.client('lambda')
+            client = get_client(session, 'lambda')
             paginator = client.get_paginator('list_functions')
             
-            for response in paginator.paginate():
+            for response in trace.iterate('list.list_functions', paginator.paginate()):
                 for func in response['Functions']:
-                    arn = func['FunctionArn']
+                    arn, _ = split_qualifier(func['FunctionArn'])
                     name = arn.split(':', 6)[-1]
                     
-                    for var_name, var_value in six.iteritems(func.get('Environment', {}).get('Variables', {})):
-                        if var_name == cls.MARKER:
-                            description = var_value or None
-                            funcs[name] = cls(arn, name=name, description=description)
-                            break
+                    env_vars = func.get('Environment', {}).get('Variables', {})
+                    if cls.MARKER in env_vars:
+                        description = env_vars[cls.MARKER] or None
+                        static_schema = env_vars.get(cls.SCHEMA_ENV_VAR) or None
+                        if name in funcs and not static_schema:
+                            static_schema = funcs[name].static_schema
+                        funcs[name] = FunctionDescriptor(arn, name=name, description=description, static_schema=static_schema)
+        
+        if provisioned:
+            client = get_client(session, 'lambda')
+            for name, func in list(funcs.items()):
+                funcs[name] = func._replace(provisioned=cls._get_provisioned(client, func.id))
         
         return funcs
     
+    @classmethod
+    def _get_provisioned(cls, client, arn):
+        """The aliases and versions of the function with provisioned
+        concurrency ready."""
+        paginator = client.get_paginator('list_provisioned_concurrency_configs')
+        qualifiers = []
+        for response in trace.iterate('list.provisioned_concurrency', paginator.paginate(FunctionName=arn)):
+            for config in response.get('ProvisionedConcurrencyConfigs', []):
+                if config.get('Status') != 'READY':
+                    continue
+                _, qualifier = split_qualifier(config['FunctionArn'])
+                if qualifier:
+                    qualifiers.append(qualifier)
+        # aliases first, then versions, newest first
+        return sorted(qualifiers, key=lambda q: (q.isdigit(), -int(q) if q.isdigit() else 0, q))
+    
     @classmethod
     def _get_arn(cls, name, session=None):
         if name.startswith('arn'):
             return name
         
-        session = session or boto3.session.Session()
-        client = session.client('lambda')
+        session = session or get_session()
+        
+        entry = NameIndex.for_session(session).get(name)
+        if entry:
+            return entry.arn
+        
+        client = get_client(session, 'lambda')
         response = client.get_function(
             FunctionName=name
         )
@@ -83,11 +229,11 @@ class FaaSFunction(object):
     
     @classmethod
     def add(cls, name, description=None, session=None):
-        session = session or boto3.session.Session()
+        session = session or get_session()
         
         arn = cls._get_arn(name, session=session)
         
-        client = session.client('resourcegroupstaggingapi')
+        client = get_client(session, 'resourcegroupstaggingapi')
         
         client.tag_resources(
             ResourceARNList=[arn],
@@ -98,54 +244,293 @@ class FaaSFunction(object):
     
     @classmethod
     def remove(cls, name, session=None):
-        session = session or boto3.session.Session()
+        session = session or get_session()
         
         arn = cls._get_arn(name, session=session)
         
-        client = session.client('resourcegroupstaggingapi')
+        client = get_client(session, 'resourcegroupstaggingapi')
         
         client.untag_resources(
             ResourceARNList=[arn],
             TagKeys=[cls.MARKER],
         )
+        
+        cls._remove_schema_tags(arn, session)
+    
+    @classmethod
+    def publish_schema(cls, name, schema, env=False, session=None):
+        """Publish the schema as static metadata on the function, in tags or
+        (if env is True) in an env var, so that discovery can read it
+        without invoking the function."""
+        session = session or get_session()
+        
+        arn = cls._get_arn(name, session=session)
+        
+        value = encode_static_schema(schema)
+        
+        if env:
+            client = get_client(session, 'lambda')
+            config = client.get_function_configuration(FunctionName=arn)
+            env_vars = config.get('Environment', {}).get('Variables', {})
+            env_vars[cls.SCHEMA_ENV_VAR] = value
+            client.update_function_configuration(
+                FunctionName=arn,
+                Environment={'Variables': env_vars},
+            )
+            return
+        
+        chunks = [value[i:i+cls.MAX_TAG_VALUE_LENGTH] for i in range(0, len(value), cls.MAX_TAG_VALUE_LENGTH)]
+        if len(chunks) > cls.MAX_SCHEMA_TAGS:
+            raise RequestError("Schema is too large to publish in tags ({} bytes encoded)".format(len(value)))
+        
+        cls._remove_schema_tags(arn, session, keep=len(chunks))
+        
+        client = get_client(session, 'resourcegroupstaggingapi')
+        client.tag_resources(
+            ResourceARNList=[arn],
+            Tags=dict((cls.SCHEMA_TAG_PREFIX + str(i), chunk) for i, chunk in enumerate(chunks))
+        )
     
-    def __init__(self, id, name=None, description=None, session=None):
+    @classmethod
+    def _remove_schema_tags(cls, arn, session, keep=0):
+        client = get_client(session, 'lambda')
+        tags = client.list_tags(Resource=arn).get('Tags', {})
+        stale_keys = [
+            key for key in tags
+            if key.startswith(cls.SCHEMA_TAG_PREFIX)
+            and not (key[len(cls.SCHEMA_TAG_PREFIX):].isdigit() and int(key[len(cls.SCHEMA_TAG_PREFIX):]) < keep)
+        ]
+        if stale_keys:
+            get_client(session, 'resourcegroupstaggingapi').untag_resources(
+                ResourceARNList=[arn],
+                TagKeys=stale_keys,
+            )
+    
+    def __init__(self, id, name=None, description=None, static_schema=None, blob_store=None, session=None,
+                 qualifier=None):
         self.id = id
+        # the alias or version to invoke, or None for $LATEST
+        self.qualifier = qualifier
         self.name = name
         self.description = description
-        self.session = session or boto3.session.Session()
+        self.static_schema = static_schema
+        self.capabilities = []
+        self.blob_store = blob_store
+        self._session = session
+        self._client = None
+        self._version = None
+        # timings, sizes, and cold start of the last invoke, for metrics
+        self.last_call = {}
+    
+    @property
+    def session(self):
+        """The session for this function, created on first use if one
+        wasn't given."""
+        if self._session is None:
+            self._session = get_session()
+        return self._session
+    
+    @property
+    def client(self):
+        """The Lambda client for this function, created once so that it can
+        be shared across threads."""
+        if self._client is None:
+            self._client = get_client(self.session, 'lambda')
+        return self._client
+    
+    @property
+    def qualified_id(self):
+        """The function ARN (or name) with the qualifier, if any, which
+        identifies the code that gets invoked."""
+        if self.qualifier:
+            return '{}:{}'.format(self.id, self.qualifier)
+        return self.id
+    
+    def get_version(self):
+        """The version the qualifier currently resolves to, with its code
+        hash, since an alias can move to another version and $LATEST can be
+        updated in place. Looked up once per FaaSFunction."""
+        if self._version is None:
+            kwargs = {'Qualifier': self.qualifier} if self.qualifier else {}
+            config = self.client.get_function_configuration(FunctionName=self.id, **kwargs)
+            self._version = '{}:{}'.format(config['Version'], config.get('CodeSha256', ''))
+        return self._version
+    
+    def _client_invoke(self, client=None, **kwargs):
+        if self.qualifier:
+            kwargs['Qualifier'] = self.qualifier
+        return (client or self.client).invoke(FunctionName=self.id, **kwargs)
+    
+    @trace.traced('get_schema')
+    def get_schema(self, hedge_after=None, hedge_stats=None, schema_cache=None, use_static=True, fragment_cache=None):
+        """Get the schema for the function. If a static schema was published
+        and discovered, it is used without invoking the function, unless
+        use_static is False. A published schema is not versioned, so it is
+        only used for $LATEST; an alias or version may run older code, and
+        is always queried.
+        
+        If hedge_after is given, a second request is sent if the first
+        hasn't returned after that many seconds, and the first response
+        is used. Outcomes are recorded in hedge_stats if given.
+        
+        If schema_cache is given, the hash of the cached schema is sent
+        with the request, and the cached schema is used if the function
+        reports it hasn't changed.
+        
+        If fragment_cache is given, the fragments it has from this function
+        are listed in the request, so the function can leave them out, and
+        fragments in the response are added to it."""
+        if use_static and self.static_schema and self.qualifier in (None, '$LATEST'):
+            return Schema.from_json(decode_static_schema(self.static_schema))
+        
+        client = self.client
+        
+        cached_hash, cached_schema = None, None
+        if schema_cache is not None:
+            cached_hash, cached_schema = schema_cache.get(self.qualified_id)
+        
+        request_payload = {}
+        payloads.set_schema_request(request_payload, schema_hash=cached_hash)
+        payloads.set_capabilities(request_payload)
+        if fragment_cache is not None:
+            payloads.set_fragments(request_payload, fragment_cache.held(self.qualified_id))
         
-    def get_schema(self):
-        client = self.session.client('lambda')
+        def request():
+            response = self._client_invoke(
+                client,
+                InvocationType='RequestResponse',
+                Payload=codec.dumps(request_payload),
+            )
+            # hedged requests read in parallel, so only the winner's
+            # response is noted on the function, below
+            return self._read_response(response)
         
+        if hedge_after is None:
+            response_read = request()
+        else:
+            response_read, latency, hedged, hedge_won = hedge.hedged_call(request, hedge_after)
+            if hedge_stats is not None:
+                hedge_stats.record(self.qualified_id, latency, hedged, hedge_won)
+        response_payload = self._note_response(*response_read)
+        
+        if cached_schema is not None and payloads.is_schema_not_modified(response_payload):
+            schema = schema_cache.get_parsed(self.qualified_id, cached_hash)
+            if schema is None:
+                schema = Schema.from_json(cached_schema, fragments=fragment_cache)
+                schema_cache.put_parsed(self.qualified_id, cached_hash, schema)
+            return schema
+        
+        schema = Schema.from_json(payloads.get_schema(response_payload), fragments=fragment_cache)
+        if fragment_cache is not None:
+            fragment_cache.note(self.qualified_id, schema)
+        
+        if schema_cache is not None:
+            # cache the whole schema, including fragments left out of the response
+            schema_json = schema.to_json()
+            schema_hash = payloads.get_schema_hash(response_payload) or payloads.schema_hash(schema_json)
+            schema_cache.put(self.qualified_id, schema_hash, schema_json)
+            schema_cache.put_parsed(self.qualified_id, schema_hash, schema)
+        
+        return schema
+    
+    @trace.traced('prepare')
+    def prepare(self):
+        """Do the network setup for an invocation ahead of time: create the
+        client, resolve credentials, and open (or keep alive) a connection
+        to the endpoint with a dry run invoke. Errors are ignored, since
+        the real invocation will surface them."""
+        try:
+            credentials = self.session.get_credentials()
+            if credentials is not None:
+                credentials.get_frozen_credentials() # refreshes if needed
+            self._client_invoke(InvocationType='DryRun')
+        except Exception:
+            pass
+    
+    def ping(self):
+        """Send a schema request as a cheap, side-effect free invocation.
+        Returns the init duration in ms if it was a cold start, otherwise None."""
         request_payload = {}
         payloads.set_schema_request(request_payload)
         
-        response = client.invoke(
-            FunctionName=self.id,
+        response = self._client_invoke(
             InvocationType='RequestResponse',
-            Payload=json.dumps(request_payload),
+            LogType='Tail',
+            Payload=codec.dumps(request_payload),
         )
+        response['Payload'].read()
         
-        response_payload = json.load(response['Payload'])
-        
-        schema = payloads.get_schema(response_payload)
-        
-        return Schema.from_json(schema)
+        return get_init_duration(response)
     
-    def invoke(self, values):
-        client = self.session.client('lambda')
+    @trace.traced('invoke')
+    def invoke(self, values, state=None, fragments=None):
+        """Invoke the function with the values. state is the continuation
+        state token from the reinvoke response being answered, if any, and
+        fragments are the ids of the schema fragments the client has."""
+        client = self.client
         
         request_payload = {}
         payloads.set_invoke_request(request_payload)
+        payloads.set_capabilities(request_payload)
+        payloads.set_state_token(request_payload, state)
+        payloads.set_fragments(request_payload, fragments)
         
-        request_payload.update(values)
+        if self.blob_store is not None:
+            payloads.set_blob_store(request_payload, self.blob_store)
         
-        response = client.invoke(
-            FunctionName=self.id,
-            InvocationType='RequestResponse',
-            LogType='Tail',
-            Payload=json.dumps(request_payload),
-        )
+        payloads.set_values(request_payload, values, self.capabilities)
+        
+        encoded, request_data = payloads.encode_payload_data(request_payload, self.capabilities, blob_store=self.blob_store)
         
-        return response
\ No newline at end of file
+        start = time.time()
+        try:
+            response = self._client_invoke(
+                client,
+                InvocationType='RequestResponse',
+                LogType='Tail',
+                Payload=request_data,
+            )
+        finally:
+            # the function has read an offloaded request by the time it returns
+            if payloads.BLOB_KEY in encoded:
+                payloads.delete_blob(encoded[payloads.BLOB_KEY], session=self._session)
+        self.last_call = {
+            'invoke': time.time() - start,
+            'request_size': len(request_data),
+            'cold': get_init_duration(response) is not None if 'LogResult' in response else None,
+            'function_error': response.get('FunctionError'),
+        }
+        
+        return response
+    
+    @trace.traced('read_payload')
+    def read_payload(self, response):
+        """Read and decode the payload from an invoke response, noting the
+        capabilities the function advertises."""
+        return self._note_response(*self._read_response(response))
+    
+    def _read_response(self, response):
+        """Read and decode the payload from an invoke response, without
+        changing this object. Returns a tuple of (payload, call info,
+        capabilities), where capabilities is None if none were sent."""
+        start = time.time()
+        data = response['Payload'].read()
+        read_time = time.time() - start
+        payload = payloads.decode_payload(codec.loads(data), session=self._session, delete=True)
+        call = {
+            'read': read_time,
+            'decode': time.time() - start - read_time,
+            'response_size': len(data),
+        }
+        capabilities = None
+        if isinstance(payload, dict) and payloads.CAPABILITIES_KEY in payload:
+            capabilities = payloads.get_capabilities(payload)
+        return payload, call, capabilities
+    
+    def _note_response(self, payload, call, capabilities):
+        self.last_call['invoke'] = self.last_call.get('invoke', 0) + call['read']
+        self.last_call['decode'] = call['decode']
+        self.last_call['response_size'] = call['response_size']
+        if capabilities is not None:
+            self.capabilities = capabilities
+        return payload
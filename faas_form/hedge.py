@@ -0,0 +1,143 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+from six.moves import queue
+
+import os
+import re
+import threading
+import time
+
+from . import config
+from . import codec
+
+def hedged_call(func, hedge_after):
+    """Call func, and if it hasn't returned after hedge_after seconds, call
+    it again in parallel and use whichever returns first.
+
+    func must be idempotent and thread-safe. Returns a tuple of
+    (result, latency, hedged, hedge_won), where latency is the time taken
+    by the first call, so that it reflects the latency without hedging.
+    If the second call returns first, the first is still running, and
+    latency is how long it has taken so far."""
+    results = queue.Queue()
+
+    def run(attempt):
+        start = time.time()
+        try:
+            results.put((attempt, None, func(), time.time() - start))
+        except Exception as e:
+            results.put((attempt, e, None, time.time() - start))
+
+    def start(attempt):
+        thread = threading.Thread(target=run, args=(attempt,))
+        thread.daemon = True
+        thread.start()
+
+    first_start = time.time()
+    start(0)
+    pending = 1
+    hedged = False
+    try:
+        outcome = results.get(timeout=hedge_after)
+    except queue.Empty:
+        hedged = True
+        start(1)
+        pending = 2
+        outcome = results.get()
+    pending -= 1
+    outcomes = [outcome]
+
+    # if the first to finish failed, give the other one a chance
+    if outcome[1] is not None and pending:
+        outcome = results.get()
+        outcomes.append(outcome)
+
+    attempt, error, result, _ = outcome
+    if error is not None:
+        raise error
+    latency = next((o[3] for o in outcomes if o[0] == 0), None)
+    if latency is None:
+        latency = time.time() - first_start
+    return result, latency, hedged, attempt == 1
+
+PERCENTILE_PATTERN = re.compile(r'^p(\d+(?:\.\d+)?)$')
+
+def parse_threshold(value):
+    """Parse a hedging threshold: a non-negative number of seconds, or a
+    percentile like 'p95'. Raises ValueError if it's neither."""
+    match = PERCENTILE_PATTERN.match(value)
+    if match:
+        if not 0 < float(match.group(1)) <= 100:
+            raise ValueError("Percentile must be between 0 and 100: {}".format(value))
+        return value
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise ValueError("Threshold must be a number of seconds or a percentile like p95: {}".format(value))
+    if not seconds >= 0 or seconds == float('inf'):
+        raise ValueError("Threshold must be a non-negative number of seconds: {}".format(value))
+    return seconds
+
+class HedgeStats(object):
+    """Schema request latencies and hedging counters, persisted in the cache
+    dir so that percentile thresholds work across CLI invocations."""
+
+    FILE_NAME = 'hedge.json'
+    MAX_SAMPLES = 100
+    MIN_SAMPLES = 10
+    DEFAULT_THRESHOLD = 1.0
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(config.get_cache_dir(), cls.FILE_NAME)
+        return cls(path, config.load_json(path))
+
+    def __init__(self, path, data=None):
+        self.path = path
+        data = data or {}
+        self.requests = data.get('requests', 0)
+        self.hedged = data.get('hedged', 0)
+        self.hedge_won = data.get('hedge_won', 0)
+        self.latencies = data.get('latencies', {})
+
+    def save(self):
+        data = {
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'hedge_won': self.hedge_won,
+            'latencies': self.latencies,
+        }
+        config.atomic_write(self.path, codec.dumps(data))
+
+    def threshold(self, function_id, spec):
+        """Get the hedging delay in seconds for a function.
+
+        spec is either a number of seconds, or a percentile of past schema
+        request latencies for the function like 'p95'. Percentiles fall back
+        to a fixed threshold until enough samples have been recorded."""
+        if isinstance(spec, six.string_types):
+            match = PERCENTILE_PATTERN.match(spec)
+            if not match:
+                return float(spec)
+            samples = sorted(self.latencies.get(function_id, []))
+            if len(samples) < self.MIN_SAMPLES:
+                return self.DEFAULT_THRESHOLD
+            percentile = float(match.group(1))
+            index = min(len(samples) - 1, int(len(samples) * percentile / 100.))
+            return samples[index]
+        return float(spec)
+
+    def record(self, function_id, latency, hedged, hedge_won):
+        self.requests += 1
+        if hedged:
+            self.hedged += 1
+        if hedge_won:
+            self.hedge_won += 1
+        samples = self.latencies.setdefault(function_id, [])
+        samples.append(round(latency, 4))
+        del samples[:-self.MAX_SAMPLES]
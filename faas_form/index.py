@@ -0,0 +1,223 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+
+import bisect
+import codecs
+import collections
+import difflib
+import os
+import re
+
+from . import config
+
+INDEX_DIR = 'index'
+INDEX_SUFFIX = '.tsv'
+
+class AmbiguousNameError(ValueError):
+    def __init__(self, name, candidates):
+        self.name = name
+        self.candidates = candidates
+        super(AmbiguousNameError, self).__init__(
+            "{} matches multiple functions: {}".format(name, ', '.join(candidates)))
+
+class UnknownNameError(ValueError):
+    """A name that isn't in the index, but is close to some that are."""
+    def __init__(self, name, suggestions):
+        self.name = name
+        self.suggestions = suggestions
+        super(UnknownNameError, self).__init__(
+            "No function named {}. Did you mean {}?".format(name, ' or '.join(suggestions)))
+
+class IndexEntry(collections.namedtuple('IndexEntry', ['name', 'arn', 'description', 'static_schema', 'provisioned'])):
+    """provisioned is a comma-separated list of the aliases and versions
+    with provisioned concurrency, if ls looked for them."""
+    __slots__ = ()
+
+    FIELD_COUNT = 5
+
+    def __new__(cls, name, arn, description=None, static_schema=None, provisioned=None):
+        return super(IndexEntry, cls).__new__(cls, name, arn, description, static_schema, provisioned)
+
+    @classmethod
+    def for_descriptor(cls, name, descriptor):
+        provisioned = ','.join(descriptor.provisioned) if descriptor.provisioned else None
+        return cls(name, descriptor.id, descriptor.description, descriptor.static_schema, provisioned)
+
+    @property
+    def provisioned_qualifiers(self):
+        return self.provisioned.split(',') if self.provisioned else []
+
+    def to_descriptor(self):
+        from .faas import FunctionDescriptor
+        return FunctionDescriptor(self.arn, name=self.name, description=self.description,
+                                  static_schema=self.static_schema, provisioned=self.provisioned_qualifiers)
+
+    @classmethod
+    def from_line(cls, line):
+        fields = line.rstrip('\n').split('\t')
+        fields = fields + [''] * (cls.FIELD_COUNT - len(fields))
+        return cls(*[f or None for f in fields[:cls.FIELD_COUNT]])
+
+    def to_line(self):
+        return '\t'.join(_clean_field(f) for f in self) + '\n'
+
+def _clean_field(value):
+    if value is None:
+        return ''
+    return re.sub(r'[\t\r\n]+', ' ', value)
+
+class NameIndex(object):
+    """A local index of discovered function names, built by `faas-form ls`.
+
+    Lookups never touch the network. The on-disk format is one
+    tab-separated line per function, with the name in the first column,
+    so that shell completion can read it directly."""
+
+    FUZZY_CUTOFF = 0.8
+
+    @classmethod
+    def path_for_session(cls, session):
+        key = '{}_{}'.format(session.profile_name or 'default', session.region_name or 'default')
+        key = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        return os.path.join(config.get_cache_dir(INDEX_DIR), key + INDEX_SUFFIX)
+
+    @classmethod
+    def for_session(cls, session):
+        return cls.load(cls.path_for_session(session))
+
+    @classmethod
+    def load(cls, path):
+        entries = []
+        if os.path.exists(path):
+            with codecs.open(path, 'r', 'utf-8') as fp:
+                for line in fp:
+                    if line.strip():
+                        entries.append(IndexEntry.from_line(line))
+        return cls(path, entries)
+
+    def __init__(self, path, entries=()):
+        self.path = path
+        self.update(entries)
+
+    def update(self, entries):
+        self._entries = dict((entry.name, entry) for entry in entries)
+        self._names = sorted(self._entries)
+
+    def save(self):
+        data = ''.join(self._entries[name].to_line() for name in self._names)
+        config.atomic_write(self.path, data)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return list(self._names)
+
+    def get(self, name):
+        return self._entries.get(name)
+
+    def prefix(self, prefix):
+        start = bisect.bisect_left(self._names, prefix)
+        matches = []
+        for name in self._names[start:]:
+            if not name.startswith(prefix):
+                break
+            matches.append(self._entries[name])
+        return matches
+
+    def fuzzy(self, name, n=5):
+        names = difflib.get_close_matches(name, self._names, n=n, cutoff=self.FUZZY_CUTOFF)
+        return [self._entries[n] for n in names]
+
+    def resolve(self, name):
+        """Find the entry for a (possibly partial) function name.
+
+        Tries an exact match, then a unique prefix match. Raises
+        AmbiguousNameError if more than one function matches the prefix,
+        and UnknownNameError suggesting close matches if there are any,
+        rather than invoking a function other than the one named. Returns
+        None if nothing is close."""
+        entry = self.get(name)
+        if entry:
+            return entry
+        matches = self.prefix(name)
+        if len(matches) == 1:
+            return matches[0]
+        elif matches:
+            raise AmbiguousNameError(name, [m.name for m in matches])
+        suggestions = self.fuzzy(name)
+        if suggestions:
+            raise UnknownNameError(name, [m.name for m in suggestions])
+        return None
+
+BASH_COMPLETION = r"""
+_faas_form_function_names() {
+    cut -f1 "{index_dir}"/*{index_suffix} 2>/dev/null
+}
+
+_faas_form_complete() {
+    local cur="${COMP_WORDS[COMP_CWORD]}"
+    local prev="${COMP_WORDS[COMP_CWORD-1]}"
+    if [ "$COMP_CWORD" -eq 1 ]; then
+        COMPREPLY=( $(compgen -W "ls list invoke prompt run warm stats serve admin completion" -- "$cur") )
+        return 0
+    fi
+    case "$cur" in
+        -*) return 0 ;;
+    esac
+    case "${COMP_WORDS[1]}" in
+        warm)
+            COMPREPLY=( $(compgen -W "$(_faas_form_function_names)" -- "$cur") )
+            ;;
+        invoke|run)
+            case "$prev" in
+                -*) ;;
+                *) COMPREPLY=( $(compgen -W "$(_faas_form_function_names)" -- "$cur") ) ;;
+            esac
+            ;;
+        prompt)
+            if [ "$prev" = "--function" ]; then
+                COMPREPLY=( $(compgen -W "$(_faas_form_function_names)" -- "$cur") )
+            fi
+            ;;
+        admin)
+            if [ "$COMP_CWORD" -eq 2 ]; then
+                COMPREPLY=( $(compgen -W "add rm show publish" -- "$cur") )
+            else
+                COMPREPLY=( $(compgen -W "$(_faas_form_function_names)" -- "$cur") )
+            fi
+            ;;
+    esac
+    return 0
+}
+
+complete -F _faas_form_complete faas-form
+"""
+
+ZSH_COMPLETION = r"""
+autoload -U +X bashcompinit && bashcompinit
+""" + BASH_COMPLETION
+
+def completion_script(shell):
+    """Return a completion script for the given shell. The script reads the
+    index files directly, without starting Python."""
+    scripts = {
+        'bash': BASH_COMPLETION,
+        'zsh': ZSH_COMPLETION,
+    }
+    if shell not in scripts:
+        raise ValueError("Unsupported shell: {}".format(shell))
+    script = scripts[shell]
+    for key, value in six.iteritems({
+            '{index_dir}': config.get_cache_dir(INDEX_DIR),
+            '{index_suffix}': INDEX_SUFFIX}):
+        script = script.replace(key, value)
+    return script.lstrip()
@@ -0,0 +1,173 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+
+import base64
+import contextlib
+import importlib
+import io
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+from . import codec
+from .faas import FaaSFunction
+
+LOCAL_REGION = 'local'
+LOCAL_ACCOUNT = '000000000000'
+LOG_TAIL_SIZE = 4096
+
+def load_handler(spec):
+    """Import a handler given as 'module:function' (or 'module.function')."""
+    if ':' in spec:
+        module_name, func_name = spec.split(':', 1)
+    elif '.' in spec:
+        module_name, func_name = spec.rsplit('.', 1)
+    else:
+        raise ValueError("Handler must be given as module:function, got {}".format(spec))
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, func_name)
+    except AttributeError:
+        raise ValueError("Handler {} not found in module {}".format(func_name, module_name))
+
+class LambdaContext(object):
+    """A synthetic Lambda context object for invoking handlers in-process."""
+
+    def __init__(self, function_name, timeout=900, memory_limit_in_mb=128):
+        self.function_name = function_name
+        self.function_version = '$LATEST'
+        self.invoked_function_arn = 'arn:aws:lambda:{}:{}:function:{}'.format(LOCAL_REGION, LOCAL_ACCOUNT, function_name)
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = '/aws/lambda/{}'.format(function_name)
+        self.log_stream_name = 'local'
+        self.identity = None
+        self.client_context = None
+        self._deadline = time.time() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.time()) * 1000))
+
+class _ThreadStdout(object):
+    """Stands in for sys.stdout while handlers are running, sending what
+    each capturing thread prints to its own buffer, and everything else to
+    the real stdout."""
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.local = threading.local()
+
+    def _target(self):
+        buffer = getattr(self.local, 'buffer', None)
+        return buffer if buffer is not None else self.stdout
+
+    def write(self, data):
+        return self._target().write(data)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stdout, name)
+
+_capture_lock = threading.Lock()
+_capture_proxy = None
+_capture_count = 0
+
+@contextlib.contextmanager
+def _capture_stdout():
+    """Capture what the current thread prints. Concurrent captures share
+    one proxy, and sys.stdout is restored when the last one finishes.
+    Output from threads the handler starts goes to the real stdout."""
+    global _capture_proxy, _capture_count
+    with _capture_lock:
+        if _capture_count == 0:
+            _capture_proxy = _ThreadStdout(sys.stdout)
+            sys.stdout = _capture_proxy
+        _capture_count += 1
+        proxy = _capture_proxy
+    previous = getattr(proxy.local, 'buffer', None)
+    proxy.local.buffer = captured = six.StringIO()
+    try:
+        yield captured
+    finally:
+        proxy.local.buffer = previous
+        with _capture_lock:
+            _capture_count -= 1
+            if _capture_count == 0:
+                if sys.stdout is proxy:
+                    sys.stdout = proxy.stdout
+                _capture_proxy = None
+
+class LocalClient(object):
+    """Stands in for a boto3 Lambda client, calling a handler in-process.
+
+    Payloads go through the same JSON encoding as real invocations, so the
+    handler sees exactly what it would in Lambda."""
+
+    def __init__(self, handler, function_name):
+        self.handler = handler
+        self.function_name = function_name
+        self._initialized = False
+
+    def invoke(self, FunctionName=None, InvocationType='RequestResponse', LogType='None', Payload=b'', Qualifier=None):
+        if InvocationType == 'DryRun':
+            return {'StatusCode': 204}
+
+        event = codec.loads(Payload or b'{}')
+        context = LambdaContext(self.function_name)
+
+        start = time.time()
+        function_error = None
+        with _capture_stdout() as log:
+            try:
+                result = self.handler(event, context)
+            except Exception as e:
+                function_error = 'Unhandled'
+                result = {
+                    'errorMessage': str(e),
+                    'errorType': type(e).__name__,
+                    'stackTrace': traceback.format_exc().splitlines(),
+                }
+        duration = (time.time() - start) * 1000
+
+        report = 'REPORT RequestId: {} Duration: {:.2f} ms'.format(context.aws_request_id, duration)
+        if not self._initialized:
+            report += ' Init Duration: 0.00 ms'
+            self._initialized = True
+        log_tail = (log.getvalue() + report + '\n')[-LOG_TAIL_SIZE:]
+
+        response = {
+            'StatusCode': 200,
+            'ExecutedVersion': '$LATEST',
+            'Payload': io.BytesIO(codec.dumps(result).encode('utf-8')),
+        }
+        if function_error:
+            response['FunctionError'] = function_error
+        if LogType == 'Tail':
+            response['LogResult'] = base64.b64encode(log_tail.encode('utf-8')).decode('ascii')
+        return response
+
+class LocalFunction(FaaSFunction):
+    """A faas-form function whose handler is called in-process, using the
+    same request and response protocol as a deployed function."""
+
+    RECORD_METRICS = False
+
+    def __init__(self, spec, name=None, handler=None):
+        handler = handler or load_handler(spec)
+        name = name or spec.replace(':', '-').replace('.', '-')
+        arn = 'arn:aws:lambda:{}:{}:function:{}'.format(LOCAL_REGION, LOCAL_ACCOUNT, name)
+        super(LocalFunction, self).__init__(arn, name=name)
+        self.spec = spec
+        self._client = LocalClient(handler, name)
+
+    def prepare(self):
+        pass
@@ -0,0 +1,208 @@
+"""
+Created on Oct 19, 2026
+
+A local log of invocations, one compact JSON record per line, in the
+metrics directory of the cache dir, rotated by size. `faas-form stats`
+aggregates it into latency percentiles per function per day, using
+log-scale histograms so that memory doesn't grow with the number of
+records.
+
+Record fields:
+    t: timestamp (epoch seconds)
+    cmd: the command (invoke, prompt, run, warm)
+    arn: the function, with its qualifier if it has one
+    round: the reinvoke round, starting at 1
+    status: ok, error (function error), cached, or failed (client error)
+    cold: true if the invocation was a cold start (if known)
+    ms: phase timings in ms (schema, invoke, decode)
+    req, resp: request and response payload sizes in bytes
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+
+import collections
+import datetime
+import errno
+import math
+import os
+import time
+
+import dateutil.tz
+
+from . import codec
+from . import config
+
+LOG_DIR = 'metrics'
+LOG_NAME = 'invocations.jsonl'
+MAX_LOG_SIZE = 16 * 1024 * 1024
+LOG_BACKUPS = 5
+DISABLE_ENV_VAR = 'FAAS_FORM_NO_METRICS'
+
+# the commands whose records are calls made to use the function; warm
+# pings and prompt schema fetches are logged, but would swamp usage stats
+CALL_COMMANDS = ('invoke', 'run')
+
+# histogram buckets are 5% wide, which bounds the error of percentiles
+BUCKET_BASE = 1.05
+
+class MetricsLog(object):
+    def __init__(self, path=None, max_size=MAX_LOG_SIZE, backups=LOG_BACKUPS):
+        self.path = path or os.path.join(config.get_cache_dir(LOG_DIR), LOG_NAME)
+        self.max_size = max_size
+        self.backups = backups
+
+    def _rotate(self):
+        # other processes may be rotating at the same time, so any of the
+        # files may already have been moved
+        for i in range(self.backups - 1, 0, -1):
+            _rename_if_exists('{}.{}'.format(self.path, i), '{}.{}'.format(self.path, i + 1))
+        _rename_if_exists(self.path, self.path + '.1')
+
+    def append(self, record):
+        line = (codec.dumps(record) + '\n').encode('utf-8')
+        try:
+            if os.path.getsize(self.path) + len(line) > self.max_size:
+                self._rotate()
+        except OSError as e:
+            # missing, or another process rotated it first
+            if e.errno != errno.ENOENT:
+                raise
+        # a single write to a file opened for append doesn't interleave
+        # with other processes' records
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def paths(self):
+        """The log files, oldest first."""
+        paths = ['{}.{}'.format(self.path, i) for i in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def records(self, since=None):
+        """Iterate over the records, skipping whole files last written
+        before since (epoch seconds)."""
+        for path in self.paths():
+            if since is not None and os.path.getmtime(path) < since:
+                continue
+            with open(path, 'rb') as fp:
+                for line in fp:
+                    try:
+                        yield codec.loads(line)
+                    except ValueError:
+                        pass # e.g., a partial line from a crash
+
+def _rename_if_exists(src, dst):
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+def record(command, function, reinvoke_round=1, status='ok', timings=None, call=None, log=None):
+    """Append a record for a call to function. call is the function's
+    last_call info, if the function was actually invoked."""
+    if os.environ.get(DISABLE_ENV_VAR) or not function.RECORD_METRICS:
+        return
+    rec = {
+        't': int(time.time() * 1000) / 1000.0,
+        'cmd': command,
+        'arn': function.qualified_id,
+        'round': reinvoke_round,
+        'status': status,
+    }
+    ms = dict((phase, round_ms(seconds * 1000)) for phase, seconds in six.iteritems(timings or {}))
+    if call:
+        if call.get('cold') is not None:
+            rec['cold'] = call['cold']
+        for phase in ['invoke', 'decode']:
+            if phase in call:
+                ms[phase] = round_ms(call[phase] * 1000)
+        for key, size_key in [('req', 'request_size'), ('resp', 'response_size')]:
+            if size_key in call:
+                rec[key] = call[size_key]
+    if ms:
+        rec['ms'] = ms
+    try:
+        (log or MetricsLog()).append(rec)
+    except (IOError, OSError):
+        pass # metrics are best-effort
+
+def round_ms(value):
+    return int(value * 10) / 10.0
+
+class Histogram(object):
+    """Counts of values in log-scale buckets."""
+
+    __slots__ = ['buckets', 'count']
+
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+
+    def add(self, value):
+        bucket = int(math.floor(math.log(value, BUCKET_BASE))) if value > 1 else 0
+        self.buckets[bucket] += 1
+        self.count += 1
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(self.count * p / 100.0)))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # the geometric middle of the bucket
+                return BUCKET_BASE ** (bucket + 0.5) if bucket else 1.0
+        return None
+
+class FunctionDayStats(object):
+    __slots__ = ['count', 'errors', 'cold', 'cached', 'latency']
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.cold = 0
+        self.cached = 0
+        self.latency = Histogram()
+
+    def add(self, rec):
+        self.count += 1
+        status = rec.get('status')
+        if status in ('error', 'failed'):
+            self.errors += 1
+        elif status == 'cached':
+            self.cached += 1
+        if rec.get('cold'):
+            self.cold += 1
+        latency = rec.get('ms', {}).get('invoke')
+        if latency is not None:
+            self.latency.add(latency)
+
+def aggregate(records, since=None, function=None, commands=CALL_COMMANDS):
+    """Aggregate records into a dict of (day, arn) to FunctionDayStats,
+    optionally only for records after since (epoch seconds) and for
+    functions whose ARN or name contains function. Only records from the
+    given commands are counted (all if commands is None)."""
+    stats = collections.defaultdict(FunctionDayStats)
+    days = {}
+    for rec in records:
+        t = rec.get('t')
+        arn = rec.get('arn')
+        if t is None or arn is None:
+            continue
+        if commands is not None and rec.get('cmd') not in commands:
+            continue
+        if since is not None and t < since:
+            continue
+        if function and function not in arn:
+            continue
+        day_key = int(t // 86400)
+        if day_key not in days:
+            days[day_key] = datetime.datetime.fromtimestamp(day_key * 86400, tz=dateutil.tz.tzutc()).strftime('%Y-%m-%d')
+        stats[(days[day_key], arn)].add(rec)
+    return stats
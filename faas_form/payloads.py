@@ -6,18 +6,89 @@ Created on Mar 31, 2018
 
 from __future__ import absolute_import, print_function
 
+import array
+import base64
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import math
+import os
+import sys
+import zlib
+
+from . import blobs
+from . import codec
+
 class MissingSchemaError(Exception):
     pass
 
+class InvalidStateError(ValueError):
+    pass
+
+class BlobNotAllowedError(ValueError):
+    pass
+
 PAYLOAD_TYPE_KEY = 'x-faas-form-payload'
 SCHEMA_PAYLOAD_TYPE = 'schema'
 INVOKE_PAYLOAD_TYPE = 'invoke'
 REINVOKE_PAYLOAD_TYPE = 'reinvoke'
 
 SCHEMA_KEY = 'x-faas-form-schema'
+SCHEMA_HASH_KEY = 'x-faas-form-schema-hash'
+SCHEMA_NOT_MODIFIED_KEY = 'x-faas-form-schema-not-modified'
+# the content-addressed schema fragments the client already has
+FRAGMENTS_KEY = 'x-faas-form-fragments'
 
 RESULT_KEY = 'x-faas-form-result'
 
+STATE_KEY = 'x-faas-form-state'
+STATE_SECRET_ENV_VAR = 'FAAS_FORM_STATE_SECRET'
+# truncated HMAC-SHA256
+STATE_MAC_SIZE = 16
+
+CAPABILITIES_KEY = 'x-faas-form-capabilities'
+ENCODING_KEY = 'x-faas-form-encoding'
+ENCODED_PAYLOAD_KEY = 'x-faas-form-encoded'
+
+BLOB_KEY = 'x-faas-form-blob'
+BLOB_STORE_KEY = 'x-faas-form-blob-store'
+# the store locations handlers accept blob URLs from clients in
+BLOB_STORES_ENV_VAR = 'FAAS_FORM_BLOB_STORES'
+
+GZIP_ENCODING = 'gzip'
+BLOB_CAPABILITY = 'blob'
+# the client evaluates input conditions, so a function can send a branching
+# form in one schema instead of reinvoking for each branch
+CONDITION_CAPABILITY = 'condition'
+
+# the function's decode_request unpacks numeric lists sent as packed arrays
+PACKED_CAPABILITY = 'packed'
+# the client resolves schema definitions and $refs, so they needn't be inlined
+REF_CAPABILITY = 'ref'
+
+CAPABILITIES = [GZIP_ENCODING, BLOB_CAPABILITY, CONDITION_CAPABILITY, PACKED_CAPABILITY, REF_CAPABILITY]
+
+REF_KEY = '$ref'
+
+# the values that are packed arrays, and their formats
+PACKED_KEY = 'x-faas-form-packed'
+# little-endian formats to array typecodes, narrowest first
+PACKED_FORMATS = [
+    ('i2', 'h'),
+    ('i4', 'i' if array.array('i').itemsize == 4 else 'l'),
+    ('f4', 'f'),
+    ('f8', 'd'),
+]
+# shorter lists are sent as plain JSON
+MIN_PACKED_ITEMS = 16
+PACKED_SAMPLE_SIZE = 16
+
+MIN_COMPRESS_SIZE = 1024
+# the synchronous invoke limit is 6 MB, leave some headroom
+MAX_PAYLOAD_SIZE = 6 * 1000 * 1000
+
 def _set_payload_type(payload, type):
     payload[PAYLOAD_TYPE_KEY] = type
 
@@ -31,17 +102,79 @@ def _schema_to_json(schema):
     else:
         return schema.to_json()
 
-def _set_schema(payload, schema):
-    payload[SCHEMA_KEY] = _schema_to_json(schema)
+def _inline_refs(schema):
+    """The schema JSON with its definitions inlined, for clients that don't
+    resolve $refs."""
+    definitions = schema.get('definitions')
+    if not definitions:
+        return schema
+    inputs = []
+    for input_obj in schema['inputs']:
+        if REF_KEY not in input_obj:
+            inputs.append(input_obj)
+            continue
+        definition = definitions[input_obj[REF_KEY]]
+        if isinstance(definition, list):
+            inputs.extend(definition)
+        else:
+            inputs.append(dict(definition, **dict((k, v) for k, v in input_obj.items() if k != REF_KEY)))
+    schema = dict(schema, inputs=inputs)
+    del schema['definitions']
+    return schema
+
+def _set_schema(payload, schema, request=None):
+    """Set the schema, leaving out the fragment definitions the request
+    says the client has. If the request isn't given, or the client doesn't
+    have the ref capability, definitions are inlined."""
+    schema = _schema_to_json(schema)
+    if request is None or REF_CAPABILITY not in get_capabilities(request):
+        payload[SCHEMA_KEY] = _inline_refs(schema)
+        return
+    held = get_fragments(request)
+    if held and schema.get('definitions'):
+        held = set(held)
+        schema = dict(schema)
+        definitions = dict((k, v) for k, v in schema['definitions'].items() if k not in held)
+        if definitions:
+            schema['definitions'] = definitions
+        else:
+            del schema['definitions']
+    payload[SCHEMA_KEY] = schema
+
+def canonical_json(obj):
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), default=codec.default)
 
-def set_schema_request(request):
+def schema_hash(schema):
+    return hashlib.sha256(canonical_json(_schema_to_json(schema)).encode('utf-8')).hexdigest()
+
+def set_schema_request(request, schema_hash=None):
+    """Make request a schema request. If the client already holds a copy
+    of the schema, it can pass its hash, and the function will respond
+    with a not-modified marker instead of the schema if it's current."""
     _set_payload_type(request, SCHEMA_PAYLOAD_TYPE)
+    if schema_hash:
+        request[SCHEMA_HASH_KEY] = schema_hash
 
 def is_schema_request(request):
     return _is_payload_type(request, SCHEMA_PAYLOAD_TYPE)
 
-def set_schema_reponse(response, schema):
-    _set_schema(response, schema)
+def set_schema_reponse(response, schema, request=None):
+    """Set the schema in the response to a schema request. If the request
+    is given and carries the hash of the current schema, the schema is
+    replaced by a not-modified marker."""
+    schema = _schema_to_json(schema)
+    current_hash = schema_hash(schema)
+    response[SCHEMA_HASH_KEY] = current_hash
+    if request is not None and request.get(SCHEMA_HASH_KEY) == current_hash:
+        response[SCHEMA_NOT_MODIFIED_KEY] = True
+    else:
+        _set_schema(response, schema, request=request)
+
+def is_schema_not_modified(response):
+    return response.get(SCHEMA_NOT_MODIFIED_KEY) is True
+
+def get_schema_hash(response):
+    return response.get(SCHEMA_HASH_KEY)
 
 def get_schema(response):
     if SCHEMA_KEY not in response:
@@ -49,6 +182,15 @@ def get_schema(response):
     return response[SCHEMA_KEY]
 
 
+def set_fragments(request, fragment_ids):
+    """Tell the function which schema fragments the client has cached."""
+    if fragment_ids:
+        request[FRAGMENTS_KEY] = list(fragment_ids)
+
+def get_fragments(request):
+    return request.get(FRAGMENTS_KEY) or []
+
+
 def set_invoke_request(request):
     _set_payload_type(request, INVOKE_PAYLOAD_TYPE)
 
@@ -56,21 +198,291 @@ def is_invoke_request(obj):
     return _is_payload_type(obj, INVOKE_PAYLOAD_TYPE)
 
 
-def set_reinvoke_response(response, schema, result=None):
+def set_reinvoke_response(response, schema, result=None, state=None, secret=None, request=None):
+    """Ask the client to prompt with the schema and invoke again. If state
+    is given, it is sent to the client as an opaque token, signed with the
+    secret (or the FAAS_FORM_STATE_SECRET env var), and the client sends
+    it back with the next request, where get_state reads it. If the request
+    is given, fragments the client has are left out of the schema."""
     _set_payload_type(response, REINVOKE_PAYLOAD_TYPE)
-    _set_schema(response, schema)
+    _set_schema(response, schema, request=request)
     if result is not None:
         set_result(response, result)
+    if state is not None:
+        response[STATE_KEY] = encode_state(state, secret=secret)
 
 def is_reinvoke_response(obj):
     return _is_payload_type(obj, REINVOKE_PAYLOAD_TYPE)
 
 
+def _state_secret(secret):
+    secret = secret or os.environ.get(STATE_SECRET_ENV_VAR)
+    if not secret:
+        raise ValueError("A secret is required for continuation state (or set {})".format(STATE_SECRET_ENV_VAR))
+    if not isinstance(secret, bytes):
+        secret = secret.encode('utf-8')
+    return secret
+
+def encode_state(state, secret=None):
+    """Encode state as a compact token: the MAC and the compressed JSON,
+    in URL-safe base64."""
+    data = zlib.compress(canonical_json(state).encode('utf-8'))
+    mac = hmac.new(_state_secret(secret), data, hashlib.sha256).digest()[:STATE_MAC_SIZE]
+    return base64.urlsafe_b64encode(mac + data).rstrip(b'=').decode('ascii')
+
+def decode_state(token, secret=None):
+    """Decode a state token, raising InvalidStateError if it wasn't
+    produced with the secret or has been modified."""
+    secret = _state_secret(secret)
+    try:
+        raw = base64.urlsafe_b64decode(str(token) + '=' * (-len(token) % 4))
+    except (TypeError, ValueError):
+        raise InvalidStateError("Continuation state is not valid base64")
+    mac, data = raw[:STATE_MAC_SIZE], raw[STATE_MAC_SIZE:]
+    expected = hmac.new(secret, data, hashlib.sha256).digest()[:STATE_MAC_SIZE]
+    if not hmac.compare_digest(mac, expected):
+        raise InvalidStateError("Continuation state failed verification")
+    return codec.loads(zlib.decompress(data))
+
+def get_state(request, secret=None):
+    """For use in handlers: get the continuation state sent with the
+    reinvoke response this request follows, or None."""
+    token = request.get(STATE_KEY)
+    if token is None:
+        return None
+    return decode_state(token, secret=secret)
+
+def get_state_token(response):
+    """For clients: the opaque state token to send with the next request."""
+    return response.get(STATE_KEY) if isinstance(response, dict) else None
+
+def set_state_token(request, token):
+    if token is not None:
+        request[STATE_KEY] = token
+
+def _to_bytes(values):
+    if sys.byteorder != 'little':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes() if hasattr(values, 'tobytes') else values.tostring()
+
+_isfinite = getattr(math, 'isfinite', lambda x: not (math.isinf(x) or math.isnan(x)))
+
+def _packed_format(values):
+    """The narrowest format that holds all the values exactly."""
+    if all(map(float.is_integer, values)):
+        lo, hi = min(values), max(values)
+        for fmt, bits in [('i2', 16), ('i4', 32)]:
+            if -2 ** (bits - 1) <= lo and hi < 2 ** (bits - 1):
+                return fmt
+    # check a sample before converting the whole array
+    if array.array('f', values[:PACKED_SAMPLE_SIZE]) == values[:PACKED_SAMPLE_SIZE]:
+        if array.array('f', values) == values:
+            return 'f4'
+    return 'f8'
+
+def pack_numbers(values):
+    """Pack numbers as (format, data): the data is base64 of the numbers in
+    the narrowest format in PACKED_FORMATS that holds them all exactly."""
+    if not isinstance(values, array.array) or values.typecode != 'd':
+        values = array.array('d', values)
+    if not all(map(_isfinite, values)):
+        raise ValueError("Numbers must be finite to be packed")
+    fmt = _packed_format(values) if values else 'f8'
+    typecode = dict(PACKED_FORMATS)[fmt]
+    if typecode == 'd':
+        packed = values
+    elif typecode == 'f':
+        packed = array.array(typecode, values)
+    else:
+        packed = array.array(typecode, map(int, values))
+    return fmt, base64.b64encode(_to_bytes(packed)).decode('ascii')
+
+def unpack_numbers(fmt, data):
+    """Unpack numbers packed with pack_numbers, as an array of the format's
+    typecode, without converting each number."""
+    typecodes = dict(PACKED_FORMATS)
+    if fmt not in typecodes:
+        raise ValueError("Unsupported packed format: {}".format(fmt))
+    values = array.array(typecodes[fmt])
+    raw = base64.b64decode(data)
+    if hasattr(values, 'frombytes'):
+        values.frombytes(raw)
+    else:
+        values.fromstring(raw)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+def set_values(request, values, capabilities=None):
+    """Add the input values to a request. Numeric arrays are packed if the
+    function supports it and they're long enough for it to be worthwhile."""
+    packed = {}
+    for name, value in values.items():
+        if (isinstance(value, array.array) and len(value) >= MIN_PACKED_ITEMS
+                and PACKED_CAPABILITY in (capabilities or [])):
+            packed[name], value = pack_numbers(value)
+        request[name] = value
+    if packed:
+        request[PACKED_KEY] = packed
+
+def _unpack_values(request):
+    packed = request.pop(PACKED_KEY, None) if isinstance(request, dict) else None
+    for name, fmt in (packed or {}).items():
+        request[name] = unpack_numbers(fmt, request[name])
+    return request
+
+def get_numbers(request, name):
+    """For use in handlers: the value of a list<number> input as a numeric
+    array (or None), however the client sent it. Packed values keep their
+    packed typecode (e.g., 'h' for small integers), otherwise it's 'd'."""
+    value = request.get(name)
+    if value is None or isinstance(value, array.array):
+        return value
+    return array.array('d', value)
+
 def set_result(response, result):
     response[RESULT_KEY] = result
 
 def get_result(response):
     return response.get(RESULT_KEY)
 
+def set_capabilities(payload):
+    payload[CAPABILITIES_KEY] = list(CAPABILITIES)
+
+def get_capabilities(payload):
+    return payload.get(CAPABILITIES_KEY) or []
+
+def _gzip(data):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', mtime=0) as fp:
+        fp.write(data)
+    return buf.getvalue()
+
+def _gunzip(data):
+    with gzip.GzipFile(fileobj=io.BytesIO(data), mode='rb') as fp:
+        return fp.read()
+
+def _copy_payload_type(source, dest):
+    if PAYLOAD_TYPE_KEY in source:
+        dest[PAYLOAD_TYPE_KEY] = source[PAYLOAD_TYPE_KEY]
+    return dest
+
+def encode_payload(payload, capabilities, blob_store=None):
+    """Compress the payload if the other side supports it and it makes the
+    payload smaller. If it's still too large to send, and a blob store is
+    given, upload it and send a reference to it instead (blob_store may be
+    a function returning the store, called only if it's needed). The
+    payload type is kept visible so requests can still be routed before
+    decoding."""
+    return encode_payload_data(payload, capabilities, blob_store=blob_store)[0]
+
+def encode_payload_data(payload, capabilities, blob_store=None):
+    """Like encode_payload, but returns the encoded payload along with its
+    JSON as bytes, so that a client can send the payload without
+    serializing it again."""
+    # sizes are in bytes, which is what the limit is on, and non-ASCII
+    # characters may not be escaped in the JSON
+    data = codec.dumpb(payload)
+    
+    if GZIP_ENCODING in capabilities and len(data) >= MIN_COMPRESS_SIZE:
+        encoded = base64.b64encode(_gzip(data)).decode('ascii')
+        if len(encoded) < len(data):
+            payload = _copy_payload_type(payload, {
+                ENCODING_KEY: GZIP_ENCODING,
+                ENCODED_PAYLOAD_KEY: encoded,
+            })
+            data = codec.dumpb(payload)
+    
+    if len(data) > MAX_PAYLOAD_SIZE and blob_store is not None and BLOB_CAPABILITY in capabilities:
+        if callable(blob_store):
+            blob_store = blob_store()
+        url = blob_store.put_bytes(data)
+        payload = _copy_payload_type(payload, {
+            BLOB_KEY: url,
+        })
+        data = codec.dumpb(payload)
+    
+    return payload, data
+
+def allowed_blob_stores(blob_stores=None):
+    """The store locations a handler accepts blob URLs from clients in: the
+    given stores (BlobStores or location URLs), or the comma-separated
+    locations in the FAAS_FORM_BLOB_STORES env var. None are allowed by
+    default."""
+    if blob_stores is None:
+        blob_stores = os.environ.get(BLOB_STORES_ENV_VAR, '').split(',')
+    urls = []
+    for store in blob_stores:
+        url = store.url if isinstance(store, blobs.BlobStore) else store.strip()
+        if url:
+            urls.append(url)
+    return urls
+
+def _check_blob_url(url, blob_stores):
+    if not any(blobs.in_store(url, store) for store in blob_stores):
+        raise BlobNotAllowedError("Blob URL {} is not in an allowed blob store (set {})".format(url, BLOB_STORES_ENV_VAR))
+
+def delete_blob(url, session=None):
+    """Delete an offloaded payload that is no longer needed. Errors are
+    ignored, since a lifecycle rule on the store is the backstop."""
+    try:
+        blobs.get_store(url, session=session).delete(url)
+    except Exception:
+        pass
+
+def decode_payload(payload, session=None, blob_stores=None, delete=False):
+    """Decode a payload, downloading it if it was offloaded. If blob_stores
+    is given, the blob must be in one of them. If delete is True, the blob
+    is deleted once it has been read; clients do this for responses, and
+    for their requests once the invocation has returned."""
+    if not isinstance(payload, dict):
+        return payload
+    if BLOB_KEY in payload:
+        url = payload[BLOB_KEY]
+        if blob_stores is not None:
+            _check_blob_url(url, allowed_blob_stores(blob_stores))
+        payload = blobs.get_store(url, session=session).get_json(url)
+        if delete:
+            delete_blob(url, session=session)
+    if ENCODING_KEY not in payload:
+        return payload
+    encoding = payload[ENCODING_KEY]
+    if encoding != GZIP_ENCODING:
+        raise ValueError("Unsupported payload encoding: {}".format(encoding))
+    return codec.loads(_gunzip(base64.b64decode(payload[ENCODED_PAYLOAD_KEY])))
+
+def set_blob_store(payload, blob_store):
+    payload[BLOB_STORE_KEY] = blob_store.url
+
+def get_blob_store(payload, session=None, blob_stores=None):
+    """Get the blob store the client asked for large responses to be put
+    in, if any. It must be in one of the allowed blob stores (see
+    allowed_blob_stores)."""
+    url = payload.get(BLOB_STORE_KEY)
+    if not url:
+        return None
+    _check_blob_url(url, allowed_blob_stores(blob_stores))
+    return blobs.get_store(url, session=session)
+
+def decode_request(request, session=None, blob_stores=None):
+    """For use in handlers: get the request event, downloading and
+    decompressing it if needed. Packed numeric lists are unpacked as
+    arrays. Offloaded requests must be in one of the allowed blob stores
+    (see allowed_blob_stores), otherwise BlobNotAllowedError is raised."""
+    return _unpack_values(decode_payload(request, session=session,
+                                         blob_stores=allowed_blob_stores(blob_stores)))
+
+def encode_response(response, request, blob_store=None, blob_stores=None):
+    """For use in handlers: advertise support for compressed and offloaded
+    requests, and compress the response if the client supports it and it
+    helps. If the response is too large, it is put in the given blob store,
+    or the one the client asked for, if that is allowed (see
+    allowed_blob_stores)."""
+    set_capabilities(response)
+    if blob_store is None and request.get(BLOB_STORE_KEY):
+        blob_store = lambda: get_blob_store(request, blob_stores=blob_stores)
+    return encode_payload(response, get_capabilities(request), blob_store=blob_store)
+
 def _strip_payload(payload):
     return dict((key, value) for key, value in payload.items() if not key.startswith('x-faas-form'))
\ No newline at end of file
@@ -8,11 +8,23 @@ from __future__ import absolute_import, print_function
 
 import six
 import getpass
+import array
+import collections
 from abc import abstractmethod, ABCMeta
+import hashlib
 import re
 import itertools
+import json
+import io
+import mmap
+import os
+import sys
+import threading
+import time
 
 from . import getch
+from . import trace
+from .payloads import canonical_json, _isfinite, REF_KEY
 
 __all__ = [
     'Schema',
@@ -20,14 +32,142 @@ __all__ = [
     'SecretInput',
     'NumberInput',
     'StringListInput',
+    'NumberListInput',
     'ConstInput',
     'BooleanInput',
+    'Condition',
+    'Fragment',
+    'Ref',
+    'AnswerStream',
 ]
 
 class SchemaError(ValueError):
     pass
 
+class ValidationError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super(ValidationError, self).__init__('; '.join(errors))
+
+SOURCE_PREFIX = '@'
+STDIN_SOURCE = '-'
+
+LARGE_SOURCE_ITEMS = 10000
+
+def _source_path(value):
+    """If value refers to a file ('@path', or '@-' for stdin), return the
+    path. Returns None for literal values; '@@' escapes a literal '@'."""
+    if value and len(value) > len(SOURCE_PREFIX) and value.startswith(SOURCE_PREFIX) and not value.startswith(SOURCE_PREFIX * 2):
+        return value[len(SOURCE_PREFIX):]
+    return None
+
+def _literal_value(value):
+    if value and value.startswith(SOURCE_PREFIX * 2):
+        return value[len(SOURCE_PREFIX):]
+    return value
+
+# set while reading answers from stdin, which leaves nothing for @- to read
+_stdin_state = threading.local()
+
+def _check_stdin_source():
+    if getattr(_stdin_state, 'answers', False):
+        raise IOError("Can't read @{} when answers are read from stdin".format(STDIN_SOURCE))
+
+def _read_source(path):
+    if path == STDIN_SOURCE:
+        _check_stdin_source()
+        return sys.stdin.read()
+    with io.open(path, 'r', encoding='utf-8') as fp:
+        return fp.read()
+
+def _iter_source_lines(path):
+    """Iterate over the non-empty lines of a file, memory-mapping it so large
+    files aren't read into memory."""
+    if path == STDIN_SOURCE:
+        _check_stdin_source()
+        for line in sys.stdin:
+            line = line.rstrip('\r\n')
+            if line:
+                yield line
+        return
+    with open(path, 'rb') as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return
+        mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for line in iter(mapped.readline, b''):
+                line = line.rstrip(b'\r\n')
+                if line:
+                    yield line.decode('utf-8')
+        finally:
+            mapped.close()
+
+_NUMBER_SEPARATORS = re.compile(r'[\s,]+')
+
+def _split_numbers(text):
+    """Split whitespace- and/or comma-separated numbers."""
+    return [token for token in _NUMBER_SEPARATORS.split(text) if token]
+
+def _read_number_source(path):
+    """Read whitespace- and/or comma-separated numbers from a file as bytes
+    tokens, which float() parses without decoding each one."""
+    if path == STDIN_SOURCE:
+        _check_stdin_source()
+        data = sys.stdin.read().encode('utf-8')
+    else:
+        with open(path, 'rb') as fp:
+            data = fp.read()
+    return data.replace(b',', b' ').split()
+
+FRAGMENT_ID_PREFIX = 'sha256:'
+
+def fragment_id(fragment_json):
+    """The content address of a fragment (a list of input JSON objects)."""
+    return FRAGMENT_ID_PREFIX + hashlib.sha256(canonical_json(fragment_json).encode('utf-8')).hexdigest()
+
+def is_fragment_id(definition_id):
+    return definition_id.startswith(FRAGMENT_ID_PREFIX)
+
+class _FragmentMemo(object):
+    """A bounded least-recently-used map of content address to parsed
+    Fragment, safe to share between threads."""
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._fragments = collections.OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, fragment_id):
+        with self._lock:
+            fragment = self._fragments.pop(fragment_id, None)
+            if fragment is not None:
+                self._fragments[fragment_id] = fragment
+            return fragment
+    
+    def put(self, fragment_id, fragment):
+        with self._lock:
+            self._fragments.pop(fragment_id, None)
+            self._fragments[fragment_id] = fragment
+            while len(self._fragments) > self.max_size:
+                self._fragments.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+    
+    def __len__(self):
+        return len(self._fragments)
+
+MAX_PARSED_FRAGMENTS = 256
+# fragments parsed in this process, by content address, so that a fragment
+# shared by many schemas (or reinvoke rounds) is only parsed once
+_parsed_fragments = _FragmentMemo(MAX_PARSED_FRAGMENTS)
+
 class Schema(object):
+    """A form. inputs may include Fragments, whose inputs are included in
+    place, and Refs to the input definitions in definitions (a dict of
+    name to Input or Fragment). Schema.inputs is the resulting inputs."""
+    
     INPUT_REGISTRY = {}
     
     @classmethod
@@ -39,44 +179,270 @@ class Schema(object):
         return input_cls.from_json(obj)
     
     @classmethod
-    def from_json(cls, obj):
+    def _fragment_from_json(cls, definition_id, obj):
+        if not isinstance(obj, list):
+            raise SchemaError("Fragment {} must be a list of inputs".format(definition_id))
+        if is_fragment_id(definition_id) and fragment_id(obj) != definition_id:
+            raise SchemaError("Fragment {} does not match its content".format(definition_id))
+        return Fragment([cls._input_from_json(input_obj) for input_obj in obj], id=definition_id, json=obj)
+    
+    @classmethod
+    def _definition_from_json(cls, definition_id, obj, fragments=None):
+        """Parse a definition, using and updating the parsed fragments
+        memo and the fragment cache for content-addressed fragments."""
+        if isinstance(obj, dict):
+            return cls._input_from_json(obj)
+        if not is_fragment_id(definition_id):
+            return cls._fragment_from_json(definition_id, obj)
+        fragment = _parsed_fragments.get(definition_id)
+        if fragment is None:
+            fragment = cls._fragment_from_json(definition_id, obj)
+            _parsed_fragments.put(definition_id, fragment)
+        if fragments is not None and definition_id not in fragments:
+            fragments.put(definition_id, fragment.to_json())
+        return fragment
+    
+    @classmethod
+    @trace.traced('Schema.from_json')
+    def from_json(cls, obj, fragments=None):
+        """Parse a schema. Content-addressed fragments it refers to but
+        doesn't include are taken from fragments (a FragmentCache), if
+        given, and those it includes are added to it."""
         if 'inputs' not in obj:
             raise SchemaError('Missing inputs')
         
         instructions = obj.get('instructions')
+        cache_ttl = obj.get('cache_ttl')
+        
+        definitions_obj = obj.get('definitions') or {}
+        definitions = {}
+        for definition_id, definition_obj in six.iteritems(definitions_obj):
+            definitions[definition_id] = cls._definition_from_json(definition_id, definition_obj, fragments=fragments)
         
         inputs = []
         for input_obj in obj['inputs']:
-            inputs.append(cls._input_from_json(input_obj))
+            if REF_KEY not in input_obj:
+                inputs.append(cls._input_from_json(input_obj))
+                continue
+            definition_id = input_obj[REF_KEY]
+            if definition_id not in definitions and is_fragment_id(definition_id):
+                fragment = _parsed_fragments.get(definition_id)
+                if fragment is None and fragments is not None:
+                    cached = fragments.get(definition_id)
+                    if cached is not None:
+                        fragment = cls._definition_from_json(definition_id, cached)
+                if fragment is None:
+                    raise SchemaError("Unknown fragment: {}".format(definition_id))
+                definitions[definition_id] = fragment
+            if isinstance(definitions.get(definition_id), Fragment):
+                if len(input_obj) > 1:
+                    raise SchemaError("A reference to fragment {} can't override fields".format(definition_id))
+                inputs.append(definitions[definition_id])
+            else:
+                overrides = dict((k, v) for k, v in six.iteritems(input_obj) if k != REF_KEY)
+                inputs.append(Ref(definition_id, **overrides))
         
-        return cls(inputs, instructions=instructions)
+        return cls(inputs, instructions=instructions, cache_ttl=cache_ttl, definitions=definitions)
     
-    def __init__(self, inputs, instructions=None):
+    def __init__(self, inputs, instructions=None, cache_ttl=None, definitions=None):
         self.instructions = instructions
-        self.inputs = inputs
+        self.layout = list(inputs)
+        self.definitions = dict(definitions or {})
+        self.inputs = []
+        for item in self.layout:
+            if isinstance(item, Fragment):
+                self.definitions.setdefault(item.id, item)
+                self.inputs.extend(item.inputs)
+            elif isinstance(item, Ref):
+                definition = self.definitions.get(item.id)
+                if not isinstance(definition, Input):
+                    raise SchemaError("Unknown input definition: {}".format(item.id))
+                self.inputs.append(item.resolve(definition))
+            else:
+                self.inputs.append(item)
+        if cache_ttl is not None and (isinstance(cache_ttl, bool)
+                                      or not isinstance(cache_ttl, six.integer_types + (float,))
+                                      or cache_ttl <= 0):
+            raise SchemaError("cache_ttl must be a positive number of seconds")
+        self.cache_ttl = cache_ttl
+        
+        names = set()
+        for input_obj in self.inputs:
+            if input_obj.condition is not None and input_obj.condition.input not in names:
+                raise SchemaError("The condition for {} must refer to an earlier input".format(input_obj.name))
+            names.add(input_obj.name)
     
     def to_json(self):
+        inputs = []
+        for item in self.layout:
+            if isinstance(item, Fragment):
+                inputs.append({REF_KEY: item.id})
+            else:
+                inputs.append(item.to_json())
         obj = {
             'schema_version': '2018-04-01',
-            'inputs': [i.to_json() for i in self.inputs],
+            'inputs': inputs,
         }
+        if self.definitions:
+            obj['definitions'] = dict((definition_id, definition.to_json())
+                                      for definition_id, definition in six.iteritems(self.definitions))
         if self.instructions:
             obj['instructions'] = self.instructions
+        if self.cache_ttl is not None:
+            obj['cache_ttl'] = self.cache_ttl
         return obj
     
-    def get_values(self):
+    def get_values(self, answers=None):
+        """Prompt the user for values. If an AnswerStream is given, read the
+        values from it instead, without prompting."""
+        if answers is not None:
+            return answers.get_values(self)
         if self.instructions:
             print(self.instructions)
         values = {}
         for input_obj in self.inputs:
-            values[input_obj.name] = input_obj.get_value()
+            if input_obj.is_active(values):
+                values[input_obj.name] = input_obj.get_value()
+        return values
+    
+    def _validate(self, get_raw_value):
+        """Validate the inputs in order, skipping those whose conditions
+        aren't met by the values so far."""
+        values = {}
+        errors = []
+        for input_obj in self.inputs:
+            if not input_obj.is_active(values):
+                continue
+            raw_value = get_raw_value(input_obj)
+            try:
+                values[input_obj.name] = input_obj.validate(raw_value)
+            except ValueError as e:
+                errors.append('{}: {}'.format(input_obj.name, e))
+        return values, errors
+    
+    def validate_values(self, obj):
+        """Validate a dict of values in one pass, returning the coerced
+        values or raising ValidationError with every problem found. Values
+        for inputs whose conditions aren't met are ignored."""
+        if not isinstance(obj, dict):
+            raise ValidationError(['Values must be an object'])
+        names = set(input_obj.name for input_obj in self.inputs)
+        values, errors = self._validate(lambda input_obj: obj.get(input_obj.name))
+        for name in sorted(set(obj) - names):
+            errors.append('{}: Unknown input'.format(name))
+        if errors:
+            raise ValidationError(errors)
+        return values
+    
+    def values_from_lines(self, lines):
+        """Read values from an iterator of lines, with one line per input
+        in order (list inputs take lines up to a blank line, and inputs
+        whose conditions aren't met take none), and validate them in one
+        pass."""
+        values, errors = self._validate(lambda input_obj: input_obj.parse_lines(lines))
+        if errors:
+            raise ValidationError(errors)
         return values
     
     def __repr__(self):
-        instructions_str = ''
+        kwargs_str = ''
         if self.instructions:
-            instructions_str = ',instructions={!r}'.format(self.instructions)
-        return 'Schema({!r}{})'.format(self.inputs, instructions_str)
+            kwargs_str += ',instructions={!r}'.format(self.instructions)
+        if self.cache_ttl is not None:
+            kwargs_str += ',cache_ttl={!r}'.format(self.cache_ttl)
+        return 'Schema({!r}{})'.format(self.inputs, kwargs_str)
+
+class Fragment(object):
+    """A reusable list of inputs. By default, it is identified by the hash
+    of its content, so that clients can cache it and functions can leave it
+    out of schemas sent to clients that have it."""
+    
+    def __init__(self, inputs, id=None, json=None):
+        self.inputs = list(inputs)
+        self._json = json if json is not None else [input_obj.to_json() for input_obj in self.inputs]
+        self.id = id or fragment_id(self._json)
+    
+    def to_json(self):
+        return self._json
+    
+    def __repr__(self):
+        return 'Fragment({!r},id={!r})'.format(self.inputs, self.id)
+
+class Ref(object):
+    """A reference to an input definition of the schema, with fields of
+    the definition to override (e.g., the name)."""
+    
+    def __init__(self, id, **overrides):
+        self.id = id
+        self.overrides = overrides
+    
+    def resolve(self, definition):
+        return Schema._input_from_json(dict(definition.to_json(), **self.overrides))
+    
+    def to_json(self):
+        obj = dict(self.overrides)
+        obj[REF_KEY] = self.id
+        return obj
+    
+    def __repr__(self):
+        return 'Ref({!r}{})'.format(self.id, ''.join(',{}={!r}'.format(k, v) for k, v in sorted(self.overrides.items())))
+
+_UNSET = object()
+
+class Condition(object):
+    """A condition on the value of an earlier input, for an input that is
+    only asked for if it holds. Exactly one test is given:
+        present: whether the input has a value (a non-empty one, for lists)
+        equals: the value equals this
+        pattern: the value (or an item of a list value) matches this regex
+    An input that was skipped because of its own condition has no value."""
+    
+    TESTS = ['present', 'equals', 'pattern']
+    
+    @classmethod
+    def from_json(cls, obj):
+        if not isinstance(obj, dict) or 'input' not in obj:
+            raise SchemaError("condition must be an object with an input")
+        unknown = set(obj) - set(['input'] + cls.TESTS)
+        if unknown:
+            raise SchemaError("Unknown condition fields: {}".format(', '.join(sorted(unknown))))
+        return cls(obj['input'], **dict((test, obj[test]) for test in cls.TESTS if test in obj))
+    
+    def __init__(self, input, present=None, equals=_UNSET, pattern=None):
+        self.input = input
+        self.present = present
+        self.equals = equals
+        self.pattern = pattern
+        tests = [present is not None, equals is not _UNSET, pattern is not None]
+        if sum(tests) != 1:
+            raise SchemaError("condition must have exactly one of {}".format(', '.join(self.TESTS)))
+        self._regex = re.compile(pattern) if pattern is not None else None
+    
+    def to_json(self):
+        obj = {'input': self.input}
+        if self.present is not None:
+            obj['present'] = self.present
+        elif self.equals is not _UNSET:
+            obj['equals'] = self.equals
+        else:
+            obj['pattern'] = self.pattern
+        return obj
+    
+    def evaluate(self, values):
+        value = values.get(self.input)
+        if isinstance(value, array.array):
+            value = value.tolist()
+        if self.present is not None:
+            return (value is not None and value != []) == bool(self.present)
+        if self.equals is not _UNSET:
+            # don't let True equal 1
+            return (self.input in values and value == self.equals
+                    and isinstance(value, bool) == isinstance(self.equals, bool))
+        items = value if isinstance(value, list) else [value]
+        return any(isinstance(item, six.string_types) and self._regex.search(item) for item in items)
+    
+    def __repr__(self):
+        return 'Condition({})'.format(','.join('{}={!r}'.format(k, v) for k, v in sorted(self.to_json().items())))
 
 @six.add_metaclass(ABCMeta)
 class Input(object):
@@ -97,6 +463,8 @@ class Input(object):
         for field in ['required', 'help']:
             if field in obj:
                 kwargs[field] = obj[field]
+        if 'condition' in obj:
+            kwargs['condition'] = Condition.from_json(obj['condition'])
         if cls.default_allowed():
             kwargs['default'] = obj.get('default')
         elif 'default' in obj:
@@ -115,12 +483,16 @@ class Input(object):
     def __init__(self, name,
                  required=None,
                  default=None,
-                 help=None,):
+                 help=None,
+                 condition=None,):
         if not name:
             raise SchemaError("Name is required")
         self.name = name
         self._required = required
         self.help = help
+        if isinstance(condition, dict):
+            condition = Condition.from_json(condition)
+        self.condition = condition
         
         self.default = None
         if self.default_allowed():
@@ -145,8 +517,15 @@ class Input(object):
             value = getattr(self, field)
             if value is not None:
                 obj[field] = value
+        if self.condition is not None:
+            obj['condition'] = self.condition.to_json()
         return obj
     
+    def is_active(self, values):
+        """Whether the input is asked for, given the values of the inputs
+        before it."""
+        return self.condition is None or self.condition.evaluate(values)
+    
     @abstractmethod
     def to_json(self):
         raise NotImplementedError
@@ -179,6 +558,30 @@ class Input(object):
         parts.append(': ')
         return ''.join(parts)
     
+    def _next_line(self, lines):
+        line = next(lines, None)
+        if line is None:
+            return None
+        return line.rstrip('\r\n') or None
+    
+    def parse_lines(self, lines):
+        """Read the raw answer for this input from an iterator of lines."""
+        return self._next_line(lines)
+    
+    def _validate_value(self, value):
+        return value
+    
+    def validate(self, value):
+        """Coerce and validate a non-interactive answer, raising ValueError
+        if it's invalid."""
+        if value is not None:
+            value = self._validate_value(value)
+        if value is None and self.default is not None:
+            value = self.default
+        if value is None and self.required:
+            raise ValueError('Field is required')
+        return value
+    
     def get_value(self):
         prompt = self.prompt()
         while True:
@@ -207,6 +610,9 @@ class Input(object):
         return '{}({})'.format(self.__class__.__name__, ','.join(kwargs))
 
 class StringInput(Input):
+    # whether @path values are read from files
+    FILE_SOURCES = True
+    
     @classmethod
     def type(cls):
         return 'string'
@@ -221,20 +627,51 @@ class StringInput(Input):
                  required=None,
                  default=None,
                  help=None,
-                 pattern=None,):
+                 pattern=None,
+                 condition=None,):
         super(StringInput, self).__init__(
             name,
             required=required,
             default=default,
-            help=help)
+            help=help,
+            condition=condition)
         self.pattern = pattern
     
     def to_json(self):
         return self._base_to_json('pattern')
     
+    def _resolve_source(self, value):
+        if not self.FILE_SOURCES:
+            return value
+        path = _source_path(value)
+        if path is None:
+            return _literal_value(value)
+        return _read_source(path)
+    
+    def parse_lines(self, lines):
+        value = super(StringInput, self).parse_lines(lines)
+        if value is None:
+            return None
+        try:
+            return self._resolve_source(value)
+        except (IOError, OSError) as e:
+            raise ValidationError(['{}: Could not read file: {}'.format(self.name, e.strerror or e)])
+    
+    def _validate_value(self, value):
+        if not isinstance(value, six.string_types):
+            raise ValueError('Must be a string')
+        if self.pattern and not re.search(self.pattern, value):
+            raise ValueError('Does not match pattern {}'.format(self.pattern))
+        return value or None
+    
     def _get_value(self, prompt):
         while True:
             value = self._input(prompt)
+            try:
+                value = self._resolve_source(value)
+            except (IOError, OSError) as e:
+                print('Could not read file: {}'.format(e.strerror or e))
+                continue
             if self.pattern and not re.search(self.pattern, value):
                 print('Invalid input!')
                 continue
@@ -243,6 +680,9 @@ class StringInput(Input):
             return value
 
 class SecretInput(StringInput):
+    # a secret starting with @ is a secret, not a path
+    FILE_SOURCES = False
+    
     @classmethod
     def type(cls):
         return 'secret'
@@ -254,8 +694,9 @@ class SecretInput(StringInput):
     def __init__(self, name,
                  required=None,
                  help=None,
-                 pattern=None,):
-        super(SecretInput, self).__init__(name, required=required, help=help, pattern=pattern)
+                 pattern=None,
+                 condition=None,):
+        super(SecretInput, self).__init__(name, required=required, help=help, pattern=pattern, condition=condition)
     
     def _input(self, prompt):
         return getpass.getpass(prompt)
@@ -275,12 +716,14 @@ class NumberInput(Input):
                  required=None,
                  default=None,
                  help=None,
-                 integer=None):
+                 integer=None,
+                 condition=None):
         super(NumberInput, self).__init__(
             name,
             required=required,
             default=default,
-            help=help)
+            help=help,
+            condition=condition)
         
         self.integer = integer
         
@@ -293,6 +736,17 @@ class NumberInput(Input):
             properties.append('integer={}'.format(self.integer))
         return properties
     
+    def _validate_value(self, value):
+        if isinstance(value, bool):
+            raise ValueError('Must be a number')
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError('Must be a number')
+        if self.integer and not value.is_integer():
+            raise ValueError('Must be an integer')
+        return value
+    
     def _get_value(self, prompt):
         while True:
             value = self._input(prompt)
@@ -326,12 +780,14 @@ class StringListInput(Input):
                  default=None,
                  help=None,
                  pattern=None,
-                 size=None,):
+                 size=None,
+                 condition=None,):
         super(StringListInput, self).__init__(
             name,
             required=required,
             default=default,
-            help=help)
+            help=help,
+            condition=condition)
         
         self.pattern = pattern
         self.size = size
@@ -359,11 +815,77 @@ class StringListInput(Input):
             properties.append('size={}'.format(self.size))
         return properties
     
+    def _read_items(self, path):
+        """Read list items from a file, one per line, validating each one as
+        it is read. Raises ValueError if any are invalid."""
+        pattern = re.compile(self.pattern) if self.pattern else None
+        start = time.time()
+        values = []
+        num_bytes = 0
+        for line_num, item in enumerate(_iter_source_lines(path), 1):
+            if pattern and not pattern.search(item):
+                raise ValueError('{} line {}: {!r} does not match pattern {}'.format(path, line_num, item, self.pattern))
+            values.append(item)
+            num_bytes += len(item) + 1
+            if len(values) > self.maximum_size:
+                raise ValueError('{}: too many values! Maximum size: {}'.format(path, self.maximum_size))
+        if len(values) >= LARGE_SOURCE_ITEMS:
+            elapsed = max(time.time() - start, 1e-6)
+            print('Read {} items ({:.1f} MB) from {} in {:.2f}s ({:.0f} items/s)'.format(
+                len(values), num_bytes / 1e6, path, elapsed, len(values) / elapsed), file=sys.stderr)
+        return values
+    
+    def parse_lines(self, lines):
+        values = []
+        while len(values) < self.maximum_size:
+            value = self._next_line(lines)
+            if value is None:
+                break
+            path = _source_path(value)
+            if path is None:
+                values.append(_literal_value(value))
+                continue
+            try:
+                values.extend(self._read_items(path))
+            except (IOError, OSError, ValueError) as e:
+                raise ValidationError(['{}: {}'.format(self.name, e)])
+        return values
+    
+    def _validate_value(self, value):
+        if not isinstance(value, list):
+            raise ValueError('Must be a list')
+        errors = []
+        for i, item in enumerate(value):
+            if not isinstance(item, six.string_types):
+                errors.append('item {} must be a string'.format(i))
+            elif self.pattern and not re.search(self.pattern, item):
+                errors.append('item {} does not match pattern {}'.format(i, self.pattern))
+        if not self.minimum_size <= len(value) <= self.maximum_size:
+            errors.append('Must have {} items'.format(self.size))
+        if errors:
+            raise ValueError(', '.join(errors))
+        return value
+    
     def _get_value(self, prompt):
         values = []
         for _ in itertools.count():
             try:
                 value = self._input(prompt)
+                path = _source_path(value)
+                if path is not None:
+                    try:
+                        items = self._read_items(path)
+                    except (IOError, OSError, ValueError) as e:
+                        print('Invalid input! {}'.format(e))
+                        continue
+                    if len(values) + len(items) > self.maximum_size:
+                        print("Too many values! Maximum size: {}".format(self.maximum_size))
+                        continue
+                    values.extend(items)
+                    if len(values) == self.maximum_size:
+                        return values
+                    continue
+                value = _literal_value(value)
                 if self.pattern and not re.search(self.pattern, value):
                     print('Invalid input! Ctrl-D to enter no value')
                     continue
@@ -385,6 +907,161 @@ class StringListInput(Input):
             if len(values) == self.maximum_size:
                 return values
 
+class NumberListInput(Input):
+    """A list of numbers, held as an array('d') and coerced and checked a
+    whole list at a time."""
+    
+    @classmethod
+    def type(cls):
+        return 'list<number>'
+    
+    @classmethod
+    def default_allowed(cls):
+        return False
+    
+    @classmethod
+    def from_json(cls, obj):
+        kwargs = cls._get_base_kwargs_from_json(obj)
+        for field in ['integer', 'size', 'minimum', 'maximum']:
+            kwargs[field] = obj.get(field)
+        return cls(**kwargs)
+    
+    def __init__(self, name,
+                 required=None,
+                 help=None,
+                 integer=None,
+                 size=None,
+                 minimum=None,
+                 maximum=None,
+                 condition=None,):
+        super(NumberListInput, self).__init__(
+            name,
+            required=required,
+            help=help,
+            condition=condition)
+        
+        self.integer = integer
+        self.size = size
+        self.minimum = minimum
+        self.maximum = maximum
+    
+    def to_json(self):
+        return self._base_to_json('integer', 'size', 'minimum', 'maximum')
+    
+    @property
+    def minimum_size(self):
+        return self.size if self.size is not None else 0
+    
+    @property
+    def maximum_size(self):
+        return self.size if self.size is not None else float('inf')
+    
+    def _properties_for_prompt(self):
+        properties = super(NumberListInput, self)._properties_for_prompt()
+        for field in ['integer', 'size', 'minimum', 'maximum']:
+            value = getattr(self, field)
+            if value is not None:
+                properties.append('{}={}'.format(field, value))
+        return properties
+    
+    def _coerce(self, items):
+        """Coerce a list of numbers or number strings to an array, raising
+        ValueError naming the first bad item."""
+        try:
+            return array.array('d', map(float, items))
+        except (TypeError, ValueError, OverflowError):
+            for i, item in enumerate(items):
+                try:
+                    float(item)
+                except (TypeError, ValueError, OverflowError):
+                    raise ValueError('item {} must be a number'.format(i))
+            raise
+    
+    def _check(self, values, check_size=True):
+        """Check the items of an array against the constraints, in passes
+        over the whole array rather than item by item."""
+        errors = []
+        if not all(map(_isfinite, values)):
+            errors.append('items must be finite')
+        elif values:
+            if self.integer and not all(map(float.is_integer, values)):
+                errors.append('items must be integers')
+            if self.minimum is not None and min(values) < self.minimum:
+                errors.append('items must be at least {}'.format(self.minimum))
+            if self.maximum is not None and max(values) > self.maximum:
+                errors.append('items must be at most {}'.format(self.maximum))
+        if check_size and not self.minimum_size <= len(values) <= self.maximum_size:
+            errors.append('Must have {} items'.format(self.size))
+        return errors
+    
+    def _read_items(self, path):
+        values = self._coerce(_read_number_source(path))
+        if len(values) > self.maximum_size:
+            raise ValueError('{}: too many values! Maximum size: {}'.format(path, self.maximum_size))
+        return values
+    
+    def parse_lines(self, lines):
+        """Read lines of numbers (separated by whitespace or commas) or
+        @file references up to a blank line."""
+        values = array.array('d')
+        while len(values) < self.maximum_size:
+            line = self._next_line(lines)
+            if line is None:
+                break
+            path = _source_path(line)
+            try:
+                if path is None:
+                    values.extend(self._coerce(_split_numbers(line)))
+                else:
+                    values.extend(self._read_items(path))
+            except (IOError, OSError, ValueError) as e:
+                raise ValidationError(['{}: {}'.format(self.name, e)])
+        return values
+    
+    def _validate_value(self, value):
+        if isinstance(value, array.array):
+            values = array.array('d', value)
+        elif isinstance(value, (list, tuple)):
+            if any(isinstance(item, bool) for item in value):
+                raise ValueError('Must be a list of numbers')
+            values = self._coerce(value)
+        else:
+            raise ValueError('Must be a list')
+        errors = self._check(values)
+        if errors:
+            raise ValueError(', '.join(errors))
+        return values
+    
+    def _get_value(self, prompt):
+        values = array.array('d')
+        while True:
+            try:
+                line = self._input(prompt)
+            except EOFError:
+                print('')
+                line = ''
+            if not line:
+                if len(values) >= self.minimum_size:
+                    return values
+                print("Not enough values! Minimum size: {}".format(self.minimum_size))
+                continue
+            path = _source_path(line)
+            try:
+                items = self._read_items(path) if path is not None else self._coerce(_split_numbers(line))
+            except (IOError, OSError, ValueError) as e:
+                print('Invalid input! {}'.format(e))
+                continue
+            errors = self._check(items, check_size=False)
+            if errors:
+                print('Invalid input! {}'.format(', '.join(errors)))
+                continue
+            if len(values) + len(items) > self.maximum_size:
+                print("Too many values! Maximum size: {}".format(self.maximum_size))
+                continue
+            values.extend(items)
+            if len(values) == self.maximum_size:
+                return values
+
 class ConstInput(Input):
     @classmethod
     def type(cls):
@@ -404,15 +1081,23 @@ class ConstInput(Input):
         return cls(**kwargs)
     
     def __init__(self, name, value,
-                 help=None):
+                 help=None,
+                 condition=None):
         super(ConstInput, self).__init__(
             name,
-            help=help)
+            help=help,
+            condition=condition)
         self.value = value
     
     def to_json(self):
         return self._base_to_json('value')
     
+    def parse_lines(self, lines):
+        return None
+    
+    def validate(self, value):
+        return self.value
+    
     def _get_value(self, prompt):
         return self.value
 
@@ -432,15 +1117,30 @@ class BooleanInput(Input):
     
     def __init__(self, name,
                  required=None,
-                 help=None):
+                 help=None,
+                 condition=None):
         super(BooleanInput, self).__init__(
             name,
             required=required,
-            help=help)
+            help=help,
+            condition=condition)
     
     def to_json(self):
         return self._base_to_json()
     
+    TRUE_ANSWERS = ['y', 'yes', 'true']
+    FALSE_ANSWERS = ['n', 'no', 'false']
+    
+    def _validate_value(self, value):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, six.string_types):
+            if value.lower() in self.TRUE_ANSWERS:
+                return True
+            if value.lower() in self.FALSE_ANSWERS:
+                return False
+        raise ValueError('Must be y/n')
+    
     def _get_value(self, prompt):
         while True:
             value = getch.getch(prompt).lower()
@@ -449,11 +1149,53 @@ class BooleanInput(Input):
             else:
                 return value == 'y'
 
+class AnswerStream(object):
+    """Answers for forms, read in bulk from a non-interactive stream (e.g.,
+    when stdin is not a terminal). The stream contains either one JSON object
+    of values per form, or line-delimited answers in input order. Successive
+    forms (e.g., for reinvoke) read successive answers.
+    
+    If from_stdin is True, the stream is stdin, so answers can't refer to
+    it with @-."""
+    
+    def __init__(self, stream, from_stdin=False):
+        self._text = stream.read()
+        self.from_stdin = from_stdin
+        self._pos = 0
+        self._skip_whitespace()
+        self.is_json = self._text[self._pos:self._pos+1] == '{'
+        self._lines = iter(self._text[self._pos:].splitlines())
+        # the codec backends only decode whole documents, and reading
+        # successive objects from one stream needs raw_decode; answers are
+        # small, so the stdlib decoder is fast enough
+        self._decoder = json.JSONDecoder()
+    
+    def _skip_whitespace(self):
+        while self._pos < len(self._text) and self._text[self._pos].isspace():
+            self._pos += 1
+    
+    def get_values(self, schema):
+        if not self.is_json:
+            _stdin_state.answers = self.from_stdin
+            try:
+                return schema.values_from_lines(self._lines)
+            finally:
+                _stdin_state.answers = False
+        if self._pos >= len(self._text):
+            raise ValidationError(['No more answers in input'])
+        try:
+            obj, self._pos = self._decoder.raw_decode(self._text, self._pos)
+        except ValueError as e:
+            raise ValidationError(['Invalid JSON answers: {}'.format(e)])
+        self._skip_whitespace()
+        return schema.validate_values(obj)
+
 for input_cls in [
         StringInput,
         SecretInput,
         NumberInput,
         StringListInput,
+        NumberListInput,
         ConstInput,
         BooleanInput,
         ]:
@@ -0,0 +1,378 @@
+"""
+Created on Oct 19, 2026
+
+A local stand-in for the parts of the Lambda and Resource Groups Tagging
+APIs that faas-form uses, backed by handlers called in-process, for
+integration tests and benchmarks. Point clients at it with the
+FAAS_FORM_ENDPOINT_URL env var (and any credentials; requests aren't
+authenticated).
+
+    server = StandinServer()
+    server.add_function('example', example_lambda.handler, tags={'faasform': 'Example'})
+    server.start()
+    os.environ['FAAS_FORM_ENDPOINT_URL'] = server.url
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import urlparse, parse_qs, unquote
+
+import collections
+import re
+import threading
+
+from . import codec
+from .local import LocalClient, LOCAL_ACCOUNT
+
+LAMBDA_PREFIX = '/2015-03-31/functions'
+PROVISIONED_PATTERN = re.compile(r'^/2019-09-30/functions/([^/]+)/provisioned-concurrency$')
+TAGS_PREFIX = '/2017-03-31/tags/'
+TAGGING_TARGET_PREFIX = 'ResourceGroupsTaggingAPI_20170126.'
+
+DEFAULT_PAGE_SIZE = 50
+
+class ServiceError(Exception):
+    def __init__(self, status, code, message):
+        super(ServiceError, self).__init__(message)
+        self.status = status
+        self.code = code
+
+def _not_found(name):
+    return ServiceError(404, 'ResourceNotFoundException', 'Function not found: {}'.format(name))
+
+class StandinFunction(object):
+    """A function, with aliases (a dict of alias to version) and the
+    aliases or versions that have provisioned concurrency, which are
+    already initialized when first invoked. Each qualifier has its own
+    execution environment, so each cold-starts separately."""
+
+    def __init__(self, name, arn, handler, tags=None, env=None, aliases=None, provisioned=None):
+        self.name = name
+        self.arn = arn
+        self.handler = handler
+        self.tags = dict(tags or {})
+        self.env = dict(env or {})
+        self.aliases = dict(aliases or {})
+        self.provisioned = set(provisioned or ())
+        self.clients = {}
+        self.invocations = collections.Counter()
+        self.client = self.client_for(None)
+
+    def versions(self):
+        return set(self.aliases.values())
+
+    def client_for(self, qualifier):
+        qualifier = qualifier or '$LATEST'
+        if qualifier not in self.clients:
+            if qualifier != '$LATEST' and qualifier not in self.aliases and qualifier not in self.versions():
+                raise _not_found('{}:{}'.format(self.name, qualifier))
+            client = LocalClient(self.handler, self.name)
+            if qualifier in self.provisioned:
+                client._initialized = True
+            self.clients[qualifier] = client
+        return self.clients[qualifier]
+
+    def configuration(self, qualifier=None):
+        if qualifier:
+            self.client_for(qualifier) # check that it exists
+        config = {
+            'FunctionName': self.name,
+            'FunctionArn': self.arn,
+            'Runtime': 'python3.11',
+            'Handler': 'standin',
+            'Version': self.aliases.get(qualifier, qualifier) or '$LATEST',
+        }
+        if self.env:
+            config['Environment'] = {'Variables': dict(self.env)}
+        return config
+
+class StandinService(object):
+    """The state of the stand-in service, and its API operations, which
+    take and return the JSON shapes of the corresponding AWS APIs."""
+
+    def __init__(self, region='us-east-1', account=LOCAL_ACCOUNT):
+        self.region = region
+        self.account = account
+        self.functions = {}
+        self._lock = threading.Lock()
+
+    def add_function(self, name, handler, tags=None, env=None, aliases=None, provisioned=None):
+        arn = 'arn:aws:lambda:{}:{}:function:{}'.format(self.region, self.account, name)
+        with self._lock:
+            self.functions[name] = StandinFunction(name, arn, handler, tags=tags, env=env,
+                                                   aliases=aliases, provisioned=provisioned)
+        return arn
+
+    def get(self, name_or_arn):
+        name = name_or_arn
+        if name.startswith('arn:'):
+            parts = name.split(':')
+            if len(parts) < 7:
+                raise _not_found(name_or_arn)
+            name = parts[6]
+        else:
+            name = name.split(':', 1)[0]
+        func = self.functions.get(name)
+        if func is None:
+            raise _not_found(name_or_arn)
+        return func
+
+    def _page(self, items, token, page_size):
+        start = int(token) if token else 0
+        end = start + (page_size or DEFAULT_PAGE_SIZE)
+        next_token = str(end) if end < len(items) else None
+        return items[start:end], next_token
+
+    def invoke(self, name, payload, invocation_type='RequestResponse', log_type='None', qualifier=None):
+        func = self.get(name)
+        if not qualifier and name.count(':') in (1, 7):
+            qualifier = name.rsplit(':', 1)[1]
+        with self._lock:
+            client = func.client_for(qualifier)
+            if invocation_type != 'DryRun':
+                func.invocations[qualifier or '$LATEST'] += 1
+        response = client.invoke(InvocationType=invocation_type, LogType=log_type, Payload=payload)
+        if 'ExecutedVersion' in response and qualifier:
+            response['ExecutedVersion'] = func.aliases.get(qualifier, qualifier)
+        return response
+
+    def list_provisioned_concurrency_configs(self, name, marker=None, max_items=None):
+        func = self.get(name)
+        configs = [{
+            'FunctionArn': '{}:{}'.format(func.arn, qualifier),
+            'RequestedProvisionedConcurrentExecutions': 1,
+            'AvailableProvisionedConcurrentExecutions': 1,
+            'AllocatedProvisionedConcurrentExecutions': 1,
+            'Status': 'READY',
+        } for qualifier in sorted(func.provisioned)]
+        page, next_marker = self._page(configs, marker, max_items)
+        response = {'ProvisionedConcurrencyConfigs': page}
+        if next_marker:
+            response['NextMarker'] = next_marker
+        return response
+
+    def list_functions(self, marker=None, max_items=None):
+        funcs = [self.functions[name] for name in sorted(self.functions)]
+        page, next_marker = self._page(funcs, marker, max_items)
+        response = {'Functions': [func.configuration() for func in page]}
+        if next_marker:
+            response['NextMarker'] = next_marker
+        return response
+
+    def get_function(self, name):
+        func = self.get(name)
+        return {'Configuration': func.configuration(), 'Tags': dict(func.tags)}
+
+    def get_function_configuration(self, name, qualifier=None):
+        return self.get(name).configuration(qualifier=qualifier)
+
+    def update_function_configuration(self, name, request):
+        func = self.get(name)
+        if 'Environment' in request:
+            func.env = dict(request['Environment'].get('Variables') or {})
+        return func.configuration()
+
+    def list_tags(self, arn):
+        return {'Tags': dict(self.get(arn).tags)}
+
+    def get_resources(self, request):
+        tag_filters = request.get('TagFilters') or []
+        resource_types = request.get('ResourceTypeFilters')
+        if resource_types and not any(t in ('lambda', 'lambda:function') for t in resource_types):
+            return {'ResourceTagMappingList': [], 'PaginationToken': ''}
+
+        def matches(func):
+            for tag_filter in tag_filters:
+                key = tag_filter['Key']
+                if key not in func.tags:
+                    return False
+                values = tag_filter.get('Values')
+                if values and func.tags[key] not in values:
+                    return False
+            return True
+
+        funcs = [self.functions[name] for name in sorted(self.functions) if matches(self.functions[name])]
+        page, next_token = self._page(funcs, request.get('PaginationToken'), request.get('ResourcesPerPage'))
+        return {
+            'ResourceTagMappingList': [
+                {
+                    'ResourceARN': func.arn,
+                    'Tags': [{'Key': key, 'Value': value} for key, value in sorted(six.iteritems(func.tags))],
+                } for func in page
+            ],
+            'PaginationToken': next_token or '',
+        }
+
+    def tag_resources(self, request):
+        with self._lock:
+            for arn in request['ResourceARNList']:
+                self.get(arn).tags.update(request['Tags'])
+        return {'FailedResourcesMap': {}}
+
+    def untag_resources(self, request):
+        with self._lock:
+            for arn in request['ResourceARNList']:
+                tags = self.get(arn).tags
+                for key in request['TagKeys']:
+                    tags.pop(key, None)
+        return {'FailedResourcesMap': {}}
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    FUNCTION_PATTERN = re.compile(r'^{}/([^/]+)(/invocations|/configuration)?/?$'.format(LAMBDA_PREFIX))
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status, body=b'', headers=None, content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = codec.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in six.iteritems(headers or {}):
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, error, json_protocol=False):
+        body = {'message': str(error)}
+        if json_protocol:
+            body['__type'] = error.code
+        self._send(error.status, body, headers={'x-amzn-ErrorType': error.code},
+                   content_type='application/x-amz-json-1.1' if json_protocol else 'application/json')
+
+    def _dispatch(self, method):
+        body = self._body()
+        target = self.headers.get('X-Amz-Target') or ''
+        if target.startswith(TAGGING_TARGET_PREFIX):
+            return self._tagging(target[len(TAGGING_TARGET_PREFIX):], body)
+        try:
+            self._lambda(method, body)
+        except ServiceError as e:
+            self._send_error(e)
+
+    def _tagging(self, operation, body):
+        operations = {
+            'GetResources': self.service.get_resources,
+            'TagResources': self.service.tag_resources,
+            'UntagResources': self.service.untag_resources,
+        }
+        try:
+            if operation not in operations:
+                raise ServiceError(400, 'InvalidParameterException', 'Unsupported operation: {}'.format(operation))
+            response = operations[operation](codec.loads(body or b'{}'))
+        except ServiceError as e:
+            return self._send_error(e, json_protocol=True)
+        self._send(200, response, content_type='application/x-amz-json-1.1')
+
+    def _lambda(self, method, body):
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        query = parse_qs(url.query)
+
+        if path.startswith(TAGS_PREFIX) and method == 'GET':
+            return self._send(200, self.service.list_tags(unquote(path[len(TAGS_PREFIX):])))
+
+        if path == LAMBDA_PREFIX and method == 'GET':
+            return self._send(200, self.service.list_functions(
+                marker=query.get('Marker', [None])[0],
+                max_items=int(query.get('MaxItems', [0])[0]) or None))
+
+        match = PROVISIONED_PATTERN.match(path)
+        if match and method == 'GET':
+            return self._send(200, self.service.list_provisioned_concurrency_configs(
+                unquote(match.group(1)),
+                marker=query.get('Marker', [None])[0],
+                max_items=int(query.get('MaxItems', [0])[0]) or None))
+
+        match = self.FUNCTION_PATTERN.match(path)
+        if not match:
+            raise ServiceError(404, 'UnknownOperationException', 'Unsupported request: {} {}'.format(method, self.path))
+        name, operation = unquote(match.group(1)), match.group(2)
+
+        if operation == '/invocations' and method == 'POST':
+            return self._invoke(name, body, qualifier=query.get('Qualifier', [None])[0])
+        if operation == '/configuration' and method == 'GET':
+            return self._send(200, self.service.get_function_configuration(
+                name, qualifier=query.get('Qualifier', [None])[0]))
+        if operation == '/configuration' and method == 'PUT':
+            return self._send(200, self.service.update_function_configuration(name, codec.loads(body or b'{}')))
+        if operation is None and method == 'GET':
+            return self._send(200, self.service.get_function(name))
+        raise ServiceError(404, 'UnknownOperationException', 'Unsupported request: {} {}'.format(method, self.path))
+
+    def _invoke(self, name, body, qualifier=None):
+        response = self.service.invoke(
+            name, body,
+            invocation_type=self.headers.get('X-Amz-Invocation-Type') or 'RequestResponse',
+            log_type=self.headers.get('X-Amz-Log-Type') or 'None',
+            qualifier=qualifier)
+        headers = {}
+        if 'ExecutedVersion' in response:
+            headers['X-Amz-Executed-Version'] = response['ExecutedVersion']
+        if response.get('FunctionError'):
+            headers['X-Amz-Function-Error'] = response['FunctionError']
+        if response.get('LogResult'):
+            headers['X-Amz-Log-Result'] = response['LogResult']
+        payload = response['Payload'].read() if 'Payload' in response else b''
+        self._send(response['StatusCode'], payload, headers=headers)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+class StandinServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """An HTTP server for a StandinService, on localhost. Use port 0 (the
+    default) to pick a free port."""
+
+    daemon_threads = True
+
+    def __init__(self, service=None, port=0):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', port), _RequestHandler)
+        self.service = service or StandinService()
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}'.format(*self.server_address[:2])
+
+    def add_function(self, name, handler, tags=None, env=None, aliases=None, provisioned=None):
+        return self.service.add_function(name, handler, tags=tags, env=env, aliases=aliases, provisioned=provisioned)
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
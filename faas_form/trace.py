@@ -0,0 +1,140 @@
+"""
+Created on Oct 19, 2026
+
+Lightweight tracing spans, exported as a Chrome trace JSON file (viewable
+in chrome://tracing or https://ui.perfetto.dev). Tracing is off unless
+enabled, and spans then cost a single check.
+
+    with trace.span('name', key=value):
+        ...
+
+    @trace.traced('name')
+    def f(...):
+        ...
+"""
+
+from __future__ import absolute_import, print_function
+
+import functools
+import itertools
+import os
+import threading
+import time
+
+from . import codec
+
+# spans in this category are time spent waiting on the user
+USER_CATEGORY = 'user'
+DEFAULT_CATEGORY = 'faas-form'
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span(object):
+    __slots__ = ['tracer', 'name', 'category', 'args', 'start']
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        end = time.time()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.add(self.name, self.category, self.start, end, self.args)
+        return False
+
+class Tracer(object):
+    def __init__(self):
+        self.events = []
+        self.pid = os.getpid()
+
+    def span(self, name, category=DEFAULT_CATEGORY, **args):
+        return _Span(self, name, category, args)
+
+    def add(self, name, category, start, end, args=None):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': int(start * 1e6),
+            'dur': int((end - start) * 1e6),
+            'pid': self.pid,
+            'tid': threading.current_thread().ident,
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def to_json(self):
+        return {
+            'traceEvents': sorted(self.events, key=lambda e: e['ts']),
+            'displayTimeUnit': 'ms',
+        }
+
+    def write(self, fp):
+        codec.dump(self.to_json(), fp)
+
+_tracer = None
+
+def enable():
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def is_enabled():
+    return _tracer is not None
+
+def span(name, category=DEFAULT_CATEGORY, **args):
+    """A context manager timing the enclosed block, if tracing is enabled."""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, category, **args)
+
+def user_span(name, **args):
+    """A span for time spent waiting on the user, which can be excluded
+    when looking at where time goes."""
+    return span(name, USER_CATEGORY, **args)
+
+def traced(name):
+    """Decorate a function to run it in a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def iterate(name, iterable, **args):
+    """Iterate, with a span for producing each item (e.g., each page of a paginator)."""
+    iterator = iter(iterable)
+    for index in itertools.count():
+        start = time.time()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        if _tracer is not None:
+            _tracer.add(name, DEFAULT_CATEGORY, start, time.time(), dict(args, index=index))
+        yield item
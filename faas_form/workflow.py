@@ -0,0 +1,147 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+
+import time
+
+from . import payloads
+from .schema import Schema, SecretInput, ValidationError
+
+REDACTED = '********'
+
+class WorkflowError(Exception):
+    pass
+
+class Answers(object):
+    """Answers for each step of a multi-step workflow.
+
+    Loaded from either a list of value objects, used for the steps in order,
+    or an object with "steps", mapping schema hashes to the values for the
+    step with that schema, and/or "values", mapping input names to values
+    for any step that has an input with that name."""
+
+    @classmethod
+    def from_json(cls, obj):
+        if isinstance(obj, list):
+            return cls(ordered=obj)
+        if not isinstance(obj, dict) or not set(obj) <= set(['steps', 'values']):
+            raise WorkflowError('Answers must be a list, or an object with "steps" and/or "values"')
+        return cls(by_hash=obj.get('steps'), by_name=obj.get('values'))
+
+    def __init__(self, ordered=None, by_hash=None, by_name=None):
+        self.ordered = ordered
+        self.by_hash = by_hash or {}
+        self.by_name = by_name or {}
+
+    def get_values(self, step, schema):
+        """Get the validated values for the given step (zero-based) and schema."""
+        if self.ordered is not None:
+            if step >= len(self.ordered):
+                raise WorkflowError('No answers for step {}'.format(step + 1))
+            raw_values = self.ordered[step]
+        else:
+            schema_hash = payloads.schema_hash(schema)
+            if schema_hash in self.by_hash:
+                raw_values = self.by_hash[schema_hash]
+            else:
+                names = set(input_obj.name for input_obj in schema.inputs)
+                raw_values = dict((k, v) for k, v in six.iteritems(self.by_name) if k in names)
+        try:
+            return schema.validate_values(raw_values)
+        except ValidationError as e:
+            raise WorkflowError('Invalid answers for step {}: {}'.format(step + 1, e))
+
+def _redact(schema, values):
+    secret_names = set(i.name for i in schema.inputs if isinstance(i, SecretInput))
+    return dict((k, REDACTED if k in secret_names and v is not None else v) for k, v in six.iteritems(values))
+
+class WorkflowRunner(object):
+    """Drives the reinvoke loop for a function non-interactively, recording
+    each step (schema, values, response, and latency) in self.steps."""
+
+    def __init__(self, function, answers, max_steps=100):
+        self.function = function
+        self.answers = answers
+        self.max_steps = max_steps
+        self.steps = []
+
+    def _invoke(self, values, state=None):
+        start = time.time()
+        response = self.function.invoke(values, state=state)
+        payload = self.function.read_payload(response)
+        latency = time.time() - start
+        return response, payload, latency
+
+    def run(self, schema=None):
+        """Run the workflow, returning the final response payload."""
+        if schema is None:
+            schema = self.function.get_schema()
+
+        state = None
+        for step in range(self.max_steps):
+            values = self.answers.get_values(step, schema)
+
+            response, payload, latency = self._invoke(values, state=state)
+            self.steps.append({
+                'step': step + 1,
+                'schema_hash': payloads.schema_hash(schema),
+                'schema': schema.to_json(),
+                'values': _redact(schema, values),
+                'response': payload,
+                'function_error': response.get('FunctionError'),
+                'latency': latency,
+            })
+
+            if response.get('FunctionError'):
+                raise WorkflowError('Function error in step {}: {}'.format(step + 1, payload))
+
+            if not payloads.is_reinvoke_response(payload):
+                return payload
+
+            schema = Schema.from_json(payloads.get_schema(payload))
+            state = payloads.get_state_token(payload)
+
+        raise WorkflowError('Workflow did not finish in {} steps'.format(self.max_steps))
+
+    def record(self):
+        return {
+            'function': self.function.qualified_id,
+            'steps': self.steps,
+        }
+
+def _compare_step(recorded, payload):
+    mismatches = []
+    if not isinstance(payload, dict) or not isinstance(recorded, dict):
+        if payload != recorded:
+            mismatches.append('response')
+        return mismatches
+    if payloads.is_reinvoke_response(payload) != payloads.is_reinvoke_response(recorded):
+        mismatches.append('reinvoke')
+    elif payloads.is_reinvoke_response(payload):
+        if payloads.schema_hash(payloads.get_schema(payload)) != payloads.schema_hash(payloads.get_schema(recorded)):
+            mismatches.append('schema')
+    if payloads.get_result(payload) != payloads.get_result(recorded):
+        mismatches.append('result')
+    if payloads._strip_payload(payload) != payloads._strip_payload(recorded):
+        mismatches.append('response')
+    return mismatches
+
+def replay(record, function):
+    """Replay a recorded session against a function (typically a local
+    handler), checking that each step produces the recorded schema and
+    response. Secret values were redacted when recorded, so are sent as
+    the placeholder. Returns a list of (step, latency, mismatches)."""
+    results = []
+    state = None
+    for step in record['steps']:
+        start = time.time()
+        response = function.invoke(step['values'], state=state)
+        payload = function.read_payload(response)
+        latency = time.time() - start
+        results.append((step['step'], latency, _compare_step(step['response'], payload)))
+        state = payloads.get_state_token(payload)
+    return results
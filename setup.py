@@ -34,6 +34,9 @@ setup(
         ],
     },
     install_requires=requires,
+    extras_require={
+        'fast-json': ['orjson'],
+    },
     classifiers=(
         'Development Status :: 2 - Beta',
         'Intended Audience :: Developers',
@@ -0,0 +1,185 @@
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from faas_form import agent
+from faas_form import faas
+from faas_form import hedge
+from faas_form import payloads
+from faas_form.standin import StandinServer
+
+from tests.test_faas import SCHEMA, handler
+
+class ConcurrencyHandler(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, event, context):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.2)
+        with self.lock:
+            self.running -= 1
+        return {}
+
+class AgentTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.standin = StandinServer()
+        self.standin.start()
+        self.standin.add_function('tagged', handler, tags={faas.FaaSFunction.MARKER: 'Tagged'})
+        self.standin.add_function('tagged-too', handler, tags={faas.FaaSFunction.MARKER: ''})
+
+        self.environ = {
+            faas.ENDPOINT_URL_ENV_VAR: self.standin.url,
+            'FAAS_FORM_CACHE_DIR': self.cache_dir,
+            'AWS_ACCESS_KEY_ID': 'standin',
+            'AWS_SECRET_ACCESS_KEY': 'standin',
+            'AWS_DEFAULT_REGION': 'us-east-1',
+        }
+        self.old_environ = dict((key, os.environ.get(key)) for key in self.environ)
+        os.environ.update(self.environ)
+
+        self.server = agent.AgentServer(path=os.path.join(self.cache_dir, 'agent.sock'), idle_timeout=None)
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.daemon = True
+        self.thread.start()
+        self.client = agent.AgentClient.connect(self.server.path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.standin.stop()
+        for key, value in self.old_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.cache_dir)
+
+    def test_socket_permissions(self):
+        self.assertEqual(os.stat(self.server.path).st_mode & 0o077, 0)
+        with self.assertRaises(agent.AgentError):
+            agent.AgentServer(path=self.server.path)
+
+    def test_list_and_resolve(self):
+        funcs = self.client.list()
+        self.assertEqual(sorted(funcs), ['tagged', 'tagged-too'])
+        self.assertEqual(funcs['tagged'].description, 'Tagged')
+
+        func = self.client.get_function('tagged-t')
+        self.assertEqual(func.name, 'tagged-too')
+        self.assertEqual(func.id, funcs['tagged-too'].id)
+
+    def test_invoke(self):
+        self.client.list()
+        func = self.client.get_function('tagged')
+        schema = func.get_schema()
+        self.assertEqual(schema.to_json(), SCHEMA.to_json())
+
+        response = func.invoke(schema.validate_values({'name': 'a', 'count': 2}))
+        self.assertEqual(payloads.get_result(func.read_payload(response)), 'a x 2')
+        self.assertIn(payloads.GZIP_ENCODING, func.capabilities)
+
+    def test_qualifier(self):
+        self.standin.add_function('aliased', handler, tags={faas.FaaSFunction.MARKER: ''},
+                                  aliases={'live': '1'}, provisioned=['live'])
+        funcs = self.client.list(provisioned=True)
+        self.assertEqual(funcs['aliased'].provisioned, ['live'])
+        self.assertEqual(self.client.resolve('alias').provisioned, ['live'])
+
+        func = self.client.get_function('aliased', qualifier='live')
+        response = func.invoke(func.get_schema().validate_values({'name': 'a', 'count': 2}))
+        self.assertEqual(response['ExecutedVersion'], '1')
+        self.assertEqual(func.get_version(), '1:')
+        self.assertEqual(payloads.get_result(func.read_payload(response)), 'a x 2')
+        self.assertEqual(self.standin.service.get('aliased').invocations['live'], 2)
+
+    def test_concurrent_calls(self):
+        slow = ConcurrencyHandler()
+        self.standin.add_function('slow', slow, tags={faas.FaaSFunction.MARKER: ''})
+        func = self.client.get_function('slow')
+        threads = [threading.Thread(target=func.invoke, args=({},)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(slow.max_running, 5)
+
+    def test_environment_credentials(self):
+        profile, region, credentials = agent._session_key()
+        self.assertEqual(credentials, ['standin', 'standin', None])
+        session = self.server.agent.session((profile, region, tuple(credentials)))
+        self.assertEqual(session.get_credentials().access_key, 'standin')
+
+        os.environ['AWS_ACCESS_KEY_ID'] = 'other'
+        try:
+            self.assertEqual(agent._session_key()[2][0], 'other')
+            self.client.list()
+            self.assertIn((profile, region, ('other', 'standin', None)), self.server.agent._sessions)
+        finally:
+            os.environ['AWS_ACCESS_KEY_ID'] = 'standin'
+
+    def test_hedged_schema(self):
+        func = self.client.get_function('tagged')
+        hedge_stats = hedge.HedgeStats.load()
+        schema = func.get_schema(hedge_after=5, hedge_stats=hedge_stats, use_static=False)
+        self.assertEqual(schema.to_json(), SCHEMA.to_json())
+        self.assertEqual(self.server.agent.hedge_stats.requests, 1)
+        self.assertEqual(hedge.HedgeStats.load().requests, 1)
+
+    def test_warm_schema(self):
+        func = self.client.get_function('tagged')
+        invocations = self.standin.service.get('tagged').invocations
+        for _ in range(3):
+            self.assertEqual(func.get_schema().to_json(), SCHEMA.to_json())
+        self.assertEqual(invocations['$LATEST'], 1)
+
+        parsed = self.server.agent.schema_cache._parsed[func.qualified_id][1]
+        self.server.agent.schema_max_age = 0
+        self.assertEqual(func.get_schema().to_json(), SCHEMA.to_json())
+        self.assertEqual(invocations['$LATEST'], 2) # revalidated, not modified
+        self.assertIs(self.server.agent.schema_cache._parsed[func.qualified_id][1], parsed)
+
+        self.server.agent.schema_max_age = 60
+        func.get_schema(use_static=False)
+        self.assertEqual(invocations['$LATEST'], 3)
+
+    def test_locked(self):
+        lock = threading.Lock()
+        class Cache(object):
+            size = 3
+            def put(self, key):
+                return lock.locked()
+            def __contains__(self, key):
+                return lock.locked()
+        locked = agent._Locked(Cache(), lock)
+        self.assertTrue(locked.put('key'))
+        self.assertTrue('key' in locked)
+        self.assertEqual(locked.size, 3)
+        self.assertFalse(lock.locked())
+
+    def test_errors(self):
+        func = self.client.get_function('missing')
+        with self.assertRaises(agent.AgentError):
+            func.invoke({})
+
+    def test_idle_timeout(self):
+        path = os.path.join(self.cache_dir, 'idle.sock')
+        server = agent.AgentServer(path=path, idle_timeout=0.2)
+        thread = threading.Thread(target=server.serve)
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(agent.AgentClient.connect(path))
@@ -0,0 +1,143 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from unittest import mock
+
+from faas_form import blobs
+from faas_form import codec
+from faas_form import payloads
+from faas_form.local import LocalFunction
+
+class FileBlobStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.store = blobs.get_store('file://' + os.path.join(self.dir, 'blobs'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_get_store(self):
+        self.assertIsInstance(self.store, blobs.FileBlobStore)
+        self.assertIsInstance(blobs.get_store('s3://bucket/prefix'), blobs.S3BlobStore)
+        with self.assertRaises(ValueError):
+            blobs.get_store('ftp://host/path')
+
+    def test_round_trip(self):
+        obj = {'foo': ['bar'] * 10}
+        url = self.store.upload(io.BytesIO(json.dumps(obj).encode('utf-8')))
+        self.assertTrue(url.startswith(self.store.url))
+        self.assertEqual(blobs.get_store(url).get_json(url), obj)
+
+    def test_offload(self):
+        request = {}
+        payloads.set_invoke_request(request)
+        payloads.set_capabilities(request)
+        payloads.set_blob_store(request, self.store)
+        request['data'] = 'x'
+
+        old_max_size = payloads.MAX_PAYLOAD_SIZE
+        payloads.MAX_PAYLOAD_SIZE = 10
+        try:
+            encoded = payloads.encode_payload(request, payloads.CAPABILITIES, blob_store=self.store)
+            self.assertTrue(payloads.is_invoke_request(encoded))
+            self.assertIn(payloads.BLOB_KEY, encoded)
+            self.assertNotIn('data', encoded)
+
+            with self.assertRaises(payloads.BlobNotAllowedError):
+                payloads.decode_request(encoded)
+            decoded = payloads.decode_request(encoded, blob_stores=[self.store])
+            self.assertEqual(decoded, request)
+
+            response = {'result': 'y'}
+            with self.assertRaises(payloads.BlobNotAllowedError):
+                payloads.encode_response(response, decoded)
+            encoded_response = payloads.encode_response(response, decoded, blob_stores=[self.store.url])
+            self.assertIn(payloads.BLOB_KEY, encoded_response)
+            self.assertEqual(payloads.decode_payload(encoded_response)['result'], 'y')
+
+            self.assertEqual(payloads.encode_payload(request, [], blob_store=self.store), request)
+        finally:
+            payloads.MAX_PAYLOAD_SIZE = old_max_size
+
+    def test_offload_size_in_bytes(self):
+        request = {'data': u'\u00e9\u4e2d' * 10}
+        size = len(codec.dumps(request).encode('utf-8'))
+
+        old_max_size = payloads.MAX_PAYLOAD_SIZE
+        try:
+            payloads.MAX_PAYLOAD_SIZE = size
+            self.assertEqual(payloads.encode_payload(request, [payloads.BLOB_CAPABILITY], blob_store=self.store), request)
+            payloads.MAX_PAYLOAD_SIZE = size - 1
+            encoded = payloads.encode_payload(request, [payloads.BLOB_CAPABILITY], blob_store=self.store)
+            self.assertIn(payloads.BLOB_KEY, encoded)
+            self.assertEqual(payloads.decode_payload(encoded, blob_stores=[self.store]), request)
+        finally:
+            payloads.MAX_PAYLOAD_SIZE = old_max_size
+
+    def test_allowed_stores(self):
+        self.assertTrue(blobs.in_store(self.store.url + '/x.json', self.store.url))
+        self.assertFalse(blobs.in_store(self.store.url + '/../x.json', self.store.url))
+        self.assertFalse(blobs.in_store(self.store.url + '-other/x.json', self.store.url))
+        self.assertFalse(blobs.in_store('file:///etc/passwd', self.store.url))
+        self.assertTrue(blobs.in_store('s3://bucket/prefix/x.json', 's3://bucket/prefix'))
+        self.assertFalse(blobs.in_store('s3://other/prefix/x.json', 's3://bucket/prefix/'))
+
+        request = {payloads.BLOB_KEY: 'file:///etc/passwd'}
+        with self.assertRaises(payloads.BlobNotAllowedError):
+            payloads.decode_request(request, blob_stores=[self.store])
+
+        request = {payloads.BLOB_STORE_KEY: 's3://attacker-bucket/'}
+        with self.assertRaises(payloads.BlobNotAllowedError):
+            payloads.get_blob_store(request, blob_stores=[self.store])
+        # not needed for small responses
+        self.assertEqual(payloads.encode_response({'result': 'y'}, request)['result'], 'y')
+
+        old_env = os.environ.get(payloads.BLOB_STORES_ENV_VAR)
+        os.environ[payloads.BLOB_STORES_ENV_VAR] = 's3://bucket/prefix/, ' + self.store.url
+        try:
+            self.assertEqual(payloads.allowed_blob_stores(), ['s3://bucket/prefix/', self.store.url])
+        finally:
+            if old_env is None:
+                del os.environ[payloads.BLOB_STORES_ENV_VAR]
+            else:
+                os.environ[payloads.BLOB_STORES_ENV_VAR] = old_env
+
+    def test_cleanup(self):
+        def handler(event, context):
+            event = payloads.decode_request(event, blob_stores=[self.store])
+            response = {'echo': event['data']}
+            payloads.set_result(response, 'done')
+            return payloads.encode_response(response, event, blob_stores=[self.store])
+
+        func = LocalFunction('test', handler=handler)
+        func.blob_store = self.store
+        func.capabilities = [payloads.BLOB_CAPABILITY]
+
+        old_max_size = payloads.MAX_PAYLOAD_SIZE
+        payloads.MAX_PAYLOAD_SIZE = 100
+        try:
+            uploaded = []
+            upload = blobs.FileBlobStore.upload
+            def record_upload(store, fileobj):
+                uploaded.append(upload(store, fileobj))
+                return uploaded[-1]
+
+            with mock.patch.object(blobs.FileBlobStore, 'upload', record_upload):
+                payload = func.read_payload(func.invoke({'data': 'x' * 500}))
+        finally:
+            payloads.MAX_PAYLOAD_SIZE = old_max_size
+        self.assertEqual(payload['echo'], 'x' * 500)
+        self.assertEqual(len(uploaded), 2) # the request and the response
+        self.assertEqual(os.listdir(self.store.path), [])
+
+        self.store.delete(uploaded[0]) # already gone
@@ -0,0 +1,79 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from faas_form import cache
+from faas_form import schema
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, cache.ResultCache.FILE_NAME)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_key(self):
+        key = cache.ResultCache.key('arn', '$LATEST', {'a': 1, 'b': [1, 2]})
+        self.assertEqual(key, cache.ResultCache.key('arn', '$LATEST', {'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(key, cache.ResultCache.key('arn', '1', {'a': 1, 'b': [1, 2]}))
+        self.assertNotEqual(key, cache.ResultCache.key('arn', '$LATEST', {'a': 2, 'b': [1, 2]}))
+
+    def test_get_put(self):
+        result_cache = cache.ResultCache.load(self.path)
+        self.assertIsNone(result_cache.get('k', now=100))
+        result_cache.put('k', {'x-faas-form-result': 'foo'}, 10, now=100)
+        result_cache.save()
+
+        result_cache = cache.ResultCache.load(self.path)
+        self.assertEqual(result_cache.get('k', now=105), {'x-faas-form-result': 'foo'})
+        self.assertIsNone(result_cache.get('k', now=111))
+        self.assertEqual(result_cache.hits, 1)
+        self.assertEqual(result_cache.misses, 2)
+
+    def test_bounded(self):
+        result_cache = cache.ResultCache(self.path)
+        for i in range(cache.ResultCache.MAX_ENTRIES + 10):
+            result_cache.put(str(i), i, 1000, now=100 + i)
+        self.assertEqual(len(result_cache.entries), cache.ResultCache.MAX_ENTRIES)
+        self.assertNotIn('0', result_cache.entries)
+        self.assertIn(str(cache.ResultCache.MAX_ENTRIES + 9), result_cache.entries)
+
+class FragmentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, cache.FragmentCache.FILE_NAME)
+        self.fragment = schema.Fragment([schema.StringInput('environment')])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_put_note_held(self):
+        fragment_cache = cache.FragmentCache.load(self.path)
+        fragment_cache.put(self.fragment.id, [{'name': 'other', 'type': 'string'}])
+        self.assertNotIn(self.fragment.id, fragment_cache)
+
+        fragment_cache.put(self.fragment.id, self.fragment.to_json())
+        fragment_cache.note('arn', schema.Schema([self.fragment, schema.StringInput('name')]))
+        fragment_cache.save()
+
+        fragment_cache = cache.FragmentCache.load(self.path)
+        self.assertEqual(fragment_cache.get(self.fragment.id), self.fragment.to_json())
+        self.assertEqual(fragment_cache.held('arn'), [self.fragment.id])
+        self.assertEqual(fragment_cache.held('other-arn'), [])
+
+    def test_bounded(self):
+        fragment_cache = cache.FragmentCache.load(self.path)
+        fragments = [schema.Fragment([schema.StringInput('input_{}'.format(i))])
+                     for i in range(cache.FragmentCache.MAX_ENTRIES + 1)]
+        for i, fragment in enumerate(fragments):
+            fragment_cache.put(fragment.id, fragment.to_json(), now=i + 1)
+        self.assertEqual(len(fragment_cache.entries), cache.FragmentCache.MAX_ENTRIES)
+        self.assertNotIn(fragments[0].id, fragment_cache)
@@ -0,0 +1,113 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from unittest import mock
+
+from faas_form import cli
+from faas_form.cache import ResultCache
+from faas_form.local import LocalFunction
+from faas_form.schema import AnswerStream
+
+@contextlib.contextmanager
+def _captured_stdout():
+    stdout = sys.stdout
+    sys.stdout = captured = six.StringIO()
+    try:
+        yield captured
+    finally:
+        sys.stdout = stdout
+
+class InvokeTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.old_cache_dir = os.environ.get('FAAS_FORM_CACHE_DIR')
+        os.environ['FAAS_FORM_CACHE_DIR'] = self.cache_dir
+
+    def tearDown(self):
+        if self.old_cache_dir is None:
+            del os.environ['FAAS_FORM_CACHE_DIR']
+        else:
+            os.environ['FAAS_FORM_CACHE_DIR'] = self.old_cache_dir
+        shutil.rmtree(self.cache_dir)
+
+    def test_prepare_each_round(self):
+        answers = AnswerStream(six.StringIO('{"name": "Alice"} {"count": 3}'))
+        prepared = []
+        invoked = []
+        local_invoke = LocalFunction.invoke
+        
+        def prepare(func):
+            time.sleep(0.05)
+            prepared.append(func)
+        
+        def invoke(func, *args, **kwargs):
+            # the round's prepare has finished before its invoke
+            invoked.append(len(prepared))
+            return local_invoke(func, *args, **kwargs)
+        
+        with mock.patch.object(LocalFunction, 'prepare', prepare), \
+                mock.patch.object(LocalFunction, 'invoke', invoke), \
+                _captured_stdout() as stdout:
+            cli.invoke(None, answers=answers, local='tests.test_workflow:handler')
+        self.assertEqual(invoked, [1, 2])
+        self.assertIn('count=3', stdout.getvalue())
+
+    def test_stats_result_cache(self):
+        result_cache = ResultCache.load()
+        result_cache.put('key', {'result': 1}, 60)
+        result_cache.get('key')
+        result_cache.get('other')
+        result_cache.save()
+        with mock.patch('sys.stderr', new_callable=six.StringIO) as stderr:
+            cli.stats()
+        self.assertIn('Result cache: 1 hits, 1 misses, 1 entries', stderr.getvalue())
+
+class PingCounter(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+class FakeFunction(object):
+    def __init__(self, name, counter, error=None):
+        self.qualified_id = name
+        self.client = None
+        self.counter = counter
+        self.error = error
+
+    def ping(self):
+        with self.counter.lock:
+            self.counter.running += 1
+            self.counter.max_running = max(self.counter.max_running, self.counter.running)
+        time.sleep(0.02)
+        with self.counter.lock:
+            self.counter.running -= 1
+        if self.error:
+            raise self.error
+        return None
+
+class WarmTest(unittest.TestCase):
+    def test_bounded(self):
+        counter = PingCounter()
+        funcs = [FakeFunction('f{}'.format(i), counter) for i in range(5)]
+        funcs.append(FakeFunction('broken', counter, error=ValueError('no such function')))
+        results = cli._warm_round(funcs, 3, max_workers=4)
+        self.assertEqual(counter.max_running, 4)
+        self.assertEqual(sorted(len(r) for r in results.values()), [3] * 6)
+        self.assertEqual(cli._format_warm_results(results['f0']), '0 cold, 3 warm')
+        self.assertEqual(cli._format_warm_results(results['broken']),
+                         '0 cold, 0 warm, 3 failed: no such function')
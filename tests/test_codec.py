@@ -0,0 +1,100 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import array
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from faas_form import codec
+
+VALUES = [
+    {},
+    [],
+    {'name': 'x', 'count': 3, 'ratio': 0.25, 'enabled': True, 'missing': None},
+    {'nested': {'list': [1, 'two', [3.5], {'four': False}]}},
+    {'text': u'café 中文 \U0001f600', 'path': 'a/b', 'quote': '"\\\n'},
+    [-1, 0, 2 ** 53, -2.5e-300, 1e300],
+]
+
+class CodecTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = codec.get_backend()
+
+    def tearDown(self):
+        codec.set_backend(self.backend)
+
+    def backends(self):
+        for name in codec.available_backends():
+            codec.set_backend(name)
+            self.assertEqual(codec.get_backend(), name)
+            yield name
+
+    def test_available(self):
+        self.assertEqual(codec.available_backends()[-1], 'stdlib')
+        codec.set_backend('stdlib')
+        self.assertEqual(codec.get_backend(), 'stdlib')
+        codec.set_backend()
+        self.assertEqual(codec.get_backend(), codec.available_backends()[0])
+
+    def test_env_var(self):
+        for name in codec.available_backends():
+            env = dict(os.environ)
+            env[codec.BACKEND_ENV_VAR] = name
+            output = subprocess.check_output(
+                [sys.executable, '-c', 'from faas_form import codec; print(codec.get_backend())'], env=env)
+            self.assertEqual(output.decode('ascii').strip(), name)
+
+    def test_round_trip(self):
+        for name in self.backends():
+            for value in VALUES:
+                for indent in [None, 2]:
+                    data = codec.dumps(value, indent=indent)
+                    self.assertIsInstance(data, type(u''), name)
+                    self.assertEqual(json.loads(data), value, name)
+                    self.assertEqual(codec.loads(data), value, name)
+                    self.assertEqual(codec.loads(data.encode('utf-8')), value, name)
+                self.assertEqual(codec.loads(codec.dumpb(value)), value, name)
+                fp = io.StringIO()
+                codec.dump(value, fp)
+                fp.seek(0)
+                self.assertEqual(codec.load(fp), value, name)
+
+    def test_indent(self):
+        for name in self.backends():
+            self.assertNotIn('\n', codec.dumps({'a': [1]}))
+            self.assertEqual(codec.dumps({'a': [1]}, indent=2).splitlines()[1], '  "a": [', name)
+
+    def test_arrays(self):
+        for name in self.backends():
+            value = {'series': array.array('d', [0.5, -1, 2]), 'ints': array.array('i', [1, 2])}
+            self.assertEqual(json.loads(codec.dumps(value)), {'series': [0.5, -1.0, 2.0], 'ints': [1, 2]}, name)
+            self.assertEqual(codec.loads(codec.dumpb(value)), {'series': [0.5, -1.0, 2.0], 'ints': [1, 2]}, name)
+            self.assertEqual(json.loads(codec.dumps([array.array('d')], indent=2)), [[]], name)
+
+    def test_nonfinite(self):
+        for name in self.backends():
+            value = {
+                'nan': float('nan'),
+                'list': [float('inf'), 1.5, -float('inf')],
+                'array': array.array('d', [float('nan'), 2]),
+            }
+            self.assertEqual(json.loads(codec.dumps(value)), {
+                'nan': None,
+                'list': [None, 1.5, None],
+                'array': [None, 2.0],
+            }, name)
+
+    def test_stdlib_fallback(self):
+        for name in self.backends():
+            # too large for the fast backends' integers
+            self.assertEqual(json.loads(codec.dumps({'big': 2 ** 70})), {'big': 2 ** 70}, name)
+            self.assertEqual(json.loads(codec.dumpb({'big': 2 ** 70}).decode('utf-8')), {'big': 2 ** 70}, name)
+            with self.assertRaises(TypeError):
+                codec.dumps({'obj': object()})
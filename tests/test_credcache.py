@@ -0,0 +1,64 @@
+from __future__ import absolute_import, print_function
+
+import datetime
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import botocore.session
+
+from faas_form import credcache
+
+def _response(expires_in):
+    expiration = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+    return {
+        'Credentials': {
+            'AccessKeyId': 'AKID',
+            'SecretAccessKey': 'SECRET',
+            'SessionToken': 'TOKEN',
+            'Expiration': expiration.strftime('%Y-%m-%dT%H:%M:%SUTC'),
+        },
+    }
+
+class CredentialCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = credcache.CredentialCache(os.path.join(self.cache_dir, 'credentials'), refresh_margin=300)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_round_trip(self):
+        value = _response(3600)
+        self.cache['key'] = value
+        self.assertIn('key', self.cache)
+        self.assertEqual(self.cache['key'], value)
+
+        mode = os.stat(os.path.join(self.cache_dir, 'credentials', 'key.json')).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o600)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.cache_dir, 'credentials'))), ['.lock', 'key.json'] if credcache.fcntl else ['key.json'])
+
+    def test_umask_unchanged(self):
+        old_umask = os.umask(0o022)
+        try:
+            self.cache['key'] = _response(3600)
+            self.assertEqual(os.umask(0o022), 0o022)
+        finally:
+            os.umask(old_umask)
+
+    def test_expiring(self):
+        self.cache['key'] = _response(60)
+        self.assertNotIn('key', self.cache)
+        with self.assertRaises(KeyError):
+            self.cache['key']
+
+        self.cache['key'] = _response(-60)
+        self.assertNotIn('key', self.cache)
+
+    def test_attach(self):
+        session = botocore.session.Session()
+        self.assertIs(credcache.attach(session, cache=self.cache), self.cache)
+        resolver = session.get_component('credential_provider')
+        self.assertIs(resolver.get_provider('assume-role').cache, self.cache)
@@ -0,0 +1,230 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import boto3
+
+from faas_form import cli
+from faas_form import codec
+from faas_form import faas
+from faas_form import hedge
+from faas_form import payloads
+from faas_form import schema
+from faas_form.standin import StandinServer
+
+SCHEMA = schema.Schema([
+    schema.StringInput('name', help='x' * 2000),
+    schema.NumberInput('count', integer=True),
+], instructions='Static schema')
+
+class StaticSchemaTest(unittest.TestCase):
+    def test_encode_decode(self):
+        value = faas.encode_static_schema(SCHEMA)
+        six.assertRegex(self, value, r'^[A-Za-z0-9+/=]+$')
+        self.assertEqual(faas.decode_static_schema(value), SCHEMA.to_json())
+
+    def test_from_tags(self):
+        value = faas.encode_static_schema(SCHEMA)
+        size = 10
+        tags = dict((faas.FaaSFunction.SCHEMA_TAG_PREFIX + str(i // size), value[i:i+size])
+                    for i in range(0, len(value), size))
+        tags[faas.FaaSFunction.MARKER] = 'description'
+        self.assertEqual(faas.FaaSFunction._static_schema_from_tags(tags), value)
+
+        self.assertIsNone(faas.FaaSFunction._static_schema_from_tags({faas.FaaSFunction.MARKER: ''}))
+
+        del tags[faas.FaaSFunction.SCHEMA_TAG_PREFIX + '0']
+        self.assertIsNone(faas.FaaSFunction._static_schema_from_tags(tags))
+
+    def test_descriptor(self):
+        descriptor = faas.FunctionDescriptor('arn', name='name')
+        self.assertFalse(hasattr(descriptor, '__dict__'))
+        func = descriptor.bind()
+        self.assertEqual((func.id, func.name, func.description), ('arn', 'name', None))
+        self.assertIsNone(func._session)
+
+    def test_split_qualifier(self):
+        arn = 'arn:aws:lambda:us-east-1:123456789012:function:name'
+        self.assertEqual(faas.split_qualifier('name'), ('name', None))
+        self.assertEqual(faas.split_qualifier('name:live'), ('name', 'live'))
+        self.assertEqual(faas.split_qualifier(arn), (arn, None))
+        self.assertEqual(faas.split_qualifier(arn + ':3'), (arn, '3'))
+
+        for partial in ['123456789012:function:name', 'function:name']:
+            self.assertEqual(faas.split_qualifier(partial), (partial, None))
+            self.assertEqual(faas.split_qualifier(partial + ':live'), (partial, 'live'))
+
+        func = faas.FaaSFunction(arn, qualifier='live')
+        self.assertEqual(func.qualified_id, arn + ':live')
+
+    def test_get_schema_static(self):
+        func = faas.FaaSFunction('arn', static_schema=faas.encode_static_schema(SCHEMA), session=object())
+        self.assertEqual(func.get_schema().to_json(), SCHEMA.to_json())
+        func = faas.FaaSFunction('arn', static_schema=faas.encode_static_schema(SCHEMA), session=object(), qualifier='$LATEST')
+        self.assertEqual(func.get_schema().to_json(), SCHEMA.to_json())
+
+def handler(event, context):
+    event = payloads.decode_request(event)
+    response = {}
+    if payloads.is_schema_request(event):
+        payloads.set_schema_reponse(response, SCHEMA, request=event)
+    else:
+        payloads.set_result(response, '{} x {}'.format(event['name'], int(event['count'])))
+    return payloads.encode_response(response, event)
+
+class StandinTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server = StandinServer()
+        self.server.start()
+        self.environ = {
+            faas.ENDPOINT_URL_ENV_VAR: self.server.url,
+            'FAAS_FORM_CACHE_DIR': self.cache_dir,
+        }
+        self.old_environ = dict((key, os.environ.get(key)) for key in self.environ)
+        os.environ.update(self.environ)
+        self.session = boto3.session.Session(aws_access_key_id='standin',
+                                             aws_secret_access_key='standin',
+                                             region_name='us-east-1')
+
+        self.tagged_arn = self.server.add_function('tagged', handler, tags={faas.FaaSFunction.MARKER: 'Tagged'})
+        self.server.add_function('env', handler, env={faas.FaaSFunction.MARKER: 'Env'})
+        for i in range(60):
+            self.server.add_function('other-{:02d}'.format(i), handler)
+
+    def tearDown(self):
+        self.server.stop()
+        for key, value in self.old_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.cache_dir)
+
+    def test_list(self):
+        funcs = faas.FaaSFunction.list(session=self.session)
+        self.assertEqual(sorted(funcs), ['env', 'tagged'])
+        self.assertEqual(funcs['tagged'].id, self.tagged_arn)
+        self.assertEqual(funcs['tagged'].description, 'Tagged')
+        self.assertEqual(funcs['env'].description, 'Env')
+        self.assertIsInstance(funcs['tagged'], faas.FunctionDescriptor)
+
+        func = funcs['tagged'].bind(self.session)
+        self.assertIs(func.session, self.session)
+        self.assertEqual(func.get_schema().to_json(), SCHEMA.to_json())
+
+    def test_add_remove(self):
+        faas.FaaSFunction.add('other-42', description='Added', session=self.session)
+        self.assertEqual(faas.FaaSFunction.list(env=False, session=self.session)['other-42'].description, 'Added')
+
+        faas.FaaSFunction.remove('other-42', session=self.session)
+        self.assertNotIn('other-42', faas.FaaSFunction.list(env=False, session=self.session))
+
+    def test_publish_schema(self):
+        faas.FaaSFunction.publish_schema('tagged', SCHEMA, session=self.session)
+        faas.FaaSFunction.publish_schema('env', SCHEMA, env=True, session=self.session)
+        funcs = faas.FaaSFunction.list(session=self.session)
+        for name in ['tagged', 'env']:
+            self.assertEqual(funcs[name].bind(self.session).get_schema().to_json(), SCHEMA.to_json())
+
+    def test_invoke(self):
+        func = faas.FaaSFunction(self.tagged_arn, session=self.session)
+        schema = func.get_schema()
+        self.assertEqual(schema.to_json(), SCHEMA.to_json())
+        self.assertIn(payloads.GZIP_ENCODING, func.capabilities)
+
+        response = func.invoke(schema.validate_values({'name': 'a', 'count': 2}))
+        self.assertIsNone(response.get('FunctionError'))
+        self.assertEqual(payloads.get_result(func.read_payload(response)), 'a x 2')
+        self.assertIsNone(func.ping()) # already warm
+        
+        sent = []
+        client_invoke = func._client_invoke
+        def capture(client=None, **kwargs):
+            sent.append(kwargs['Payload'])
+            return client_invoke(client, **kwargs)
+        func._client_invoke = capture
+        func.invoke(schema.validate_values({'name': u'\u00e9\u4e2d' * 10, 'count': 1}))
+        self.assertEqual(func.last_call['request_size'], len(sent[0]))
+        self.assertEqual(codec.loads(sent[0])['name'], u'\u00e9\u4e2d' * 10)
+
+    def test_hedged_schema(self):
+        calls = []
+        def slow_first(event, context):
+            calls.append(event)
+            if len(calls) == 1:
+                time.sleep(0.3)
+            return handler(event, context)
+        self.server.add_function('slow-first', slow_first)
+        func = faas.FaaSFunction('slow-first', session=self.session)
+        hedge_stats = hedge.HedgeStats(None)
+        self.assertEqual(func.get_schema(hedge_after=0.05, hedge_stats=hedge_stats).to_json(), SCHEMA.to_json())
+        self.assertEqual((hedge_stats.hedged, hedge_stats.hedge_won), (1, 1))
+        # the first request's latency, which was at least the threshold
+        self.assertGreaterEqual(hedge_stats.latencies['slow-first'][0], 0.05)
+
+        # the losing request doesn't change the function when it finishes
+        last_call, capabilities = dict(func.last_call), func.capabilities
+        self.assertIn(payloads.GZIP_ENCODING, capabilities)
+        time.sleep(0.4)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(func.last_call, last_call)
+        self.assertIs(func.capabilities, capabilities)
+
+    def test_qualifiers(self):
+        self.server.add_function('aliased', handler, tags={faas.FaaSFunction.MARKER: ''},
+                                 aliases={'live': '2', 'beta': '3'}, provisioned=['live', '2'])
+        funcs = faas.FaaSFunction.list(session=self.session, provisioned=True)
+        self.assertEqual(funcs['aliased'].provisioned, ['live', '2'])
+        self.assertEqual(funcs['tagged'].provisioned, [])
+        self.assertIsNone(faas.FaaSFunction.list(session=self.session)['aliased'].provisioned)
+
+        func = funcs['aliased'].bind(self.session, qualifier='live')
+        self.assertIsNone(func.ping()) # provisioned, so already initialized
+        response = func.invoke(SCHEMA.validate_values({'name': 'a', 'count': 1}))
+        self.assertEqual(response['ExecutedVersion'], '2')
+        self.assertEqual(payloads.get_result(func.read_payload(response)), 'a x 1')
+
+        self.assertIsNotNone(funcs['aliased'].bind(self.session, qualifier='beta').ping())
+        invocations = self.server.service.get('aliased').invocations
+        self.assertEqual((invocations['live'], invocations['beta'], invocations['$LATEST']), (2, 1, 0))
+
+        with self.assertRaises(Exception):
+            funcs['aliased'].bind(self.session, qualifier='missing').ping()
+
+    def test_result_cache_version(self):
+        self.server.add_function('aliased', handler, aliases={'live': '2'})
+        cached = schema.Schema(SCHEMA.inputs, cache_ttl=60)
+        values = SCHEMA.validate_values({'name': 'a', 'count': 1})
+        invocations = self.server.service.get('aliased').invocations
+
+        func = faas.FaaSFunction('aliased', session=self.session, qualifier='live')
+        self.assertEqual(func.get_version(), '2:')
+        for _ in range(2):
+            self.assertEqual(payloads.get_result(cli._invoke(func, cached, values)), 'a x 1')
+        self.assertEqual(invocations['live'], 1)
+
+        # a new function object (a new CLI run) sees the alias has moved
+        self.server.service.get('aliased').aliases['live'] = '3'
+        func = faas.FaaSFunction('aliased', session=self.session, qualifier='live')
+        self.assertEqual(payloads.get_result(cli._invoke(func, cached, values)), 'a x 1')
+        self.assertEqual(invocations['live'], 2)
+
+    def test_static_schema_qualified(self):
+        self.server.add_function('aliased', handler, tags={faas.FaaSFunction.MARKER: ''}, aliases={'live': '2'})
+        faas.FaaSFunction.publish_schema('aliased', schema.Schema([schema.StringInput('newer')]), session=self.session)
+        funcs = faas.FaaSFunction.list(session=self.session)
+        self.assertEqual(funcs['aliased'].bind(self.session).get_schema().to_json()['inputs'][0]['name'], 'newer')
+        func = funcs['aliased'].bind(self.session, qualifier='live')
+        self.assertEqual(func.get_schema().to_json(), SCHEMA.to_json())
+        self.assertEqual(self.server.service.get('aliased').invocations['live'], 1)
@@ -0,0 +1,75 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import itertools
+import threading
+import time
+import unittest
+
+from faas_form import cli
+from faas_form import hedge
+
+def make_func(delays):
+    counter = itertools.count()
+    lock = threading.Lock()
+    def func():
+        with lock:
+            attempt = next(counter)
+        time.sleep(delays[attempt])
+        return attempt
+    return func
+
+class HedgedCallTest(unittest.TestCase):
+    def test_fast(self):
+        result, latency, hedged, hedge_won = hedge.hedged_call(make_func([0, 0]), 0.5)
+        self.assertEqual(result, 0)
+        self.assertFalse(hedged)
+        self.assertFalse(hedge_won)
+
+    def test_hedge_wins(self):
+        result, latency, hedged, hedge_won = hedge.hedged_call(make_func([1.0, 0]), 0.05)
+        self.assertEqual(result, 1)
+        self.assertTrue(hedged)
+        self.assertTrue(hedge_won)
+        # the first call's latency so far, not the second call's
+        self.assertGreaterEqual(latency, 0.05)
+        self.assertLess(latency, 0.5)
+
+    def test_hedge_loses(self):
+        result, latency, hedged, hedge_won = hedge.hedged_call(make_func([0.1, 1.0]), 0.05)
+        self.assertEqual(result, 0)
+        self.assertTrue(hedged)
+        self.assertFalse(hedge_won)
+        self.assertGreaterEqual(latency, 0.1)
+        self.assertLess(latency, 0.5)
+
+class HedgeStatsTest(unittest.TestCase):
+    def test_threshold(self):
+        stats = hedge.HedgeStats(None)
+        self.assertEqual(stats.threshold('f', 0.25), 0.25)
+        self.assertEqual(stats.threshold('f', '0.25'), 0.25)
+        self.assertEqual(stats.threshold('f', 'p90'), hedge.HedgeStats.DEFAULT_THRESHOLD)
+
+        for i in range(100):
+            stats.record('f', i / 100., False, False)
+        self.assertEqual(stats.threshold('f', 'p90'), 0.9)
+        self.assertEqual(stats.requests, 100)
+
+    def test_parse_threshold(self):
+        self.assertEqual(hedge.parse_threshold('0.25'), 0.25)
+        self.assertEqual(hedge.parse_threshold('0'), 0)
+        self.assertEqual(hedge.parse_threshold('p95'), 'p95')
+        for value in ['fast', '-1', 'nan', 'inf', 'p0', 'p101', '']:
+            with self.assertRaises(ValueError):
+                hedge.parse_threshold(value)
+
+    def test_threshold_argument(self):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('--hedge-schema', type=cli.hedge_threshold)
+        self.assertEqual(parser.parse_args(['--hedge-schema', 'p90']).hedge_schema, 'p90')
+        with self.assertRaises(argparse.ArgumentTypeError):
+            cli.hedge_threshold('fast')
@@ -0,0 +1,68 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from faas_form import index
+
+ENTRIES = [
+    index.IndexEntry('deploy-service', 'arn:aws:lambda:us-east-1:123456789012:function:deploy-service', 'Deploy a service'),
+    index.IndexEntry('deploy-stack', 'arn:aws:lambda:us-east-1:123456789012:function:deploy-stack', None),
+    index.IndexEntry('status', 'arn:aws:lambda:us-east-1:123456789012:function:status', 'Check\tstatus'),
+]
+
+class NameIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test' + index.INDEX_SUFFIX)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        name_index = index.NameIndex(self.path, ENTRIES)
+        name_index.save()
+
+        loaded = index.NameIndex.load(self.path)
+        self.assertEqual(loaded.names(), ['deploy-service', 'deploy-stack', 'status'])
+        self.assertEqual(loaded.get('deploy-stack'), ENTRIES[1])
+        self.assertEqual(loaded.get('status').description, 'Check status')
+
+        with open(self.path) as fp:
+            self.assertEqual([line.split('\t')[0] for line in fp], loaded.names())
+
+    def test_provisioned(self):
+        entry = index.IndexEntry('status', ENTRIES[2].arn, provisioned='live,3')
+        index.NameIndex(self.path, ENTRIES[:2] + [entry]).save()
+        loaded = index.NameIndex.load(self.path)
+        self.assertEqual(loaded.get('status').provisioned_qualifiers, ['live', '3'])
+        self.assertEqual(loaded.get('deploy-stack').provisioned_qualifiers, [])
+        self.assertEqual(loaded.get('status').to_descriptor().provisioned, ['live', '3'])
+
+    def test_load_missing(self):
+        self.assertEqual(len(index.NameIndex.load(self.path)), 0)
+
+    def test_resolve(self):
+        name_index = index.NameIndex(self.path, ENTRIES)
+
+        self.assertEqual(name_index.resolve('status').name, 'status')
+        self.assertEqual(name_index.resolve('deploy-se').name, 'deploy-service')
+        self.assertIsNone(name_index.resolve('nothing-like-it'))
+
+        with self.assertRaises(index.AmbiguousNameError) as cm:
+            name_index.resolve('deploy-')
+        self.assertEqual(cm.exception.candidates, ['deploy-service', 'deploy-stack'])
+
+    def test_close_names_not_resolved(self):
+        name_index = index.NameIndex(self.path, ENTRIES)
+        for name in ['stauts', 'deploy-servic3']:
+            with self.assertRaises(index.UnknownNameError) as cm:
+                name_index.resolve(name)
+            self.assertIn('Did you mean', str(cm.exception))
+        self.assertEqual(cm.exception.suggestions, ['deploy-service'])
@@ -0,0 +1,122 @@
+from __future__ import absolute_import, print_function
+
+import base64
+import sys
+import threading
+import time
+import unittest
+
+import faas_form
+from faas_form import payloads
+from faas_form.cache import FragmentCache
+from faas_form.local import LocalFunction, load_handler
+
+SCHEMA = faas_form.Schema([
+    faas_form.StringInput('name'),
+])
+
+COMMON = faas_form.Fragment([
+    faas_form.StringInput('environment', help='The environment to deploy to'),
+    faas_form.StringInput('ticket', help='The change ticket for the deployment'),
+])
+
+def fragment_handler(event, context):
+    event = faas_form.decode_request(event)
+    response = {}
+    faas_form.set_schema_reponse(response, faas_form.Schema([COMMON, faas_form.StringInput('name')]),
+                                 request=event)
+    return faas_form.encode_response(response, event)
+
+def handler(event, context):
+    event = faas_form.decode_request(event)
+    print('handling', context.function_name)
+    response = {}
+    if faas_form.is_schema_request(event):
+        faas_form.set_schema_reponse(response, SCHEMA, request=event)
+    elif event['name'] == 'error':
+        raise ValueError('bad name')
+    else:
+        faas_form.set_result(response, 'Hello, {}'.format(event['name']))
+    return faas_form.encode_response(response, event)
+
+def numbers_handler(event, context):
+    event = faas_form.decode_request(event)
+    response = {}
+    if faas_form.is_schema_request(event):
+        faas_form.set_schema_reponse(response, faas_form.Schema([faas_form.NumberListInput('series')]),
+                                     request=event)
+    else:
+        series = faas_form.get_numbers(event, 'series')
+        faas_form.set_result(response, {'sum': sum(series), 'packed': not isinstance(event['series'], list)})
+    return faas_form.encode_response(response, event)
+
+def slow_handler(event, context):
+    print('start', event['n'])
+    time.sleep(0.01)
+    print('end', event['n'])
+    return {}
+
+class LocalFunctionTest(unittest.TestCase):
+    def test_load_handler(self):
+        self.assertIs(load_handler('tests.test_local:handler'), handler)
+        self.assertIs(load_handler('tests.test_local.handler'), handler)
+        with self.assertRaises(ValueError):
+            load_handler('tests.test_local:missing')
+        with self.assertRaises(ValueError):
+            load_handler('handler')
+
+    def test_invoke(self):
+        func = LocalFunction('tests.test_local:handler')
+        self.assertEqual(func.get_schema().to_json(), SCHEMA.to_json())
+        self.assertIn(payloads.GZIP_ENCODING, func.capabilities)
+
+        payload = func.read_payload(func.invoke({'name': 'Alice'}))
+        self.assertEqual(payloads.get_result(payload), 'Hello, Alice')
+
+    def test_init_duration(self):
+        func = LocalFunction('test', handler=handler)
+        self.assertIsNotNone(func.ping())
+        self.assertIsNone(func.ping())
+
+    def test_function_error(self):
+        func = LocalFunction('test', handler=handler)
+        response = func.invoke({'name': 'error'})
+        self.assertEqual(response['FunctionError'], 'Unhandled')
+        payload = func.read_payload(response)
+        self.assertEqual(payload['errorType'], 'ValueError')
+        self.assertIn('handling test', base64.b64decode(response['LogResult']).decode('utf-8'))
+
+    def test_fragments(self):
+        func = LocalFunction('test', handler=fragment_handler)
+        fragment_cache = FragmentCache('unused')
+        first = func.get_schema(fragment_cache=fragment_cache)
+        first_size = func.last_call['response_size']
+        self.assertEqual(fragment_cache.held(func.qualified_id), [COMMON.id])
+
+        second = func.get_schema(fragment_cache=fragment_cache)
+        self.assertLess(func.last_call['response_size'], first_size)
+        self.assertEqual(second.to_json(), first.to_json())
+
+    def test_number_list(self):
+        func = LocalFunction('test', handler=numbers_handler)
+        schema = func.get_schema()
+        self.assertIn(payloads.PACKED_CAPABILITY, func.capabilities)
+        values = schema.validate_values({'series': list(range(1000))})
+        payload = func.read_payload(func.invoke(values))
+        self.assertEqual(payloads.get_result(payload), {'sum': 499500, 'packed': True})
+
+    def test_concurrent_logs(self):
+        func = LocalFunction('test', handler=slow_handler)
+        stdout = sys.stdout
+        logs = {}
+        def invoke(n):
+            response = func._client_invoke(LogType='Tail', Payload=b'{"n": %d}' % n)
+            logs[n] = base64.b64decode(response['LogResult']).decode('utf-8')
+        threads = [threading.Thread(target=invoke, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIs(sys.stdout, stdout)
+        for n, log in logs.items():
+            self.assertEqual(log.splitlines()[:2], ['start {}'.format(n), 'end {}'.format(n)])
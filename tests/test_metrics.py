@@ -0,0 +1,108 @@
+from __future__ import absolute_import, print_function
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from faas_form import cli
+from faas_form import config
+from faas_form import metrics
+from faas_form.faas import FaaSFunction
+from faas_form.local import LocalFunction
+
+def handler(event, context):
+    return {}
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.cache_dir, 'invocations.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_record(self):
+        log = metrics.MetricsLog(self.path)
+        func = FaaSFunction('arn:aws:lambda:us-east-1:123456789012:function:f', session=object())
+        call = {'invoke': 0.1234, 'decode': 0.001, 'request_size': 10, 'response_size': 20, 'cold': True}
+        metrics.record('invoke', func, 2, timings={'schema': 0.05}, call=call, log=log)
+        metrics.record('invoke', LocalFunction('test', handler=handler), log=log)
+
+        records = list(log.records())
+        self.assertEqual(len(records), 1)
+        rec = records[0]
+        self.assertEqual(rec['arn'], func.id)
+        self.assertEqual(rec['round'], 2)
+        self.assertEqual(rec['ms'], {'schema': 50.0, 'invoke': 123.4, 'decode': 1.0})
+        self.assertEqual((rec['req'], rec['resp'], rec['cold']), (10, 20, True))
+
+    def test_rotate(self):
+        log = metrics.MetricsLog(self.path, max_size=200, backups=2)
+        for i in range(50):
+            log.append({'t': i, 'arn': 'f'})
+        self.assertEqual(len(log.paths()), 3)
+        ts = [rec['t'] for rec in log.records()]
+        self.assertEqual(ts, sorted(ts))
+        self.assertEqual(ts[-1], 49)
+        self.assertLess(len(ts), 50)
+
+    def test_rotate_raced(self):
+        log = metrics.MetricsLog(self.path, max_size=200, backups=2)
+        log.append({'t': 0, 'arn': 'f'})
+        os.rename(self.path, self.path + '.1') # as if another process rotated it
+        log._rotate()
+        log.append({'t': 1, 'arn': 'f'})
+        self.assertEqual([rec['t'] for rec in log.records()], [0, 1])
+
+    def test_failed_invoke(self):
+        class UnreachableFunction(FaaSFunction):
+            def invoke(self, *args, **kwargs):
+                raise IOError('connection refused')
+        func = UnreachableFunction('arn:aws:lambda:us-east-1:123456789012:function:f', session=object())
+        old = os.environ.get(config.CACHE_DIR_ENV_VAR)
+        os.environ[config.CACHE_DIR_ENV_VAR] = self.cache_dir
+        try:
+            with self.assertRaises(IOError):
+                cli._call(func, {}, 3, {'schema': 0.01})
+            records = list(metrics.MetricsLog().records())
+        finally:
+            if old is None:
+                os.environ.pop(config.CACHE_DIR_ENV_VAR)
+            else:
+                os.environ[config.CACHE_DIR_ENV_VAR] = old
+        self.assertEqual(len(records), 1)
+        self.assertEqual((records[0]['status'], records[0]['round'], records[0]['ms']), ('failed', 3, {'schema': 10.0}))
+
+    def test_histogram(self):
+        rand = random.Random(0)
+        values = sorted(rand.lognormvariate(4, 1) for _ in range(10000))
+        histogram = metrics.Histogram()
+        for value in values:
+            histogram.add(value)
+        for p in [50, 90, 99]:
+            exact = values[int(len(values) * p / 100.0) - 1]
+            self.assertAlmostEqual(histogram.percentile(p) / exact, 1, delta=0.05)
+        self.assertIsNone(metrics.Histogram().percentile(50))
+
+    def test_aggregate(self):
+        day = 86400
+        records = [
+            {'t': 10, 'cmd': 'invoke', 'arn': 'a', 'status': 'ok', 'cold': True, 'ms': {'invoke': 100}},
+            {'t': 20, 'cmd': 'run', 'arn': 'a', 'status': 'error', 'ms': {'invoke': 200}},
+            {'t': 30, 'cmd': 'invoke', 'arn': 'b', 'status': 'cached'},
+            {'t': day + 10, 'cmd': 'invoke', 'arn': 'a', 'status': 'ok', 'ms': {'invoke': 50}},
+            {'t': day + 20, 'cmd': 'warm', 'arn': 'a', 'status': 'ok', 'cold': True},
+            {'t': day + 30, 'cmd': 'prompt', 'arn': 'b', 'status': 'ok', 'ms': {'schema': 20}},
+        ]
+        stats = metrics.aggregate(records)
+        self.assertEqual(sorted(stats), [('1970-01-01', 'a'), ('1970-01-01', 'b'), ('1970-01-02', 'a')])
+        a = stats[('1970-01-01', 'a')]
+        self.assertEqual((a.count, a.errors, a.cold, a.latency.count), (2, 1, 1, 2))
+        self.assertEqual(stats[('1970-01-01', 'b')].cached, 1)
+        self.assertEqual(stats[('1970-01-02', 'a')].cold, 0)
+        self.assertEqual(len(metrics.aggregate(records, commands=None)), 4)
+
+        self.assertEqual(sorted(metrics.aggregate(records, since=day)), [('1970-01-02', 'a')])
+        self.assertEqual(sorted(metrics.aggregate(records, function='b')), [('1970-01-01', 'b')])
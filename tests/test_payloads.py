@@ -0,0 +1,226 @@
+"""
+Created on Oct 19, 2026
+"""
+
+from __future__ import absolute_import, print_function
+
+import six
+
+import array
+import base64
+import json
+import os
+import random
+import unittest
+
+from unittest import mock
+
+from faas_form import codec
+from faas_form import payloads
+from faas_form import schema
+
+SCHEMA = schema.Schema([
+    schema.StringInput('name'),
+])
+
+class SchemaHashTest(unittest.TestCase):
+    def test_hash(self):
+        self.assertEqual(payloads.schema_hash(SCHEMA), payloads.schema_hash(SCHEMA.to_json()))
+        other = schema.Schema([schema.StringInput('other_name')])
+        self.assertNotEqual(payloads.schema_hash(SCHEMA), payloads.schema_hash(other))
+
+    def test_no_hash(self):
+        request = {}
+        payloads.set_schema_request(request)
+        self.assertTrue(payloads.is_schema_request(request))
+
+        response = {}
+        payloads.set_schema_reponse(response, SCHEMA, request=request)
+        self.assertFalse(payloads.is_schema_not_modified(response))
+        self.assertEqual(payloads.get_schema(response), SCHEMA.to_json())
+        self.assertEqual(payloads.get_schema_hash(response), payloads.schema_hash(SCHEMA))
+
+    def test_not_modified(self):
+        request = {}
+        payloads.set_schema_request(request, schema_hash=payloads.schema_hash(SCHEMA))
+
+        response = {}
+        payloads.set_schema_reponse(response, SCHEMA, request=request)
+        self.assertTrue(payloads.is_schema_not_modified(response))
+        with self.assertRaises(payloads.MissingSchemaError):
+            payloads.get_schema(response)
+
+    def test_modified(self):
+        request = {}
+        payloads.set_schema_request(request, schema_hash='stale')
+
+        response = {}
+        payloads.set_schema_reponse(response, SCHEMA, request=request)
+        self.assertFalse(payloads.is_schema_not_modified(response))
+        self.assertEqual(payloads.get_schema(response), SCHEMA.to_json())
+
+class EncodingTest(unittest.TestCase):
+    def test_small_not_compressed(self):
+        payload = {'foo': 'bar'}
+        self.assertIs(payloads.encode_payload(payload, [payloads.GZIP_ENCODING]), payload)
+
+    def test_not_supported(self):
+        payload = {'foo': ['bar'] * 1000}
+        self.assertIs(payloads.encode_payload(payload, []), payload)
+
+    def test_incompressible(self):
+        rand = random.Random(0)
+        data = bytearray(rand.randint(0, 255) for _ in range(5000))
+        payload = {'foo': base64.b64encode(bytes(data)).decode('ascii')}
+        self.assertIs(payloads.encode_payload(payload, [payloads.GZIP_ENCODING]), payload)
+
+    def test_round_trip(self):
+        request = {}
+        payloads.set_invoke_request(request)
+        payloads.set_capabilities(request)
+        request['hosts'] = ['host-{}.example.com'.format(i) for i in range(1000)]
+
+        encoded = payloads.encode_payload(request, [payloads.GZIP_ENCODING])
+        self.assertTrue(payloads.is_invoke_request(encoded))
+        self.assertNotIn('hosts', encoded)
+        self.assertLess(len(json.dumps(encoded)), len(json.dumps(request)))
+
+        decoded = payloads.decode_request(encoded)
+        self.assertEqual(decoded, request)
+
+        response = {'hosts': decoded['hosts']}
+        encoded_response = payloads.encode_response(response, decoded)
+        self.assertEqual(payloads.decode_payload(encoded_response)['hosts'], request['hosts'])
+        self.assertEqual(payloads.get_capabilities(payloads.decode_payload(encoded_response)), payloads.CAPABILITIES)
+
+    def test_data(self):
+        rand = random.Random(0)
+        incompressible = {'foo': base64.b64encode(bytes(bytearray(rand.randint(0, 255) for _ in range(5000)))).decode('ascii')}
+        for payload, dumps_calls in [
+                ({'foo': 'bar'}, 1),
+                (incompressible, 1),
+                ({'foo': ['bar'] * 1000}, 2), # the second is the compressed payload
+                ]:
+            with mock.patch.object(codec, 'dumpb', wraps=codec.dumpb) as dumpb:
+                encoded, data = payloads.encode_payload_data(payload, [payloads.GZIP_ENCODING])
+            self.assertEqual(dumpb.call_count, dumps_calls)
+            self.assertIsInstance(data, bytes)
+            self.assertEqual(codec.loads(data), encoded)
+            self.assertEqual(payloads.decode_payload(codec.loads(data)), payload)
+
+    def test_old_client(self):
+        response = {'hosts': ['host-{}'.format(i) for i in range(1000)]}
+        self.assertEqual(payloads.encode_response(response, {}), response)
+
+class FragmentsTest(unittest.TestCase):
+    def test_held_fragments_left_out(self):
+        fragment = schema.Fragment([schema.StringInput('environment')])
+        s = schema.Schema([fragment, schema.StringInput('name')])
+
+        request = {}
+        payloads.set_schema_request(request)
+        payloads.set_capabilities(request)
+        payloads.set_fragments(request, [fragment.id])
+        response = {}
+        payloads.set_schema_reponse(response, s, request=request)
+        self.assertNotIn('definitions', payloads.get_schema(response))
+        self.assertEqual(payloads.get_schema(response)['inputs'][0], {'$ref': fragment.id})
+        self.assertEqual(payloads.get_schema_hash(response), payloads.schema_hash(s))
+
+        response = {}
+        payloads.set_reinvoke_response(response, s, request={payloads.CAPABILITIES_KEY: payloads.CAPABILITIES})
+        self.assertEqual(payloads.get_schema(response), s.to_json())
+
+    def test_inlined_for_older_clients(self):
+        s = schema.Schema([
+            schema.Fragment([schema.StringInput('environment')]),
+            schema.Ref('region', name='source_region'),
+        ], definitions={'region': schema.StringInput('region', pattern='^[a-z0-9-]+$')})
+        expected = [input_obj.to_json() for input_obj in s.inputs]
+
+        for request in [None, {payloads.CAPABILITIES_KEY: [payloads.GZIP_ENCODING]}]:
+            response = {}
+            payloads.set_reinvoke_response(response, s, request=request)
+            inlined = payloads.get_schema(response)
+            self.assertNotIn('definitions', inlined)
+            self.assertEqual(inlined['inputs'], expected)
+
+class PackedNumbersTest(unittest.TestCase):
+    def test_formats(self):
+        for values, fmt in [
+                ([0, -32768, 32767], 'i2'),
+                ([0, 32768, -2 ** 31], 'i4'),
+                ([2 ** 40, 0.5], 'f4'),
+                ([0.1, 1e300], 'f8'),
+                ]:
+            packed_fmt, data = payloads.pack_numbers(values)
+            self.assertEqual(packed_fmt, fmt)
+            self.assertEqual(payloads.unpack_numbers(fmt, data).tolist(), values)
+        with self.assertRaises(ValueError):
+            payloads.pack_numbers([float('inf')])
+        with self.assertRaises(ValueError):
+            payloads.unpack_numbers('i8', '')
+    
+    def test_request(self):
+        values = {
+            'series': array.array('d', [i / 4.0 for i in range(100)]),
+            'short': array.array('d', [1, 2]),
+            'name': 'x',
+        }
+        
+        request = {}
+        payloads.set_values(request, values)
+        self.assertNotIn(payloads.PACKED_KEY, request)
+        self.assertEqual(json.loads(codec.dumps(request))['short'], [1.0, 2.0])
+        
+        request = {}
+        payloads.set_values(request, values, [payloads.PACKED_CAPABILITY])
+        self.assertEqual(request[payloads.PACKED_KEY], {'series': 'f4'})
+        request = json.loads(codec.dumps(request))
+        self.assertLess(len(json.dumps(request['series'])), len(json.dumps(values['series'].tolist())))
+        
+        event = payloads.decode_request(request)
+        self.assertNotIn(payloads.PACKED_KEY, event)
+        self.assertEqual(payloads.get_numbers(event, 'series').tolist(), values['series'].tolist())
+        self.assertEqual(payloads.get_numbers(event, 'short'), array.array('d', [1, 2]))
+        self.assertIsNone(payloads.get_numbers(event, 'missing'))
+
+class StateTest(unittest.TestCase):
+    STATE = {'round': 3, 'answers': ['a' * 20] * 10}
+
+    def test_round_trip(self):
+        response = {}
+        payloads.set_reinvoke_response(response, SCHEMA, state=self.STATE, secret='secret')
+        token = payloads.get_state_token(response)
+        six.assertRegex(self, token, r'^[A-Za-z0-9_-]+$')
+        self.assertLess(len(token), len(payloads.canonical_json(self.STATE)))
+        self.assertNotIn(payloads.STATE_KEY, payloads.get_schema(response))
+
+        request = {}
+        payloads.set_state_token(request, token)
+        self.assertEqual(payloads.get_state(request, secret=b'secret'), self.STATE)
+        self.assertIsNone(payloads.get_state({}, secret='secret'))
+
+    def test_tampered(self):
+        token = payloads.encode_state(self.STATE, secret='secret')
+        with self.assertRaises(payloads.InvalidStateError):
+            payloads.decode_state(token, secret='other')
+        tampered = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+        with self.assertRaises(payloads.InvalidStateError):
+            payloads.decode_state(tampered, secret='secret')
+        with self.assertRaises(payloads.InvalidStateError):
+            payloads.decode_state('not base64!', secret='secret')
+
+    def test_secret_required(self):
+        old = os.environ.pop(payloads.STATE_SECRET_ENV_VAR, None)
+        try:
+            with self.assertRaises(ValueError):
+                payloads.encode_state(self.STATE)
+            os.environ[payloads.STATE_SECRET_ENV_VAR] = 'from-env'
+            token = payloads.encode_state(self.STATE)
+            self.assertEqual(payloads.decode_state(token, secret='from-env'), self.STATE)
+        finally:
+            if old is None:
+                os.environ.pop(payloads.STATE_SECRET_ENV_VAR, None)
+            else:
+                os.environ[payloads.STATE_SECRET_ENV_VAR] = old
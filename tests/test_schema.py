@@ -8,6 +8,8 @@ from __future__ import absolute_import, print_function
 
 import six
 
+import array
+import os
 import unittest
 
 from unittest import mock
@@ -175,6 +177,13 @@ class SecretInputTest(unittest.TestCase):
         schema.SecretInput.from_json(INPUT_SECRET_1)
         with self.assertRaises(schema.SchemaError):
             schema.SecretInput.from_json(INPUT_SECRET_WITH_DEFAULT)
+    
+    def test_no_file_source(self):
+        for secret in ['@hunter2', '@@hunter2', '@-']:
+            with mock.patch.object(schema.SecretInput, '_input', side_effect=[secret]):
+                value = schema.SecretInput.from_json(INPUT_SECRET_1).get_value()
+            self.assertEqual(value, secret)
+            self.assertEqual(schema.SecretInput.from_json(INPUT_SECRET_1).parse_lines(iter([secret])), secret)
 
 DEFAULT_VALUE_NUMBER = 2.7
 
@@ -317,6 +326,67 @@ class StringListTest(unittest.TestCase):
         self.assertEqual(value, ['a', 'b', 'c'])
         self.assertEqual(mock_input.call_count, 5)
 
+INPUT_NUMBERLIST = {
+    'name': 'numberlist',
+    'type': 'list<number>',
+    'integer': True,
+    'minimum': 0,
+    'maximum': 100,
+}
+
+class NumberListTest(unittest.TestCase):
+    def test_from_json(self):
+        ni = schema.Schema._input_from_json(INPUT_NUMBERLIST)
+        self.assertIsInstance(ni, schema.NumberListInput)
+        self.assertEqual(ni.to_json(), dict(INPUT_NUMBERLIST, required=True))
+        with self.assertRaises(schema.SchemaError):
+            schema.NumberListInput.from_json(dict(INPUT_NUMBERLIST, default=[1]))
+    
+    def test_validate(self):
+        ni = schema.NumberListInput.from_json(INPUT_NUMBERLIST)
+        value = ni.validate([1, 2.0, '3'])
+        self.assertEqual(value, array.array('d', [1, 2, 3]))
+        self.assertEqual(ni.validate(array.array('h', [4])), array.array('d', [4]))
+        
+        for bad, message in [
+                ('1', 'Must be a list'),
+                ([1, True], 'Must be a list of numbers'),
+                ([1, 'x'], 'item 1 must be a number'),
+                ([1.5], 'items must be integers'),
+                ([-1], 'at least 0'),
+                ([101], 'at most 100'),
+                ([float('nan')], 'finite'),
+                ]:
+            with self.assertRaises(ValueError) as cm:
+                ni.validate(bad)
+            self.assertIn(message, str(cm.exception))
+        
+        ni = schema.NumberListInput('sized', size=2)
+        self.assertEqual(len(ni.validate([1.5, -2])), 2)
+        with self.assertRaises(ValueError):
+            ni.validate([1])
+    
+    def test_get_value(self):
+        input_values = ['1, 2 3', '1.5', '4', '', Exception()]
+        with mock.patch.object(schema.NumberListInput, '_input', side_effect=input_values) as mock_input:
+            value = schema.NumberListInput.from_json(INPUT_NUMBERLIST).get_value()
+        self.assertEqual(value, array.array('d', [1, 2, 3, 4]))
+        self.assertEqual(mock_input.call_count, 4)
+        
+        input_values = ['1', '2 3', '4 5', Exception()]
+        with mock.patch.object(schema.NumberListInput, '_input', side_effect=input_values) as mock_input:
+            value = schema.NumberListInput('sized', size=3).get_value()
+        self.assertEqual(value, array.array('d', [1, 2, 3]))
+        self.assertEqual(mock_input.call_count, 2)
+    
+    def test_condition(self):
+        s = schema.Schema([
+            schema.NumberListInput('thresholds', required=False),
+            schema.StringInput('alarm', condition={'input': 'thresholds', 'present': True}),
+        ])
+        self.assertEqual(s.validate_values({'thresholds': []}), {'thresholds': array.array('d')})
+        self.assertEqual(s.validate_values({'thresholds': [1], 'alarm': 'x'})['alarm'], 'x')
+
 INPUT_INVALID_NO_NAME = {
     'type': 'string',
 }
@@ -351,4 +421,302 @@ class SchemaTest(unittest.TestCase):
             schema.Schema._input_from_json(INPUT_INVALID_NO_TYPE)
         
         with self.assertRaises(schema.SchemaError):
-            schema.Schema._input_from_json(INPUT_INVALID_BAD_TYPE)
\ No newline at end of file
+            schema.Schema._input_from_json(INPUT_INVALID_BAD_TYPE)
+    
+    def test_cache_ttl(self):
+        schema_obj = {
+            'inputs': [INPUT_STRING_1],
+            'cache_ttl': 60,
+        }
+        s = schema.Schema.from_json(schema_obj)
+        self.assertEqual(s.cache_ttl, 60)
+        self.assertEqual(s.to_json()['cache_ttl'], 60)
+        
+        s = schema.Schema.from_json({'inputs': [INPUT_STRING_1]})
+        self.assertIsNone(s.cache_ttl)
+        self.assertNotIn('cache_ttl', s.to_json())
+        
+        for invalid in [0, -1, 'sixty', True]:
+            with self.assertRaises(schema.SchemaError):
+                schema.Schema.from_json({'inputs': [], 'cache_ttl': invalid})
+
+PIPE_SCHEMA = {
+    'inputs': [
+        INPUT_STRING_WITH_PATTERN,
+        INPUT_STRING_WITH_DEFAULT,
+        INPUT_NUMBER_1,
+        INPUT_STRINGLIST_1,
+        {'name': 'const_input', 'type': 'const', 'value': 'const_value'},
+        {'name': 'boolean_input', 'type': 'boolean'},
+    ],
+}
+
+class AnswerStreamTest(unittest.TestCase):
+    def test_lines(self):
+        s = schema.Schema.from_json(PIPE_SCHEMA)
+        answers = schema.AnswerStream(six.StringIO('foo\n\n1.5\na\nb\n\ny\nbar\n\n2\n\nn\n'))
+        self.assertFalse(answers.is_json)
+        
+        values = s.get_values(answers=answers)
+        self.assertEqual(values, {
+            'string_input_with_pattern': 'foo',
+            'string_input_with_default': DEFAULT_VALUE_STRING,
+            'number_input_1': 1.5,
+            'stringlist_1': ['a', 'b'],
+            'const_input': 'const_value',
+            'boolean_input': True,
+        })
+        
+        values = s.get_values(answers=answers)
+        self.assertEqual(values['string_input_with_pattern'], 'bar')
+        self.assertEqual(values['stringlist_1'], [])
+        self.assertEqual(values['boolean_input'], False)
+    
+    def test_json(self):
+        s = schema.Schema.from_json(PIPE_SCHEMA)
+        answers = schema.AnswerStream(six.StringIO(
+            '{"string_input_with_pattern": "foo", "number_input_1": 2, "stringlist_1": ["a"], "boolean_input": true}\n'
+            '{"string_input_with_pattern": "bar", "number_input_1": "3", "stringlist_1": [], "boolean_input": "n"}\n'))
+        self.assertTrue(answers.is_json)
+        
+        values = s.get_values(answers=answers)
+        self.assertEqual(values['number_input_1'], 2.0)
+        self.assertEqual(values['string_input_with_default'], DEFAULT_VALUE_STRING)
+        self.assertEqual(values['const_input'], 'const_value')
+        
+        values = s.get_values(answers=answers)
+        self.assertEqual(values['number_input_1'], 3.0)
+        self.assertEqual(values['boolean_input'], False)
+        
+        with self.assertRaises(schema.ValidationError):
+            s.get_values(answers=answers)
+    
+    def test_validation_errors(self):
+        s = schema.Schema.from_json(PIPE_SCHEMA)
+        answers = schema.AnswerStream(six.StringIO(
+            '{"string_input_with_pattern": "FOO", "number_input_1": "x", "stringlist_1": "a", "unknown": 1}'))
+        
+        with self.assertRaises(schema.ValidationError) as cm:
+            s.get_values(answers=answers)
+        self.assertEqual(len(cm.exception.errors), 5)
+
+CONDITIONAL_SCHEMA = {
+    'inputs': [
+        {'name': 'kind', 'type': 'string', 'required': False},
+        {'name': 'deploy', 'type': 'boolean'},
+        {'name': 'stage', 'type': 'string', 'condition': {'input': 'deploy', 'equals': True}},
+        {'name': 'approver', 'type': 'string', 'condition': {'input': 'stage', 'pattern': '^prod'}},
+        {'name': 'reason', 'type': 'string', 'required': False, 'condition': {'input': 'kind', 'present': False}},
+    ],
+}
+
+class ConditionTest(unittest.TestCase):
+    def test_round_trip(self):
+        s = schema.Schema.from_json(CONDITIONAL_SCHEMA)
+        self.assertEqual(schema.Schema.from_json(s.to_json()).to_json(), s.to_json())
+        for input_obj, input_json in zip(s.to_json()['inputs'], CONDITIONAL_SCHEMA['inputs']):
+            self.assertEqual(input_obj.get('condition'), input_json.get('condition'))
+        self.assertIsInstance(s.inputs[2].condition, schema.Condition)
+        
+        si = schema.StringInput('x', condition={'input': 'y', 'present': True})
+        self.assertEqual(si.to_json()['condition'], {'input': 'y', 'present': True})
+    
+    def test_invalid(self):
+        for condition in [{'present': True}, {'input': 'kind'}, {'input': 'kind', 'present': True, 'equals': 1},
+                          {'input': 'kind', 'unknown': 1}, 'kind']:
+            with self.assertRaises(schema.SchemaError):
+                schema.Schema._input_from_json({'name': 'x', 'type': 'string', 'condition': condition})
+        
+        with self.assertRaises(schema.SchemaError):
+            schema.Schema.from_json({'inputs': list(reversed(CONDITIONAL_SCHEMA['inputs']))})
+    
+    def test_validate_values(self):
+        s = schema.Schema.from_json(CONDITIONAL_SCHEMA)
+        
+        values = s.validate_values({'kind': 'app', 'deploy': False, 'stage': 'ignored'})
+        self.assertEqual(values, {'kind': 'app', 'deploy': False})
+        
+        values = s.validate_values({'deploy': 'y', 'stage': 'dev', 'reason': 'because'})
+        self.assertEqual(values, {'kind': None, 'deploy': True, 'stage': 'dev', 'reason': 'because'})
+        
+        with self.assertRaises(schema.ValidationError) as cm:
+            s.validate_values({'kind': 'app', 'deploy': True, 'stage': 'prod'})
+        self.assertEqual(cm.exception.errors, ['approver: Field is required'])
+    
+    def test_lines(self):
+        s = schema.Schema.from_json(CONDITIONAL_SCHEMA)
+        answers = schema.AnswerStream(six.StringIO('app\nn\n\ny\nprod-1\nalice\nbecause\n'))
+        self.assertEqual(s.get_values(answers=answers), {'kind': 'app', 'deploy': False})
+        self.assertEqual(s.get_values(answers=answers), {
+            'kind': None, 'deploy': True, 'stage': 'prod-1', 'approver': 'alice', 'reason': 'because'})
+    
+    def test_prompt(self):
+        s = schema.Schema.from_json(CONDITIONAL_SCHEMA)
+        with mock.patch.object(schema.StringInput, '_input', side_effect=['app', 'dev']) as mock_input:
+            with mock.patch.object(schema.getch, 'getch', return_value='y'):
+                values = s.get_values()
+        self.assertEqual(values, {'kind': 'app', 'deploy': True, 'stage': 'dev'})
+        self.assertEqual(mock_input.call_count, 2)
+
+COMMON = schema.Fragment([
+    schema.StringInput('environment', pattern=r'^(dev|staging|prod)$'),
+    schema.StringInput('ticket', pattern=r'^[A-Z]+-[0-9]+$'),
+])
+
+REGIONS = schema.StringListInput('regions', pattern=r'^[a-z]{2}-[a-z]+-[0-9]$')
+
+class FragmentTest(unittest.TestCase):
+    def schema(self):
+        return schema.Schema([
+            COMMON,
+            schema.Ref('regions', name='source_regions'),
+            schema.Ref('regions', name='target_regions', required=False),
+            schema.StringInput('name'),
+        ], definitions={'regions': REGIONS})
+    
+    def test_round_trip(self):
+        s = self.schema()
+        self.assertEqual([i.name for i in s.inputs],
+                         ['environment', 'ticket', 'source_regions', 'target_regions', 'name'])
+        self.assertEqual(s.inputs[2].pattern, REGIONS.pattern)
+        self.assertFalse(s.inputs[3].required)
+        
+        obj = s.to_json()
+        self.assertEqual(obj['inputs'][0], {'$ref': COMMON.id})
+        self.assertEqual(obj['inputs'][1], {'$ref': 'regions', 'name': 'source_regions'})
+        self.assertEqual(sorted(obj['definitions']), sorted([COMMON.id, 'regions']))
+        self.assertTrue(COMMON.id.startswith(schema.FRAGMENT_ID_PREFIX))
+        
+        parsed = schema.Schema.from_json(obj)
+        self.assertEqual(parsed.to_json(), obj)
+        self.assertEqual([i.name for i in parsed.inputs], [i.name for i in s.inputs])
+    
+    def test_invalid(self):
+        obj = self.schema().to_json()
+        tampered = dict(obj, definitions=dict(obj['definitions']))
+        tampered['definitions'][COMMON.id] = [{'name': 'other', 'type': 'string'}]
+        schema._parsed_fragments.clear()
+        with self.assertRaises(schema.SchemaError):
+            schema.Schema.from_json(tampered)
+        
+        with self.assertRaises(schema.SchemaError):
+            schema.Schema.from_json({'inputs': [{'$ref': 'missing'}]})
+        with self.assertRaises(schema.SchemaError):
+            schema.Schema.from_json(dict(obj, inputs=[{'$ref': COMMON.id, 'name': 'x'}]))
+    
+    def test_fragment_cache(self):
+        class Cache(dict):
+            def put(self, fragment_id, fragment):
+                self[fragment_id] = fragment
+        fragments = Cache()
+        
+        obj = self.schema().to_json()
+        schema._parsed_fragments.clear()
+        first = schema.Schema.from_json(obj, fragments=fragments)
+        self.assertEqual(list(fragments), [COMMON.id])
+        
+        without = dict(obj, definitions={'regions': obj['definitions']['regions']})
+        second = schema.Schema.from_json(without, fragments=fragments)
+        self.assertIs(second.inputs[0], first.inputs[0]) # parsed once
+        self.assertEqual(second.to_json(), obj)
+        
+        schema._parsed_fragments.clear()
+        third = schema.Schema.from_json(without, fragments=fragments)
+        self.assertEqual(third.to_json(), obj)
+        
+        schema._parsed_fragments.clear()
+        with self.assertRaises(schema.SchemaError):
+            schema.Schema.from_json(without)
+
+class FragmentMemoTest(unittest.TestCase):
+    def test_bounded(self):
+        memo = schema._FragmentMemo(2)
+        fragments = [schema.Fragment([schema.StringInput('input_{}'.format(i))]) for i in range(3)]
+        memo.put(fragments[0].id, fragments[0])
+        memo.put(fragments[1].id, fragments[1])
+        self.assertIs(memo.get(fragments[0].id), fragments[0]) # now most recently used
+        memo.put(fragments[2].id, fragments[2])
+        self.assertEqual(len(memo), 2)
+        self.assertIsNone(memo.get(fragments[1].id))
+        self.assertIs(memo.get(fragments[0].id), fragments[0])
+
+class FileSourceTest(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as fp:
+            fp.write('a\nb\n\nc\n')
+    
+    def tearDown(self):
+        os.remove(self.path)
+    
+    def test_string(self):
+        input_values = ['@' + self.path]
+        with mock.patch.object(schema.StringInput, '_input', side_effect=input_values):
+            value = schema.StringInput.from_json(INPUT_STRING_1).get_value()
+        self.assertEqual(value, 'a\nb\n\nc\n')
+        
+        input_values = ['@@literal']
+        with mock.patch.object(schema.StringInput, '_input', side_effect=input_values):
+            value = schema.StringInput.from_json(INPUT_STRING_1).get_value()
+        self.assertEqual(value, '@literal')
+    
+    def test_string_list(self):
+        input_values = ['x', '@' + self.path, '', Exception()]
+        with mock.patch.object(schema.StringListInput, '_input', side_effect=input_values):
+            value = schema.StringListInput.from_json(INPUT_STRINGLIST_1).get_value()
+        self.assertEqual(value, ['x', 'a', 'b', 'c'])
+    
+    def test_string_list_invalid(self):
+        with open(self.path, 'a') as fp:
+            fp.write('D\n')
+        input_values = ['@' + self.path, 'a', EOFError(), Exception()]
+        with mock.patch.object(schema.StringListInput, '_input', side_effect=input_values) as mock_input:
+            value = schema.StringListInput.from_json(INPUT_STRINGLIST_WITH_PATTERN).get_value()
+        self.assertEqual(value, ['a'])
+        self.assertEqual(mock_input.call_count, 3)
+    
+    def test_string_list_size(self):
+        input_values = ['@' + self.path, 'x', Exception()]
+        with mock.patch.object(schema.StringListInput, '_input', side_effect=input_values):
+            value = schema.StringListInput.from_json(INPUT_STRINGLIST_WITH_SIZE).get_value()
+        self.assertEqual(value, ['a', 'b', 'c'])
+    
+    def test_number_list(self):
+        with open(self.path, 'w') as fp:
+            fp.write('1, 2\n3\t4\n\n5\n')
+        s = schema.Schema.from_json({'inputs': [INPUT_NUMBERLIST, INPUT_STRING_1]})
+        answers = schema.AnswerStream(six.StringIO('6 7\n@{}\n\nname\n'.format(self.path)))
+        values = s.get_values(answers=answers)
+        self.assertEqual(values['numberlist'], array.array('d', [6, 7, 1, 2, 3, 4, 5]))
+        self.assertEqual(values['string_input_1'], 'name')
+        
+        with open(self.path, 'a') as fp:
+            fp.write('x\n')
+        answers = schema.AnswerStream(six.StringIO('@{}\n\nname\n'.format(self.path)))
+        with self.assertRaises(schema.ValidationError):
+            s.get_values(answers=answers)
+    
+    def test_lines(self):
+        s = schema.Schema.from_json({'inputs': [INPUT_STRINGLIST_1, INPUT_STRING_1]})
+        answers = schema.AnswerStream(six.StringIO('@{0}\n\n@{0}\n'.format(self.path)))
+        values = s.get_values(answers=answers)
+        self.assertEqual(values, {
+            'stringlist_1': ['a', 'b', 'c'],
+            'string_input_1': 'a\nb\n\nc\n',
+        })
+    
+    def test_stdin_answers(self):
+        string_schema = schema.Schema.from_json({'inputs': [INPUT_STRINGLIST_1, INPUT_STRING_1]})
+        number_schema = schema.Schema.from_json({'inputs': [INPUT_NUMBERLIST]})
+        for s, lines in [(string_schema, '@-\n\nname\n'), (string_schema, '\n@-\n'), (number_schema, '@-\n')]:
+            answers = schema.AnswerStream(six.StringIO(lines), from_stdin=True)
+            with mock.patch('sys.stdin', six.StringIO('')):
+                with self.assertRaises(schema.ValidationError) as cm:
+                    s.get_values(answers=answers)
+            self.assertIn("Can't read @- when answers are read from stdin", str(cm.exception))
+        with mock.patch('sys.stdin', six.StringIO('a\n')):
+            self.assertEqual(schema.StringListInput.from_json(INPUT_STRINGLIST_1).parse_lines(iter(['@-', ''])), ['a'])
+        with mock.patch('sys.stdin', six.StringIO('1 2\n')):
+            self.assertEqual(schema.NumberListInput.from_json(INPUT_NUMBERLIST).parse_lines(iter(['@-', ''])),
+                             array.array('d', [1, 2]))
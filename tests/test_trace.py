@@ -0,0 +1,47 @@
+from __future__ import absolute_import, print_function
+
+import json
+import unittest
+
+import six
+
+from faas_form import trace
+
+@trace.traced('double')
+def double(x):
+    return 2 * x
+
+class TraceTest(unittest.TestCase):
+    def tearDown(self):
+        trace.disable()
+
+    def test_disabled(self):
+        self.assertFalse(trace.is_enabled())
+        with trace.span('a') as s1, trace.span('b') as s2:
+            self.assertIs(s1, s2)
+        self.assertEqual(double(2), 4)
+        self.assertIsNone(trace.disable())
+
+    def test_spans(self):
+        tracer = trace.enable()
+        with trace.span('outer', key='value'):
+            self.assertEqual(double(2), 4)
+            with trace.user_span('prompt'):
+                pass
+        self.assertEqual(list(trace.iterate('page', [1, 2])), [1, 2])
+        with self.assertRaises(ValueError):
+            with trace.span('failing'):
+                raise ValueError
+        self.assertIs(trace.disable(), tracer)
+
+        events = dict((e['name'], e) for e in tracer.events)
+        self.assertEqual(events['outer']['args'], {'key': 'value'})
+        self.assertEqual(events['outer']['ph'], 'X')
+        self.assertIn('double', events)
+        self.assertEqual(events['prompt']['cat'], trace.USER_CATEGORY)
+        self.assertEqual(events['failing']['args'], {'error': 'ValueError'})
+        self.assertEqual([e['args']['index'] for e in tracer.events if e['name'] == 'page'], [0, 1])
+
+        fp = six.StringIO()
+        tracer.write(fp)
+        self.assertEqual(len(json.loads(fp.getvalue())['traceEvents']), len(tracer.events))
@@ -0,0 +1,84 @@
+from __future__ import absolute_import, print_function
+
+import unittest
+
+import faas_form
+from faas_form import payloads
+from faas_form.local import LocalFunction
+from faas_form.workflow import Answers, WorkflowRunner, WorkflowError, replay, REDACTED
+
+FIRST_SCHEMA = faas_form.Schema([
+    faas_form.ConstInput('step', value='first'),
+    faas_form.StringInput('name', required=True),
+])
+
+SECOND_SCHEMA = faas_form.Schema([
+    faas_form.ConstInput('step', value='second'),
+    faas_form.SecretInput('password', required=False),
+    faas_form.NumberInput('count', integer=True),
+])
+
+STATE_SECRET = 'test-secret'
+
+def handler(event, context):
+    event = faas_form.decode_request(event)
+    response = {}
+    if faas_form.is_schema_request(event):
+        faas_form.set_schema_reponse(response, FIRST_SCHEMA, request=event)
+    elif event['step'] == 'first':
+        faas_form.set_reinvoke_response(response, SECOND_SCHEMA, 'Hello, {}'.format(event['name']),
+                                        state={'name': event['name']}, secret=STATE_SECRET)
+    else:
+        response['name'] = faas_form.get_state(event, secret=STATE_SECRET)['name']
+        faas_form.set_result(response, 'count={}'.format(int(event['count'])))
+    return faas_form.encode_response(response, event)
+
+class WorkflowTest(unittest.TestCase):
+    def function(self):
+        return LocalFunction('test_workflow', handler=handler)
+
+    def test_ordered_answers(self):
+        answers = Answers.from_json([{'name': 'Alice'}, {'password': 'x', 'count': 3}])
+        runner = WorkflowRunner(self.function(), answers)
+        payload = runner.run()
+        self.assertEqual(payloads.get_result(payload), 'count=3')
+        self.assertEqual(payload['name'], 'Alice')
+        self.assertNotIn(payloads.STATE_KEY, runner.steps[1]['schema'])
+        self.assertEqual(len(runner.steps), 2)
+        self.assertEqual(runner.steps[0]['schema_hash'], payloads.schema_hash(FIRST_SCHEMA))
+        self.assertEqual(runner.steps[1]['values']['password'], REDACTED)
+
+    def test_answers_by_hash_and_name(self):
+        answers = Answers.from_json({
+            'steps': {payloads.schema_hash(SECOND_SCHEMA): {'count': 5}},
+            'values': {'name': 'Bob', 'count': 1},
+        })
+        payload = WorkflowRunner(self.function(), answers).run()
+        self.assertEqual(payloads.get_result(payload), 'count=5')
+
+    def test_invalid_answers(self):
+        answers = Answers.from_json([{'name': 'Alice'}, {'count': 'many'}])
+        with self.assertRaises(WorkflowError):
+            WorkflowRunner(self.function(), answers).run()
+
+        with self.assertRaises(WorkflowError):
+            Answers.from_json({'foo': {}})
+
+    def test_max_steps(self):
+        answers = Answers.from_json({'values': {'name': 'Alice'}})
+        with self.assertRaises(WorkflowError):
+            WorkflowRunner(self.function(), answers, max_steps=1).run()
+
+    def test_replay(self):
+        answers = Answers.from_json([{'name': 'Alice'}, {'count': 3}])
+        runner = WorkflowRunner(self.function(), answers)
+        runner.run()
+        record = runner.record()
+
+        results = replay(record, self.function())
+        self.assertEqual([mismatches for _, _, mismatches in results], [[], []])
+
+        record['steps'][0]['values']['name'] = 'Carol'
+        results = replay(record, self.function())
+        self.assertEqual(results[0][2], ['result'])
+        self.assertEqual(results[1][2], ['response']) # the state carried the new name